@@ -1,8 +1,9 @@
 from django.contrib.auth import get_user_model
-from django.core.management import BaseCommand
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
 from faker import Faker
 
-fake = Faker('ru_RU')
 User = get_user_model()
 
 
@@ -11,36 +12,74 @@ class Command(BaseCommand):
     Команда для наполнения БД пользователями
 
     Удаляет всех пользователей, кроме персонала, и использует библиотеку
-    Faker для создания n-ого кол-ва пользователей с паролем 1234
+    Faker для создания n-ого кол-ва пользователей с паролем 1234.
+    Хеш пароля вычисляется один раз и используется всеми пользователями,
+    пользователи создаются пачками через bulk_create
     """
     help = ('Удаляет всех пользователей, кроме персонала, и заполняет БД '
             'новыми пользователями')
 
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, nargs='?',
+                            help='Количество пользователей')
+        parser.add_argument('--noinput', '--no-input', action='store_false',
+                            dest='interactive',
+                            help='Не запрашивать количество пользователей')
+        parser.add_argument('--password', default='1234',
+                            help='Пароль всех пользователей')
+        parser.add_argument('--seed', type=int,
+                            help='Seed для воспроизводимых данных')
+        parser.add_argument('--batch-size', type=int, default=5_000,
+                            help='Количество пользователей в одном INSERT')
+
     def handle(self, *args, **options):
-        number_of_users = input('Какое кол-во пользователей добавить?\n')
-        try:
-            number_of_users = int(number_of_users)
-        except ValueError:
-            self.stderr.write(self.style.ERROR('Нечисловое значение'))
-            exit()
-
-        User.objects.filter(is_staff=False).delete()
-
-        for user_num in range(number_of_users):
-            user = User.objects.create(
-                email=fake.email(),
-                first_name=fake.first_name(),
-                last_name=fake.last_name(),
-                age=fake.random_int(min=12, max=120),
-                gender=fake.random_element(['MALE', 'FEMALE', 'OTHER']),
-                phone=fake.phone_number(),
-                city=fake.city(),
-                avatar='/path_to_default_avatar.jpg',
-            )
-            user.set_password('1234')
-            user.save()
+        number_of_users = options['count']
+        if number_of_users is None:
+            if not options['interactive']:
+                raise CommandError('Укажите количество пользователей')
+            number_of_users = input('Какое кол-во пользователей добавить?\n')
+            try:
+                number_of_users = int(number_of_users)
+            except ValueError:
+                raise CommandError('Нечисловое значение')
+        if number_of_users < 0 or options['batch_size'] < 1:
+            raise CommandError('Недопустимое количество пользователей '
+                               'или размер пачки')
+
+        fake = Faker('ru_RU')
+        if options['seed'] is not None:
+            fake.seed_instance(options['seed'])
+        # PBKDF2 занимает сотни миллисекунд, поэтому считается один раз
+        password = make_password(options['password'])
+
+        with transaction.atomic():
+            User.objects.filter(is_staff=False).delete()
+            created = 0
+            while created < number_of_users:
+                batch_size = min(options['batch_size'],
+                                 number_of_users - created)
+                users = [self.get_user(fake, created + num, password)
+                         for num in range(batch_size)]
+                User.objects.bulk_create(users, batch_size=batch_size)
+                created += batch_size
+                self.stdout.write(f'Создано пользователей: {created}')
 
         self.stdout.write(self.style.SUCCESS(
             f'Удалили всех пользователей, кроме персонала, и заполнили БД '
             f'{number_of_users} новыми пользователями')
         )
+
+    @staticmethod
+    def get_user(fake, number, password):
+        # Номер в email гарантирует уникальность при любом количестве
+        return User(
+            email=f'{fake.user_name()}.{number}@{fake.free_email_domain()}',
+            password=password,
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            age=fake.random_int(min=12, max=120),
+            gender=fake.random_element(['MALE', 'FEMALE', 'OTHER']),
+            phone=fake.phone_number(),
+            city=fake.city(),
+            avatar='/path_to_default_avatar.jpg',
+        )
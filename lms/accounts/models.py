@@ -1,5 +1,6 @@
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
 from django.core.validators import (MinValueValidator, MaxValueValidator,
                                     validate_image_file_extension)
 from django.db import models
@@ -100,3 +101,17 @@ class CustomUser(AbstractUser):
         verbose_name_plural = 'пользователи'
         ordering = 'email',
         db_table_comment = 'Кастомная и основная модель пользователя'
+        indexes = [
+            # Поиск в админке через ILIKE
+            GinIndex(fields=('email',), opclasses=('gin_trgm_ops',),
+                     name='accounts_user_email_trgm'),
+            GinIndex(fields=('last_name',), opclasses=('gin_trgm_ops',),
+                     name='accounts_user_last_name_trgm'),
+            GinIndex(fields=('phone',), opclasses=('gin_trgm_ops',),
+                     name='accounts_user_phone_trgm'),
+            GinIndex(fields=('city',), opclasses=('gin_trgm_ops',),
+                     name='accounts_user_city_trgm'),
+            # Фильтр админки по дате регистрации
+            models.Index(fields=('date_joined',),
+                         name='accounts_user_joined_idx'),
+        ]
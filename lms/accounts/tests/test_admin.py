@@ -1,10 +1,12 @@
 from django.contrib.admin import AdminSite
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, RequestFactory
 
 from accounts.admin import (UserAdmin, activate_user, deactivate_user,
                             set_default_avatar)
 from accounts.models import CustomUser
+from jobs.tests.utils import run_action
 
 User = get_user_model()
 
@@ -21,20 +23,51 @@ class AdminActionsTest(TestCase):
     def test_activate_user_action(self):
         self.user.is_active = False
         self.assertFalse(self.user.is_active)
-        activate_user(self.user_admin, None, User.objects.all())
+        run_action(activate_user, User.objects.all())
         self.user.refresh_from_db()
         self.assertTrue(self.user.is_active)
 
     def test_deactivate_user_action(self):
         self.assertTrue(self.user.is_active)
-        deactivate_user(self.user_admin, None, User.objects.all())
+        run_action(deactivate_user, User.objects.all())
         self.user.refresh_from_db()
         self.assertFalse(self.user.is_active)
 
     def test_set_default_avatar_action(self):
         self.assertNotEqual(
             self.user.avatar, '/path_to_default_avatar.jpg')
-        set_default_avatar(self.user_admin, None, User.objects.all())
+        run_action(set_default_avatar, User.objects.all())
         self.user.refresh_from_db()
         self.assertEqual(
             self.user.avatar, '/path_to_default_avatar.jpg')
+
+
+class AdminSearchTest(TestCase):
+    def setUp(self):
+        self.user_admin = UserAdmin(CustomUser, AdminSite())
+        User.objects.create_user(email='ivanov@example.com',
+                                 password='password123', last_name='Иванов',
+                                 city='Москва')
+        User.objects.create_user(email='petrov@example.com',
+                                 password='password123', last_name='Петров',
+                                 city='Казань')
+
+    def search(self, term):
+        queryset, _ = self.user_admin.get_search_results(
+            RequestFactory().get('/'), User.objects.all(), term)
+        return queryset
+
+    def test_search(self):
+        for term in 'IVANOV@', 'иванов', 'моск':
+            with self.subTest(term):
+                self.assertEqual(list(self.search(term).values_list(
+                    'email', flat=True)), ['ivanov@example.com'])
+
+    def test_search_uses_trigram_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = self.search('ivan').order_by().explain()
+        for index in ('accounts_user_email_trgm',
+                      'accounts_user_last_name_trgm',
+                      'accounts_user_phone_trgm', 'accounts_user_city_trgm'):
+            self.assertIn(index, plan)
@@ -0,0 +1,49 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+User = get_user_model()
+
+
+class UsrCommandTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            email='staff@example.com', password='staff', first_name='Staff',
+            last_name='Staff', is_staff=True)
+        User.objects.create_user(email='old@example.com', password='old',
+                                 first_name='Old', last_name='Old')
+
+    def test_bulk_create(self):
+        call_command('c_usr', 25, '--batch-size', '10', '--seed', '1',
+                     stdout=StringIO())
+        users = User.objects.filter(is_staff=False)
+        self.assertEqual(users.count(), 25)
+        self.assertFalse(users.filter(email='old@example.com').exists())
+        self.assertTrue(User.objects.filter(pk=self.staff.pk).exists())
+        self.assertTrue(users.first().check_password('1234'))
+
+    def test_hash_computed_once(self):
+        with mock.patch('accounts.management.commands.c_usr.make_password',
+                        wraps=lambda password: f'hash:{password}') as hasher:
+            call_command('c_usr', 10, '--noinput', stdout=StringIO())
+        hasher.assert_called_once_with('1234')
+
+    def test_seed_reproducible(self):
+        call_command('c_usr', 5, '--seed', '7', stdout=StringIO())
+        emails = list(User.objects.filter(is_staff=False).order_by(
+            'email').values_list('email', flat=True))
+        call_command('c_usr', 5, '--seed', '7', stdout=StringIO())
+        self.assertEqual(list(User.objects.filter(is_staff=False).order_by(
+            'email').values_list('email', flat=True)), emails)
+
+    def test_noinput_requires_count(self):
+        with self.assertRaises(CommandError):
+            call_command('c_usr', '--noinput', stdout=StringIO())
+
+    def test_interactive(self):
+        with mock.patch('builtins.input', return_value='3'):
+            call_command('c_usr', stdout=StringIO())
+        self.assertEqual(User.objects.filter(is_staff=False).count(), 3)
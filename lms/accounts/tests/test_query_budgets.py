@@ -0,0 +1,142 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.test import TestCase
+from django.urls import reverse
+from djoser.utils import encode_uid
+from rest_framework import test
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from bench.endpoints import get_route_names
+from lms.querybudget import QUERY_BUDGETS, UNBUDGETED, QueryBudgetMixin
+
+User = get_user_model()
+
+PASSWORD = 'Budget-password-0'
+
+
+class AccountsQueryBudgetTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password=PASSWORD,
+            first_name='Test', last_name='User')
+        self.staff = User.objects.create_user(
+            email='staff@example.com', password=PASSWORD,
+            first_name='Staff', last_name='User', is_staff=True)
+
+    def grow_users(self, size):
+        count = User.objects.count()
+        User.objects.bulk_create(
+            User(email=f'user{num}@example.com', password=self.user.password,
+                 first_name='User', last_name=f'{num}')
+            for num in range(count, size))
+
+    def grow_with_inactive(self, size):
+        # Активация одноразовая, поэтому на каждый запрос новый пользователь
+        self.grow_users(size)
+        self.inactive = User.objects.create_user(
+            email=f'inactive{size}@example.com', password=PASSWORD,
+            first_name='Inactive', last_name='User', is_active=False)
+
+    def assertPostBudget(self, route, data, grow=None):
+        url = reverse(route)
+        self.assertQueryBudget(
+            route, lambda: self.client.post(url, data(), format='json'),
+            grow or self.grow_users)
+
+    def test_routes_have_budgets(self):
+        routes = [name for name in get_route_names()
+                  if name.startswith('accounts:')]
+        self.assertEqual([name for name in routes if name not in
+                          QUERY_BUDGETS and name not in UNBUDGETED], [])
+
+    def test_api_root(self):
+        url = reverse('accounts:api-root')
+        self.assertQueryBudget('accounts:api-root',
+                               lambda: self.client.get(url), self.grow_users)
+
+    def test_users_list(self):
+        self.client.force_authenticate(self.staff)
+        url = reverse('accounts:customuser-list')
+        self.assertQueryBudget('accounts:customuser-list',
+                               lambda: self.client.get(url), self.grow_users)
+
+    def test_me(self):
+        self.client.force_authenticate(self.user)
+        url = reverse('accounts:customuser-me')
+        self.assertQueryBudget('accounts:customuser-me',
+                               lambda: self.client.get(url), self.grow_users)
+
+    def test_user_detail(self):
+        self.client.force_authenticate(self.user)
+        url = reverse('accounts:customuser-detail',
+                      kwargs={'id': self.user.pk})
+        self.assertQueryBudget('accounts:customuser-detail',
+                               lambda: self.client.get(url), self.grow_users)
+
+    def test_activation(self):
+        self.assertPostBudget(
+            'accounts:customuser-activation',
+            lambda: {'uid': encode_uid(self.inactive.pk),
+                     'token': default_token_generator.make_token(
+                         self.inactive)},
+            self.grow_with_inactive)
+
+    def test_resend_activation(self):
+        self.assertPostBudget(
+            'accounts:customuser-resend-activation',
+            lambda: {'email': self.inactive.email}, self.grow_with_inactive)
+
+    def test_reset_password(self):
+        self.assertPostBudget('accounts:customuser-reset-password',
+                              lambda: {'email': self.user.email})
+
+    def test_reset_password_confirm(self):
+        def data():
+            self.user.refresh_from_db()
+            return {'uid': encode_uid(self.user.pk),
+                    'token': default_token_generator.make_token(self.user),
+                    'new_password': PASSWORD,
+                    're_new_password': PASSWORD}
+        self.assertPostBudget('accounts:customuser-reset-password-confirm',
+                              data)
+
+    def test_set_password(self):
+        self.client.force_authenticate(self.user)
+        self.assertPostBudget('accounts:customuser-set-password',
+                              lambda: {'current_password': PASSWORD,
+                                       'new_password': PASSWORD,
+                                       're_new_password': PASSWORD})
+
+    def test_login(self):
+        def grow(size):
+            self.grow_users(size)
+            # Вход создает токен, если его еще нет
+            Token.objects.filter(user=self.user).delete()
+        self.assertPostBudget('accounts:login',
+                              lambda: {'email': self.user.email,
+                                       'password': PASSWORD}, grow)
+
+    def test_logout(self):
+        def grow(size):
+            self.grow_users(size)
+            token, _ = Token.objects.get_or_create(user=self.user)
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertPostBudget('accounts:logout', lambda: {}, grow)
+
+    def test_jwt_create(self):
+        self.assertPostBudget('accounts:jwt-create',
+                              lambda: {'email': self.user.email,
+                                       'password': PASSWORD})
+
+    def test_jwt_refresh(self):
+        self.assertPostBudget(
+            'accounts:jwt-refresh',
+            lambda: {'refresh': str(RefreshToken.for_user(self.user))})
+
+    def test_jwt_verify(self):
+        self.assertPostBudget(
+            'accounts:jwt-verify',
+            lambda: {'token': str(
+                RefreshToken.for_user(self.user).access_token)})
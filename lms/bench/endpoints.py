@@ -0,0 +1,131 @@
+from django.contrib import admin
+from django.urls import get_resolver, URLResolver
+
+# Пароль пользователей из c_usr, нужен для запросов входа
+PASSWORD = '1234'
+
+
+class Endpoint:
+    """
+    Запрос, которым бенчмарк измеряет маршрут
+
+    kwargs и data - функции от словаря fixtures с pk и токенами
+    засеянных данных, user - ключ пользователя в fixtures
+    """
+
+    def __init__(self, name, kwargs=None, data=None, method='get',
+                 user=None):
+        self.name = name
+        self.kwargs = kwargs or (lambda fixtures: {})
+        self.data = data or (lambda fixtures: None)
+        self.method = method
+        self.user = user
+
+
+ENDPOINTS = [
+    Endpoint('schema'),
+    Endpoint('swagger-ui'),
+    Endpoint('redoc'),
+
+    Endpoint('accounts:api-root'),
+    Endpoint('accounts:customuser-list', user='staff'),
+    Endpoint('accounts:customuser-me', user='user'),
+    Endpoint('accounts:customuser-detail',
+             kwargs=lambda fixtures: {'id': fixtures['user'].pk},
+             user='user'),
+    Endpoint('accounts:login', method='post',
+             data=lambda fixtures: {'email': fixtures['user'].email,
+                                    'password': PASSWORD}),
+    Endpoint('accounts:jwt-create', method='post',
+             data=lambda fixtures: {'email': fixtures['user'].email,
+                                    'password': PASSWORD}),
+    Endpoint('accounts:jwt-refresh', method='post',
+             data=lambda fixtures: {'refresh': fixtures['refresh']}),
+    Endpoint('accounts:jwt-verify', method='post',
+             data=lambda fixtures: {'token': fixtures['access']}),
+
+    Endpoint('education:autocomplete',
+             data=lambda fixtures: {'q': fixtures['word'][:3]}),
+    Endpoint('education:sections_list'),
+    Endpoint('education:sections_search',
+             data=lambda fixtures: {'q': fixtures['word']}),
+    Endpoint('education:section_detail',
+             kwargs=lambda fixtures: {'pk': fixtures['section'].pk}),
+    Endpoint('education:materials_list'),
+    Endpoint('education:materials_search',
+             data=lambda fixtures: {'q': fixtures['word']}),
+    Endpoint('education:material_detail',
+             kwargs=lambda fixtures: {'pk': fixtures['material'].pk}),
+    Endpoint('education:material_test',
+             kwargs=lambda fixtures: {'pk': fixtures['material'].pk}),
+    Endpoint('education:material_test_submit', method='post',
+             kwargs=lambda fixtures: {'pk': fixtures['material'].pk},
+             data=lambda fixtures: {'answers': fixtures['answers']},
+             user='user'),
+
+    Endpoint('payments:user_payments_list',
+             kwargs=lambda fixtures: {'user_pk': fixtures['user'].pk},
+             user='user'),
+    Endpoint('payments:user_payment_detail',
+             kwargs=lambda fixtures: {'user_id': fixtures['user'].pk,
+                                      'payment_pk': fixtures['payment'].pk},
+             user='user'),
+]
+
+# Маршруты, которые не измеряются, с причиной
+SKIPPED = {
+    'accounts:customuser-activation': 'нужны uid и token из письма',
+    'accounts:customuser-resend-activation': 'отправляет письмо',
+    'accounts:customuser-reset-password': 'отправляет письмо',
+    'accounts:customuser-reset-password-confirm': 'нужны uid и token '
+                                                  'из письма',
+    'accounts:customuser-set-password': 'меняет пароль пользователя',
+    'accounts:customuser-reset-username': 'не используется, '
+                                          'USERNAME_FIELD = email',
+    'accounts:customuser-reset-username-confirm': 'не используется, '
+                                                  'USERNAME_FIELD = email',
+    'accounts:customuser-set-username': 'не используется, '
+                                        'USERNAME_FIELD = email',
+    'accounts:logout': 'удаляет токен пользователя',
+    'payments:user_pay': 'обращается к Stripe',
+}
+# Из админки измеряются только списки объектов, см. get_endpoints
+SKIPPED_NAMESPACES = {
+    'admin': 'формы и действия админки',
+}
+
+
+def get_endpoints():
+    """Измеряемые запросы, включая списки всех моделей админки"""
+    endpoints = list(ENDPOINTS)
+    for model in admin.site._registry:
+        endpoints.append(Endpoint(
+            f'admin:{model._meta.app_label}_{model._meta.model_name}'
+            f'_changelist', user='staff'))
+    return endpoints
+
+
+def get_route_names(patterns=None, namespace=None):
+    """Имена всех маршрутов из lms/urls.py с пространствами имен"""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    names = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            nested = namespace
+            if pattern.namespace:
+                nested = (f'{namespace}:{pattern.namespace}' if namespace
+                          else pattern.namespace)
+            names.extend(get_route_names(pattern.url_patterns, nested))
+        elif pattern.name:
+            names.append(f'{namespace}:{pattern.name}' if namespace
+                         else pattern.name)
+    return list(dict.fromkeys(names))
+
+
+def get_uncovered_routes():
+    """Маршруты без запроса в бенчмарке и без причины пропуска"""
+    covered = {endpoint.name for endpoint in get_endpoints()}
+    return [name for name in get_route_names()
+            if name not in covered and name not in SKIPPED
+            and name.split(':')[0] not in SKIPPED_NAMESPACES]
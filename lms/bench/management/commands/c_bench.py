@@ -0,0 +1,87 @@
+from django.core.management import BaseCommand, CommandError
+
+from bench.endpoints import get_endpoints, get_uncovered_routes
+from bench.runner import (DATASETS, BASELINES_PATH, test_database,
+                          seed_dataset, get_fixtures, measure, compare,
+                          load_baselines, save_baselines)
+
+
+class Command(BaseCommand):
+    """
+    Команда для измерения всех маршрутов API
+
+    Создает тестовую БД, заполняет ее наборами данных выбранных размеров
+    командами c_edudata, c_usr и c_paydata и выполняет запросы через
+    тестовый клиент. Для каждого маршрута записываются процентили
+    времени ответа, количество и время запросов к БД и размер ответа.
+    Результаты сравниваются с сохраненными базовыми значениями,
+    при превышении бюджета команда завершается с ошибкой
+    """
+    help = 'Измеряет время, запросы к БД и размер ответов всех маршрутов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', nargs='+', choices=DATASETS,
+                            default=['small'],
+                            help='Размеры наборов данных')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Количество измеряемых запросов')
+        parser.add_argument('--seed', type=int, default=1,
+                            help='Seed для воспроизводимых данных')
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Допустимый рост времени и размера ответа')
+        parser.add_argument('--endpoint',
+                            help='Измерять только маршруты, содержащие '
+                                 'эту строку')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Не очищать кеш перед запросами')
+        parser.add_argument('--baselines', default=BASELINES_PATH,
+                            help='Файл базовых значений')
+        parser.add_argument('--update-baselines', action='store_true',
+                            help='Сохранить результаты как базовые')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Не удалять тестовую БД')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['tolerance'] < 0:
+            raise CommandError('Недопустимые параметры')
+        uncovered = get_uncovered_routes()
+        if uncovered:
+            raise CommandError(f'Маршруты без измерения: '
+                               f'{", ".join(uncovered)}')
+        endpoints = [endpoint for endpoint in get_endpoints()
+                     if options['endpoint'] is None
+                     or options['endpoint'] in endpoint.name]
+
+        results = {}
+        with test_database(options['keepdb']):
+            for size in options['size']:
+                self.stdout.write(f'Набор данных {size}')
+                seed_dataset(DATASETS[size], options['seed'])
+                fixtures = get_fixtures()
+                for endpoint in endpoints:
+                    result = measure(endpoint, fixtures, options['repeat'],
+                                     options['warm_cache'])
+                    results[f'{size}/{endpoint.name}'] = result
+                    self.write_result(endpoint.name, result)
+
+        baselines = load_baselines(options['baselines'])
+        if options['update_baselines']:
+            baselines.update(results)
+            save_baselines(baselines, options['baselines'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Базовые значения сохранены: {options["baselines"]}'))
+            return
+        regressions = compare(results, baselines, options['tolerance'])
+        if regressions:
+            raise CommandError('Превышены бюджеты:\n'
+                               + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Бюджеты не превышены'))
+
+    def write_result(self, name, result):
+        self.stdout.write(
+            f'{name:<50} {result["status"]:>4} '
+            f'p50 {result["p50_ms"]:>8.2f} мс  '
+            f'p95 {result["p95_ms"]:>8.2f} мс  '
+            f'запросов {result["queries"]:>3} '
+            f'({result["db_ms"]:.2f} мс)  '
+            f'{result["bytes"]:>8} байт')
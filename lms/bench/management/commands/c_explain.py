@@ -0,0 +1,72 @@
+from django.core.management import BaseCommand, CommandError
+
+from bench.plans import (PLANS_DIR, LARGE_TABLE_ROWS, get_plan_endpoints,
+                         get_table_rows, capture_plans, load_snapshot,
+                         save_snapshot, diff_snapshots)
+from bench.runner import DATASETS, test_database, seed_dataset, get_fixtures
+
+
+class Command(BaseCommand):
+    """
+    Команда для проверки планов частых запросов
+
+    Создает тестовую БД, заполняет ее набором данных и выполняет
+    EXPLAIN для всех SELECT-запросов списков education, StartTest,
+    списка платежей пользователя и списков объектов админки. Планы без
+    стоимостей и оценок сравниваются со снимками из bench/plans,
+    последовательное чтение больших таблиц выводится как предупреждение
+    """
+    help = 'Сравнивает планы частых запросов с сохраненными снимками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=DATASETS, default='large',
+                            help='Размер набора данных')
+        parser.add_argument('--seed', type=int, default=1,
+                            help='Seed для воспроизводимых данных')
+        parser.add_argument('--endpoint',
+                            help='Проверять только маршруты, содержащие '
+                                 'эту строку')
+        parser.add_argument('--plans-dir', default=PLANS_DIR,
+                            help='Каталог снимков планов')
+        parser.add_argument('--update', action='store_true',
+                            help='Сохранить текущие планы как снимки')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Не удалять тестовую БД')
+
+    def handle(self, *args, **options):
+        endpoints = [endpoint for endpoint in get_plan_endpoints()
+                     if options['endpoint'] is None
+                     or options['endpoint'] in endpoint.name]
+        changed = []
+        with test_database(options['keepdb']):
+            seed_dataset(DATASETS[options['size']], options['seed'])
+            fixtures = get_fixtures()
+            table_rows = get_table_rows()
+            for endpoint in endpoints:
+                snapshot, seq_scans = capture_plans(endpoint, fixtures,
+                                                    table_rows)
+                for table in seq_scans:
+                    self.stdout.write(self.style.WARNING(
+                        f'{endpoint.name}: Seq Scan по {table} '
+                        f'({table_rows[table]} строк)'))
+                if options['update']:
+                    save_snapshot(endpoint, snapshot, options['plans_dir'])
+                    continue
+                expected = load_snapshot(endpoint, options['plans_dir'])
+                if expected is None:
+                    changed.append(endpoint.name)
+                    self.stdout.write(f'{endpoint.name}: нет снимка')
+                elif expected != snapshot:
+                    changed.append(endpoint.name)
+                    self.stdout.write(diff_snapshots(endpoint, expected,
+                                                     snapshot))
+
+        if options['update']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Снимки сохранены: {options["plans_dir"]}'))
+        elif changed:
+            raise CommandError(f'Изменились планы: {", ".join(changed)}')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Планы совпадают со снимками, большие таблицы - '
+                f'от {LARGE_TABLE_ROWS} строк'))
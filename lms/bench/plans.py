@@ -0,0 +1,132 @@
+import difflib
+import json
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+from bench.endpoints import get_endpoints
+from bench.runner import get_request
+
+PLANS_DIR = Path(__file__).resolve().parent / 'plans'
+
+# Маршруты с самыми частыми запросами, планы которых сохраняются
+PLAN_ROUTES = (
+    'education:sections_list',
+    'education:materials_list',
+    'education:sections_search',
+    'education:materials_search',
+    'education:material_test',
+    'payments:user_payments_list',
+)
+# Последовательное чтение таблицы с таким количеством строк
+# считается проблемой: запрос перестал использовать индекс
+LARGE_TABLE_ROWS = 10_000
+# Поля узла плана, не зависящие от статистики и стоимости
+PLAN_NODE_FIELDS = ('Join Type', 'Strategy', 'Scan Direction',
+                    'Relation Name', 'Index Name', 'CTE Name',
+                    'Subplan Name')
+
+
+def get_plan_endpoints():
+    """Частые маршруты API и списки объектов всех моделей админки"""
+    return [endpoint for endpoint in get_endpoints()
+            if endpoint.name in PLAN_ROUTES
+            or endpoint.name.startswith('admin:')]
+
+
+def capture_queries(endpoint, fixtures):
+    """SELECT-запросы, которые выполняет маршрут с пустым кешем"""
+    request = get_request(endpoint, fixtures)
+    cache.clear()
+    reset_queries()
+    with CaptureQueriesContext(connection) as context:
+        request()
+    return [query['sql'] for query in context.captured_queries
+            if query['sql'].lstrip().upper().startswith('SELECT')]
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def normalize_plan(plan, depth=0):
+    """
+    Дерево плана в виде строк без стоимости, оценок строк и условий
+
+    В снимке остаются типы узлов, таблицы и индексы, поэтому он меняется,
+    только когда меняется способ выполнения запроса
+    """
+    line = plan['Node Type']
+    details = [f'{field}: {plan[field]}' for field in PLAN_NODE_FIELDS
+               if field in plan]
+    if details:
+        line = f'{line} ({", ".join(details)})'
+    lines = ['  ' * depth + line]
+    for subplan in plan.get('Plans', ()):
+        lines.extend(normalize_plan(subplan, depth + 1))
+    return lines
+
+
+def find_seq_scans(plan, table_rows):
+    """Таблицы, которые план читает последовательно, из числа больших"""
+    tables = []
+    if (plan['Node Type'] == 'Seq Scan'
+            and table_rows.get(plan['Relation Name'], 0)
+            >= LARGE_TABLE_ROWS):
+        tables.append(plan['Relation Name'])
+    for subplan in plan.get('Plans', ()):
+        tables.extend(find_seq_scans(subplan, table_rows))
+    return tables
+
+
+def get_table_rows():
+    """Оценка количества строк таблиц из статистики PostgreSQL"""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+        cursor.execute("SELECT relname, reltuples::bigint FROM pg_class "
+                       "WHERE relkind = 'r' AND relnamespace = "
+                       "'public'::regnamespace")
+        return dict(cursor.fetchall())
+
+
+def capture_plans(endpoint, fixtures, table_rows):
+    """Снимок планов всех запросов маршрута и найденные Seq Scan"""
+    lines, seq_scans = [], []
+    for num, sql in enumerate(capture_queries(endpoint, fixtures), start=1):
+        plan = explain(sql)
+        lines.append(f'-- Запрос {num}')
+        lines.extend(normalize_plan(plan))
+        seq_scans.extend(find_seq_scans(plan, table_rows))
+    return '\n'.join(lines) + '\n', sorted(set(seq_scans))
+
+
+def get_snapshot_path(endpoint, plans_dir=PLANS_DIR):
+    return Path(plans_dir) / f'{endpoint.name.replace(":", "__")}.txt'
+
+
+def load_snapshot(endpoint, plans_dir=PLANS_DIR):
+    try:
+        return get_snapshot_path(endpoint, plans_dir).read_text(
+            encoding='utf-8')
+    except FileNotFoundError:
+        return None
+
+
+def save_snapshot(endpoint, snapshot, plans_dir=PLANS_DIR):
+    path = get_snapshot_path(endpoint, plans_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(snapshot, encoding='utf-8')
+
+
+def diff_snapshots(endpoint, expected, actual):
+    return ''.join(difflib.unified_diff(
+        expected.splitlines(keepends=True), actual.splitlines(keepends=True),
+        fromfile=f'{endpoint.name} (снимок)',
+        tofile=f'{endpoint.name} (текущий)'))
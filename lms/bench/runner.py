@@ -0,0 +1,197 @@
+import json
+import math
+import time
+from contextlib import contextmanager
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, reset_queries
+from django.test.utils import (CaptureQueriesContext, get_runner,
+                               setup_test_environment,
+                               teardown_test_environment)
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from bench.endpoints import PASSWORD
+from education.models import Section, Material
+from payments.models import Payment
+
+User = get_user_model()
+
+BASELINES_PATH = Path(__file__).resolve().parent / 'baselines.json'
+
+# Размеры наборов данных: параметры c_edudata, c_usr и c_paydata
+DATASETS = {
+    'small': {'sections': 5, 'materials_per_section': 4,
+              'questions_per_test': 3, 'users': 20, 'payments': 50},
+    'medium': {'sections': 50, 'materials_per_section': 10,
+               'questions_per_test': 5, 'users': 200, 'payments': 2_000},
+    'large': {'sections': 500, 'materials_per_section': 20,
+              'questions_per_test': 10, 'users': 2_000,
+              'payments': 50_000},
+}
+# Запас времени сверх tolerance, иначе ответы за 1-2 мс
+# превышают бюджет из-за шума измерений
+TIME_SLACK_MS = 5
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """Отдельная тестовая БД на время измерений"""
+    setup_test_environment()
+    runner = get_runner(settings)(verbosity=0, interactive=False,
+                                  keepdb=keepdb)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def seed_dataset(dataset, seed):
+    """Заполняет БД командами генерации данных"""
+    output = StringIO()
+    # Платежи ссылаются на разделы и пользователей с RESTRICT
+    Payment.objects.all().delete()
+    call_command('c_edudata', sections=dataset['sections'],
+                 materials_per_section=dataset['materials_per_section'],
+                 questions_per_test=dataset['questions_per_test'],
+                 seed=seed, stdout=output)
+    call_command('c_usr', dataset['users'], interactive=False,
+                 password=PASSWORD, seed=seed, stdout=output)
+    call_command('c_paydata', payments=dataset['payments'], seed=seed,
+                 stdout=output)
+    if not User.objects.filter(email='bench@example.com').exists():
+        User.objects.create_superuser(
+            email='bench@example.com', password=PASSWORD,
+            first_name='Bench', last_name='Bench')
+
+
+def get_fixtures():
+    """Объекты засеянных данных, на которые ссылаются запросы"""
+    user = User.objects.filter(is_staff=False, payments__isnull=False) \
+        .order_by('pk').first()
+    material = Material.objects.filter(test_material__isnull=False) \
+        .order_by('pk').first()
+    refresh = RefreshToken.for_user(user)
+    # Первый вариант каждого вопроса теста материала
+    answers = {str(question.pk): min(choice.pk for choice
+                                     in question.choices.all())
+               for question in material.test_material.question
+               .prefetch_related('choices')}
+    return {
+        'user': user,
+        'staff': User.objects.get(email='bench@example.com'),
+        'payment': user.payments.order_by('pk').first(),
+        'section': Section.objects.order_by('pk').first(),
+        'material': material,
+        'answers': answers,
+        # Слово из названия для поиска и подсказок
+        'word': material.name.split()[0].lower(),
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def get_request(endpoint, fixtures):
+    """Функция без аргументов, выполняющая запрос endpoint"""
+    client = APIClient(raise_request_exception=False)
+    if endpoint.user:
+        user = fixtures[endpoint.user]
+        client.force_login(user)
+        client.force_authenticate(user)
+    url = reverse(endpoint.name, kwargs=endpoint.kwargs(fixtures))
+    data = endpoint.data(fixtures)
+    method = getattr(client, endpoint.method)
+    options = {'format': 'json'} if endpoint.method != 'get' else {}
+    return lambda: method(url, data, **options)
+
+
+def measure(endpoint, fixtures, repeat, warm_cache=False):
+    """
+    Выполняет запрос repeat раз после одного прогревочного
+
+    Без warm_cache кеш очищается перед каждым запросом, чтобы измерять
+    путь до БД, а не закешированный ответ
+    """
+    request = get_request(endpoint, fixtures)
+    timings, db_timings, queries = [], [], []
+    for iteration in range(repeat + 1):
+        if not warm_cache:
+            cache.clear()
+        # Журнал запросов ограничен, переполненный не дает их посчитать
+        reset_queries()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = request()
+            elapsed = time.perf_counter() - start
+        if iteration == 0:
+            continue
+        timings.append(elapsed * 1000)
+        db_timings.append(sum(float(query['time'])
+                              for query in context.captured_queries) * 1000)
+        queries.append(len(context.captured_queries))
+
+    content = (b''.join(response.streaming_content)
+               if response.streaming else response.content)
+    return {
+        'status': response.status_code,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'max_ms': round(max(timings), 2),
+        'queries': max(queries),
+        'db_ms': round(percentile(db_timings, 50), 2),
+        'bytes': len(content),
+    }
+
+
+def compare(results, baselines, tolerance):
+    """
+    Возвращает описания превышенных бюджетов
+
+    Статус и количество запросов должны совпадать с базовыми точно,
+    время и размер ответа могут вырасти не больше чем на tolerance
+    """
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+        if result['status'] != baseline['status']:
+            regressions.append(f'{name}: статус {result["status"]}, '
+                               f'ожидался {baseline["status"]}')
+        if result['queries'] > baseline['queries']:
+            regressions.append(f'{name}: запросов {result["queries"]}, '
+                               f'бюджет {baseline["queries"]}')
+        for metric, slack in (('p95_ms', TIME_SLACK_MS), ('bytes', 0)):
+            limit = baseline[metric] * (1 + tolerance) + slack
+            if result[metric] > limit:
+                regressions.append(f'{name}: {metric} {result[metric]}, '
+                                   f'бюджет {limit:.2f}')
+    return regressions
+
+
+def load_baselines(path=BASELINES_PATH):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(baselines, path=BASELINES_PATH):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(baselines, file, ensure_ascii=False, indent=2,
+                  sort_keys=True)
+        file.write('\n')
@@ -0,0 +1,62 @@
+from django.test import TestCase
+
+from bench.plans import (PLAN_ROUTES, LARGE_TABLE_ROWS, get_plan_endpoints,
+                         normalize_plan, find_seq_scans, get_table_rows,
+                         capture_plans, diff_snapshots)
+from bench.runner import DATASETS, seed_dataset, get_fixtures
+
+PLAN = {
+    'Node Type': 'Limit', 'Total Cost': 10.5, 'Plan Rows': 20,
+    'Plans': [{
+        'Node Type': 'Nested Loop', 'Join Type': 'Inner',
+        'Plans': [
+            {'Node Type': 'Seq Scan', 'Relation Name': 'big',
+             'Filter': '(id > 10)', 'Plan Rows': 5},
+            {'Node Type': 'Index Scan', 'Relation Name': 'small',
+             'Index Name': 'small_pkey', 'Scan Direction': 'Forward'},
+        ],
+    }],
+}
+
+
+class NormalizePlanTest(TestCase):
+    def test_tree_without_costs(self):
+        self.assertEqual(normalize_plan(PLAN), [
+            'Limit',
+            '  Nested Loop (Join Type: Inner)',
+            '    Seq Scan (Relation Name: big)',
+            '    Index Scan (Scan Direction: Forward, '
+            'Relation Name: small, Index Name: small_pkey)',
+        ])
+
+    def test_seq_scans_on_large_tables(self):
+        self.assertEqual(find_seq_scans(PLAN, {'big': LARGE_TABLE_ROWS}),
+                         ['big'])
+        self.assertEqual(find_seq_scans(PLAN, {'big': 10}), [])
+
+
+class CapturePlansTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(DATASETS['small'], 1)
+
+    def test_capture(self):
+        endpoints = get_plan_endpoints()
+        self.assertLessEqual(set(PLAN_ROUTES),
+                             {endpoint.name for endpoint in endpoints})
+        fixtures = get_fixtures()
+        table_rows = get_table_rows()
+        for endpoint in endpoints:
+            with self.subTest(endpoint.name):
+                snapshot, seq_scans = capture_plans(endpoint, fixtures,
+                                                    table_rows)
+                self.assertTrue(snapshot.startswith('-- Запрос 1\n'))
+                # В маленьком наборе данных нет больших таблиц
+                self.assertEqual(seq_scans, [])
+
+    def test_diff(self):
+        endpoint = get_plan_endpoints()[0]
+        diff = diff_snapshots(endpoint, 'Limit\n  Index Scan\n',
+                              'Limit\n  Seq Scan\n')
+        self.assertIn('-  Index Scan', diff)
+        self.assertIn('+  Seq Scan', diff)
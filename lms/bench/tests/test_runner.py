@@ -0,0 +1,47 @@
+from django.test import TestCase
+
+from bench.endpoints import get_endpoints, get_uncovered_routes
+from bench.runner import (DATASETS, seed_dataset, get_fixtures, measure,
+                          compare, load_baselines)
+
+
+class EndpointsTest(TestCase):
+    def test_all_routes_covered(self):
+        self.assertEqual(get_uncovered_routes(), [])
+
+
+class CompareTest(TestCase):
+    baseline = {'status': 200, 'queries': 3, 'p95_ms': 10.0,
+                'bytes': 1000}
+
+    def test_within_budget(self):
+        result = dict(self.baseline, queries=2, p95_ms=19.0, bytes=1400)
+        self.assertEqual(compare({'a': result}, {'a': self.baseline}, 0.5),
+                         [])
+
+    def test_regressions(self):
+        result = {'status': 500, 'queries': 4, 'p95_ms': 21.0,
+                  'bytes': 1600}
+        regressions = compare({'a': result, 'new': result},
+                              {'a': self.baseline}, 0.5)
+        # Маршруты без базовых значений не проверяются
+        self.assertEqual(len(regressions), 4)
+        self.assertTrue(all(line.startswith('a: ') for line in regressions))
+
+
+class MeasureTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(DATASETS['small'], 1)
+
+    def test_query_budgets(self):
+        # Количество запросов не зависит от машины, в отличие от времени
+        baselines = load_baselines()
+        fixtures = get_fixtures()
+        for endpoint in get_endpoints():
+            with self.subTest(endpoint.name):
+                result = measure(endpoint, fixtures, repeat=1)
+                baseline = baselines[f'small/{endpoint.name}']
+                self.assertEqual(result['status'], baseline['status'])
+                self.assertLessEqual(result['queries'], baseline['queries'])
+                self.assertGreater(result['bytes'], 0)
@@ -1,14 +1,24 @@
 from django.contrib import admin
+from django.db.models import Prefetch
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.html import format_html, format_html_join
 from django.utils.safestring import mark_safe
+from import_export.admin import ImportExportModelAdmin
 
+from education.cache import bump_generation
 from education.models import (Media, Section, Material, TestAnswer,
                               TestQuestion, Test)
+from education.resources import (MediaResource, SectionResource,
+                                 MaterialResource, TestAnswerResource,
+                                 TestQuestionResource, TestResource)
+from jobs.actions import background_action
+from lms.admin import EstimatedCountAdminMixin, TrigramSearchAdminMixin
 
 
 @admin.register(Media)
-class MediaAdmin(admin.ModelAdmin):
+class MediaAdmin(TrigramSearchAdminMixin, ImportExportModelAdmin):
+    resource_classes = MediaResource,
     fields = ('name', 'creation_date',
               ('local_image', 'external_image'),
               ('local_video', 'external_video'),
@@ -19,32 +29,39 @@ class MediaAdmin(admin.ModelAdmin):
     list_display_links = ('id', 'creation_date', 'local_image',
                           'external_image', 'local_video', 'external_video',
                           'local_audio', 'external_audio',)
-    search_fields = 'name', 'creation_date',
+    list_filter = 'creation_date',
+    search_fields = 'name',
     list_editable = 'name',
 
 
-@admin.action(description='Обновить выбранные элементы')
-def set_last_update_now(modeladmin, request, queryset):
+@background_action(description='Обновить выбранные элементы')
+def set_last_update_now(queryset):
     queryset.update(last_update=timezone.now())
+    # update() не отправляет сигналы, поэтому кеш сбрасывается явно
+    bump_generation(queryset.model, using=queryset.db)
 
 
-@admin.action(description='Архивировать выбранные элементы')
-def set_archived_status(modeladmin, request, queryset):
+@background_action(description='Архивировать выбранные элементы')
+def set_archived_status(queryset):
     queryset.update(status='ARCHIVED')
+    bump_generation(queryset.model, using=queryset.db)
 
 
-@admin.action(description='Закрыть выбранные элементы')
-def set_closed_status(modeladmin, request, queryset):
+@background_action(description='Закрыть выбранные элементы')
+def set_closed_status(queryset):
     queryset.update(status='CLOSED')
+    bump_generation(queryset.model, using=queryset.db)
 
 
-@admin.action(description='Открыть выбранные элементы')
-def set_open_status(modeladmin, request, queryset):
+@background_action(description='Открыть выбранные элементы')
+def set_open_status(queryset):
     queryset.update(status='OPEN')
+    bump_generation(queryset.model, using=queryset.db)
 
 
 @admin.register(Section)
-class SectionAdmin(admin.ModelAdmin):
+class SectionAdmin(TrigramSearchAdminMixin, ImportExportModelAdmin):
+    resource_classes = SectionResource,
     fields = (('name', 'status'),
               'description',
               ('creation_date', 'last_update'),
@@ -52,24 +69,29 @@ class SectionAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'status', 'creation_date', 'last_update',
                     'base_price',)
     list_display_links = ('id', 'creation_date', 'last_update',)
-    list_filter = 'status',
-    search_fields = 'name', 'creation_date', 'last_update',
+    list_filter = 'status', 'creation_date', 'last_update',
+    search_fields = 'name',
+    autocomplete_fields = 'media',
     list_editable = 'name', 'status', 'base_price',
     actions = (set_last_update_now, set_archived_status, set_closed_status,
                set_open_status)
 
 
 @admin.register(Material)
-class MaterialAdmin(admin.ModelAdmin):
+class MaterialAdmin(EstimatedCountAdminMixin, TrigramSearchAdminMixin,
+                    ImportExportModelAdmin):
+    resource_classes = MaterialResource,
     fields = (('name', 'status'),
               'section', 'text',
               ('creation_date', 'last_update'),
               'media', )
     list_display = ('id', 'name', 'status', 'creation_date', 'last_update',
                     'section_link',)
+    list_select_related = 'section',
     list_display_links = ('id', 'creation_date', 'last_update',)
-    list_filter = 'status', 'section',
-    search_fields = 'name', 'creation_date', 'last_update',
+    list_filter = 'status', 'section', 'creation_date', 'last_update',
+    search_fields = 'name',
+    autocomplete_fields = 'section', 'media',
     list_editable = 'name', 'status',
     actions = (set_last_update_now, set_archived_status, set_closed_status,
                set_open_status)
@@ -89,18 +111,52 @@ class MaterialAdmin(admin.ModelAdmin):
 
 
 @admin.register(TestAnswer)
-class TestAnswerAdmin(admin.ModelAdmin):
+class TestAnswerAdmin(EstimatedCountAdminMixin, TrigramSearchAdminMixin,
+                      ImportExportModelAdmin):
+    resource_classes = TestAnswerResource,
+    # Сортировка модели по тексту ответа требует сортировки всей таблицы
+    ordering = '-pk',
     list_display = 'id', 'answer',
     list_display_links = 'id',
+    search_fields = 'answer',
     list_editable = 'answer',
 
 
+def format_rate(value):
+    return '-' if value is None else f'{value:.2f}'
+
+
 @admin.register(TestQuestion)
-class TestQuestionAdmin(admin.ModelAdmin):
-    fields = 'question', ('answer', 'choices'), 'media',
+class TestQuestionAdmin(EstimatedCountAdminMixin, TrigramSearchAdminMixin,
+                        ImportExportModelAdmin):
+    resource_classes = TestQuestionResource,
+    # Сортировка модели по тексту вопроса требует сортировки всей таблицы
+    ordering = '-pk',
+    fields = ('question', ('answer', 'choices'), 'media', 'stats_summary',
+              'analysis_table',)
+    readonly_fields = 'stats_summary', 'analysis_table',
     list_display = 'id', 'question', 'answer_link', 'media_names',
     list_display_links = 'id', 'question',
+    list_select_related = 'answer',
     search_fields = 'question',
+    autocomplete_fields = 'answer', 'choices', 'media',
+
+    def get_queryset(self, request):
+        # __str__ вопроса читает текст ответа, в том числе в поиске для
+        # автодополнения, для media_names нужны только названия медиа
+        return super().get_queryset(request).select_related(
+            'answer').prefetch_related(
+            Prefetch('media', queryset=Media.objects.only('name')))
+
+    def stats_summary(self, obj):
+        stats = getattr(obj, 'stats', None) if obj.pk else None
+        if stats is None or not stats.answers_count:
+            return 'Нет ответов'
+        return (f'Ответов: {stats.answers_count}, '
+                f'правильных: {stats.correct_rate:.0%}, '
+                f'пропусков: {stats.skipped_count}')
+
+    stats_summary.short_description = 'Статистика'
 
     def answer_link(self, obj):
         try:
@@ -118,11 +174,62 @@ class TestQuestionAdmin(admin.ModelAdmin):
 
     media_names.short_description = 'Медиа'
 
+    def analysis_table(self, obj):
+        # Показатели рассчитывает задача education.tasks.analyze_test
+        items = []
+        for analysis in obj.analyses.order_by('test') if obj.pk else []:
+            summary = format_html(
+                'Тест {}: ответов {}, трудность {}, дискриминативность {}, '
+                'пропусков {}, расчет {}',
+                analysis.test_id, analysis.answers_count,
+                format_rate(analysis.difficulty),
+                format_rate(analysis.discrimination),
+                format_rate(analysis.skipped_rate),
+                analysis.computed_at.strftime('%d.%m.%Y %H:%M'))
+            choices = format_html_join(
+                '', '<li>{}{}: выбран {} раз ({}), корреляция {}</li>',
+                ((choice['answer'],
+                  ' (верный)' if choice['is_correct'] else '',
+                  choice['count'], format_rate(choice['rate']),
+                  format_rate(choice['discrimination']))
+                 for choice in analysis.distractors))
+            items.append((summary, choices))
+        if not items:
+            return 'Анализ не рассчитан'
+        return format_html('<ul>{}</ul>', format_html_join(
+            '', '<li>{}<ul>{}</ul></li>', items))
+
+    analysis_table.short_description = 'Анализ вопроса'
+
 
 @admin.register(Test)
-class TestAdmin(admin.ModelAdmin):
-    fields = 'material', 'question', ('creation_date', 'last_update'),
+class TestAdmin(TrigramSearchAdminMixin, ImportExportModelAdmin):
+    resource_classes = TestResource,
+    fields = ('material', 'question', 'pool_size',
+              ('creation_date', 'last_update'), 'stats_summary',)
+    readonly_fields = 'stats_summary',
     list_display = 'id', 'material', 'creation_date', 'last_update',
     list_display_links = 'id', 'material', 'creation_date', 'last_update',
-    search_fields = 'material', 'creation_date', 'last_update',
+    list_select_related = 'material',
+    list_filter = 'creation_date', 'last_update',
+    search_fields = 'material__name',
+    autocomplete_fields = 'material', 'question',
     actions = set_last_update_now,
+
+    def stats_summary(self, obj):
+        stats = getattr(obj, 'stats', None) if obj.pk else None
+        if stats is None or not stats.attempts_count:
+            return 'Нет попыток'
+        return (f'Попыток: {stats.attempts_count}, '
+                f'средний балл: {stats.average_score:.2f}, '
+                f'правильных: {stats.correct_rate:.0%}')
+
+    stats_summary.short_description = 'Статистика'
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        if db_field.name == 'question':
+            # Выбранные вопросы выводятся через __str__ с текстом ответа
+            kwargs['queryset'] = TestQuestion.objects.select_related(
+                'answer')
+        return super().formfield_for_manytomany(db_field, request,
+                                                **kwargs)
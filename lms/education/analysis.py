@@ -0,0 +1,181 @@
+import numpy as np
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from education.models import (TestAnswer, TestQuestion, TestAttempt,
+                              TestAttemptAnswer, TestStats,
+                              TestQuestionAnalysis)
+
+# Количество ответов в одной пачке попыток: память на пачку растет с
+# количеством ответов, а не с количеством вопросов теста
+ANALYSIS_CHUNK_ANSWERS = 500_000
+
+
+def _attempt_chunks(test, chunk_size):
+    """pk попыток теста пачками по возрастанию, по ключу pk без OFFSET"""
+    last_pk = 0
+    while True:
+        pks = list(TestAttempt.objects.filter(
+            test=test, pk__gt=last_pk).order_by('pk').values_list(
+            'pk', flat=True)[:chunk_size])
+        if not pks:
+            return
+        yield np.array(pks, dtype=np.int64)
+        last_pk = pks[-1]
+
+
+def _lookup(keys, values):
+    """Индексы values в отсортированном массиве keys, -1 для отсутствующих"""
+    if not len(keys):
+        return np.full(len(values), -1)
+    positions = np.searchsorted(keys, values)
+    clipped = np.minimum(positions, len(keys) - 1)
+    return np.where(keys[clipped] == values, clipped, -1)
+
+
+def _load_answers(attempt_pks, question_pks):
+    """
+    Ответы пачки попыток, по строке на заданный вопрос попытки
+
+    Возвращает индексы попыток и вопросов, pk выбранных вариантов
+    (0 - вопрос пропущен) и правильность ответов. Плотная матрица
+    попытки × вопросы не строится: в попытке из пула заданы не все
+    вопросы теста. Ответы на вопросы, которых уже нет в тесте, не
+    учитываются
+    """
+    rows = np.array(list(TestAttemptAnswer.objects.filter(
+        attempt__in=attempt_pks.tolist()).values_list(
+        'attempt', 'question', Coalesce('choice', Value(0)), 'is_correct')),
+        dtype=np.int64).reshape(-1, 4)
+    attempt_idx = _lookup(attempt_pks, rows[:, 0])
+    question_idx = _lookup(question_pks, rows[:, 1])
+    keep = question_idx >= 0
+    return (attempt_idx[keep], question_idx[keep], rows[keep, 2],
+            rows[keep, 3].astype(float))
+
+
+def _point_biserial(n, sum_x, sum_y, sum_xy, sum_y2):
+    """
+    Корреляция бинарного признака x с баллом y по накопленным суммам
+
+    Для бинарного x сумма квадратов равна сумме, поэтому хватает пяти
+    сумм, которые складываются по пачкам. Возвращает nan, если один
+    из признаков не меняется
+    """
+    numerator = n * sum_xy - sum_x * sum_y
+    denominator = np.sqrt((n * sum_x - sum_x ** 2) * (n * sum_y2 - sum_y ** 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def _rate(count, total):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 0, count / total, np.nan)
+
+
+def _to_float(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def analyze_questions(test, chunk_size=None):
+    """
+    Рассчитывает анализ вопросов теста по сохраненным попыткам
+
+    Для каждого вопроса: трудность (доля правильных ответов), точечно-
+    бисериальная корреляция правильного ответа с баллом за остальные
+    вопросы и анализ вариантов ответа - доля выбора и корреляция выбора
+    с тем же баллом. Попытки загружаются пачками, по ответам пачки
+    считаются суммы, из которых в конце получаются показатели. Размер
+    пачки попыток по умолчанию рассчитывается из ANALYSIS_CHUNK_ANSWERS.
+    Возвращает количество обработанных попыток
+    """
+    questions = sorted(test.question.values_list('pk', 'answer'))
+    question_pks = np.array([pk for pk, _ in questions], dtype=np.int64)
+    correct_choices = dict(questions)
+    question_choices = set(TestQuestion.choices.through.objects.filter(
+        testquestion__in=question_pks.tolist()).values_list(
+        'testquestion', 'testanswer'))
+    question_choices.update(questions)
+    question_choices = sorted(question_choices)
+    # Варианты ответа нумеруются ключом (индекс вопроса, pk варианта)
+    choice_base = max((pk for _, pk in question_choices), default=0) + 1
+    choice_keys = np.array(
+        [np.searchsorted(question_pks, question_pk) * choice_base + choice_pk
+         for question_pk, choice_pk in question_choices], dtype=np.int64)
+
+    size, choices_size = len(question_pks), len(choice_keys)
+    if chunk_size is None:
+        # В попытке заданы pool_size вопросов или все вопросы теста
+        per_attempt = min(test.pool_size or size, size) or 1
+        chunk_size = max(1, ANALYSIS_CHUNK_ANSWERS // per_attempt)
+    n, sum_x, sum_y, sum_xy, sum_y2, skipped = (np.zeros(size)
+                                                for _ in range(6))
+    choice_count, choice_sum_y = np.zeros(choices_size), np.zeros(choices_size)
+    attempts_count = 0
+    for attempt_pks in _attempt_chunks(test, chunk_size):
+        attempts_count += len(attempt_pks)
+        attempt_idx, question_idx, choices, correct = _load_answers(
+            attempt_pks, question_pks)
+        # Балл за остальные вопросы, чтобы вопрос не коррелировал сам с собой
+        scores = np.bincount(attempt_idx, weights=correct,
+                             minlength=len(attempt_pks))
+        rest = scores[attempt_idx] - correct
+        n += np.bincount(question_idx, None, size)
+        sum_x += np.bincount(question_idx, correct, size)
+        sum_y += np.bincount(question_idx, rest, size)
+        sum_xy += np.bincount(question_idx, correct * rest, size)
+        sum_y2 += np.bincount(question_idx, rest ** 2, size)
+        skipped += np.bincount(question_idx[choices == 0], None, size)
+
+        selected = choices > 0
+        choice_idx = _lookup(choice_keys, question_idx[selected]
+                             * choice_base + choices[selected])
+        known = choice_idx >= 0
+        choice_count += np.bincount(choice_idx[known],
+                                    minlength=choices_size)
+        choice_sum_y += np.bincount(choice_idx[known],
+                                    weights=rest[selected][known],
+                                    minlength=choices_size)
+
+    difficulty = _rate(sum_x, n)
+    discrimination = _point_biserial(n, sum_x, sum_y, sum_xy, sum_y2)
+    skipped_rate = _rate(skipped, n)
+    choice_question = choice_keys // choice_base
+    choice_rate = _rate(choice_count, n[choice_question])
+    choice_discrimination = _point_biserial(
+        n[choice_question], choice_count, sum_y[choice_question],
+        choice_sum_y, sum_y2[choice_question])
+    answers = dict(TestAnswer.objects.filter(
+        pk__in={pk for _, pk in question_choices}).values_list(
+        'pk', 'answer'))
+
+    distractors = [[] for _ in range(size)]
+    for idx, (question_pk, choice_pk) in enumerate(question_choices):
+        distractors[choice_question[idx]].append({
+            'choice': choice_pk,
+            'answer': answers.get(choice_pk, ''),
+            'is_correct': correct_choices[question_pk] == choice_pk,
+            'count': int(choice_count[idx]),
+            'rate': _to_float(choice_rate[idx]),
+            'discrimination': _to_float(choice_discrimination[idx]),
+        })
+    analyses = [TestQuestionAnalysis(
+        test=test, question_id=int(question_pk), answers_count=int(n[idx]),
+        difficulty=_to_float(difficulty[idx]),
+        discrimination=_to_float(discrimination[idx]),
+        skipped_rate=_to_float(skipped_rate[idx]),
+        distractors=distractors[idx])
+        for idx, question_pk in enumerate(question_pks)]
+
+    with transaction.atomic():
+        TestQuestionAnalysis.objects.filter(test=test).exclude(
+            question__in=question_pks.tolist()).delete()
+        TestQuestionAnalysis.objects.bulk_create(
+            analyses, update_conflicts=True,
+            unique_fields=('test', 'question'),
+            update_fields=('answers_count', 'difficulty', 'discrimination',
+                           'skipped_rate', 'distractors', 'computed_at'))
+        TestStats.objects.filter(test=test).update(
+            analyzed_attempts_count=attempts_count)
+    return attempts_count
@@ -0,0 +1,136 @@
+import bisect
+import time
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+
+from education.cache import get_generations
+from education.models import Section, Material
+
+# Модели, по названиям которых работает подсказка, и их тип в ответе
+AUTOCOMPLETE_MODELS = {
+    'section': Section,
+    'material': Material,
+}
+# Поколения проверяются не чаще раза в интервал (секунды)
+CHECK_INTERVAL = 1
+# Каталог большего размера не держим в памяти, ищем по триграммам в БД
+MAX_INDEX_NAMES = 200_000
+
+
+def normalize(text):
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+class PrefixIndex:
+    """
+    Отсортированный список ключей для поиска по префиксу через bisect
+
+    Ключ - нормализованное название, начиная с каждого слова, поэтому
+    'сорт' находит и 'Сортировка', и 'Алгоритмы сортировки'.
+    Совпадения с начала названия отдаются раньше совпадений внутри.
+    """
+
+    def __init__(self, names):
+        # names: итерируемое из (тип, pk, название)
+        heads, words = [], []
+        for kind, pk, name in names:
+            key = normalize(name)
+            heads.append((key, kind, pk, name))
+            for position, char in enumerate(key):
+                if char == ' ':
+                    words.append((key[position + 1:], kind, pk, name))
+        heads.sort()
+        words.sort()
+        self.heads = heads
+        self.words = words
+
+    def __len__(self):
+        return len(self.heads)
+
+    def search(self, prefix, limit, kinds=None):
+        prefix = normalize(prefix)
+        results, seen = [], set()
+        for entries in (self.heads, self.words):
+            position = bisect.bisect_left(entries, (prefix,))
+            while position < len(entries) and len(results) < limit:
+                key, kind, pk, name = entries[position]
+                if not key.startswith(prefix):
+                    break
+                position += 1
+                if (kinds and kind not in kinds) or (kind, pk) in seen:
+                    continue
+                seen.add((kind, pk))
+                results.append({'type': kind, 'pk': pk, 'name': name})
+        return results
+
+
+_index = None
+_index_generations = None
+_checked_at = 0
+
+
+def get_index():
+    """
+    Индекс текущего процесса, перестраивается при изменении каталога
+
+    Возвращает None, если каталог слишком велик для индекса в памяти
+    """
+    global _index, _index_generations, _checked_at
+    now = time.monotonic()
+    if _index_generations is not None and now - _checked_at < CHECK_INTERVAL:
+        return _index
+    generations = get_generations(*AUTOCOMPLETE_MODELS.values())
+    _checked_at = now
+    if generations != _index_generations:
+        _index = build_index()
+        _index_generations = generations
+    return _index
+
+
+def build_index():
+    names = []
+    for kind, model in AUTOCOMPLETE_MODELS.items():
+        names.extend((kind, pk, name) for pk, name in
+                     model.objects.values_list('pk', 'name')
+                     .order_by()[:MAX_INDEX_NAMES + 1])
+        if len(names) > MAX_INDEX_NAMES:
+            return None
+    return PrefixIndex(names)
+
+
+def reset_index():
+    global _index, _index_generations
+    _index = _index_generations = None
+
+
+def trigram_search(text, limit, kinds=None):
+    """Поиск по триграммному GIN-индексу, допускает опечатки"""
+    results = []
+    for kind, model in AUTOCOMPLETE_MODELS.items():
+        if kinds and kind not in kinds:
+            continue
+        matches = model.objects.filter(
+            name__trigram_word_similar=text,
+        ).annotate(
+            similarity=TrigramWordSimilarity(text, 'name'),
+        ).order_by('-similarity', 'name').values('pk', 'name', 'similarity')
+        results.extend({'type': kind, **match} for match in matches[:limit])
+    results.sort(key=lambda match: (-match['similarity'], match['name']))
+    for match in results:
+        del match['similarity']
+    return results[:limit]
+
+
+def autocomplete(text, limit, kinds=None):
+    """
+    Подсказки по началу слов названия из индекса в памяти
+
+    Если индекса нет или в нем ничего не нашлось (например, из-за
+    опечатки), используется нечеткий поиск по триграммам в БД
+    """
+    index = get_index()
+    if index is not None:
+        results = index.search(text, limit, kinds)
+        if results:
+            return results
+    return trigram_search(text, limit, kinds)
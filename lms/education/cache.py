@@ -0,0 +1,159 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+GENERATION_KEY = 'education:generation:{}'
+CHANGED_KEY = 'education:changed:{}'
+RESPONSE_KEY = 'education:response:{}:{}:{}'
+RESPONSE_TIMEOUT = 60 * 60
+
+
+def _generation_key(model):
+    return GENERATION_KEY.format(model._meta.label_lower)
+
+
+def _new_generation():
+    # Начальное значение от времени, чтобы после вытеснения счетчика из кеша
+    # не совпасть с поколением уже закешированных ответов
+    return int(time.time() * 1000)
+
+
+def get_generations(*models):
+    """Возвращает текущие поколения моделей в порядке их передачи"""
+    keys = [_generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, _new_generation(), timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(*models, using=None):
+    """
+    Делает недействительными ответы, собранные из данных моделей
+
+    Поколения меняются после фиксации транзакции: иначе параллельный
+    запрос успел бы закешировать старые строки под новым поколением.
+    Вне транзакции поколения меняются сразу.
+    """
+    transaction.on_commit(lambda: _bump_generation(models), using=using)
+
+
+def _bump_generation(models):
+    now = time.time()
+    for model in models:
+        key = _generation_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _new_generation(), timeout=None)
+        cache.set(CHANGED_KEY.format(model._meta.label_lower), now,
+                  timeout=None)
+
+
+def get_last_change(*models):
+    """
+    Время последнего изменения моделей, о котором знает кеш
+
+    Возвращает None, если время хотя бы одной модели неизвестно
+    """
+    keys = [CHANGED_KEY.format(model._meta.label_lower) for model in models]
+    changes = cache.get_many(keys)
+    if len(changes) < len(keys):
+        return None
+    return max(changes.values())
+
+
+class CachedResponseMixin:
+    """
+    Кеширование данных ответа GET для публичных эндпоинтов
+
+    Ключ включает поколения моделей из cache_models, поэтому любое
+    изменение этих моделей делает закешированные ответы недоступными.
+    Кешируются данные до рендеринга, поэтому формат ответа по-прежнему
+    выбирается по заголовкам запроса.
+    """
+    cache_models = ()
+    cache_timeout = RESPONSE_TIMEOUT
+
+    def get_cache_key(self, request):
+        generations = ':'.join(
+            str(generation)
+            for generation in get_generations(*self.cache_models))
+        url = hashlib.md5(
+            request.build_absolute_uri().encode()).hexdigest()
+        return RESPONSE_KEY.format(self.__class__.__name__, generations, url)
+
+    def get(self, request, *args, **kwargs):
+        cache_key = self.get_cache_key(request)
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(cache_key, response.data, self.cache_timeout)
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET запросы (If-None-Match / If-Modified-Since) с ответом 304
+
+    ETag списка строится из поколений моделей из cache_models и времени
+    их последнего изменения из кеша, без запросов к БД: поколения
+    меняются при каждой записи. Для объекта дополнительно выполняется
+    один запрос MAX(last_update)/COUNT(*) по pk, который заодно
+    показывает, что объект существует.
+    """
+    cache_models = ()
+
+    def is_detail(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_probe_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.get_queryset().model.objects.filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    def get_validators(self, request):
+        probe = {'count': None, 'last_update': None}
+        if self.is_detail():
+            probe = self.get_probe_queryset().aggregate(
+                last_update=Max('last_update'), count=Count('pk'))
+        generations = get_generations(*self.cache_models)
+        etag = hashlib.md5(':'.join(
+            str(value) for value in (
+                request.get_full_path(), probe['count'],
+                probe['last_update'], *generations)
+        ).encode()).hexdigest()
+
+        last_modified = None
+        last_change = get_last_change(*self.cache_models)
+        # Без времени изменений из кеша остается только ETag
+        if last_change is not None:
+            last_modified = int(max(
+                last_change, probe['last_update'].timestamp()
+                if probe['last_update'] is not None else 0))
+        return probe['count'], quote_etag(etag), last_modified
+
+    def get(self, request, *args, **kwargs):
+        count, etag, last_modified = self.get_validators(request)
+        if count or not self.is_detail():
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return response
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.headers['ETag'] = etag
+            if last_modified is not None:
+                response.headers['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,36 @@
+from django.db import transaction
+
+from education.models import TestAttempt, TestAttemptAnswer
+from education.snapshots import get_answer_key
+from education.stats import record_attempt
+
+
+def grade_attempt(test, user, answers, seed=None, questions=None):
+    """
+    Проверяет ответы попытки по ключу ответов и сохраняет попытку
+
+    answers - {pk вопроса строкой: pk выбранного ответа или None},
+    вопросы без ответа считаются неверными. questions - pk вопросов,
+    выбранных для попытки из теста с выборкой, или None для всех
+    вопросов теста. Ключ берется из кеша версии теста, ответы
+    сохраняются одним bulk_create
+    """
+    answer_key = get_answer_key(test)
+    if questions is not None:
+        answer_key = {str(pk): answer_key[str(pk)] for pk in questions
+                      if str(pk) in answer_key}
+    attempt = TestAttempt(test=test, user=user, seed=seed,
+                          questions=questions, max_score=len(answer_key),
+                          test_version=test.last_update)
+    attempt_answers = []
+    for question_pk, correct_pk in answer_key.items():
+        choice_pk = answers.get(question_pk)
+        attempt_answers.append(TestAttemptAnswer(
+            attempt=attempt, question_id=int(question_pk),
+            choice_id=choice_pk, is_correct=choice_pk == correct_pk))
+    attempt.score = sum(answer.is_correct for answer in attempt_answers)
+    with transaction.atomic():
+        attempt.save()
+        TestAttemptAnswer.objects.bulk_create(attempt_answers)
+        record_attempt(attempt, attempt_answers)
+    return attempt, attempt_answers
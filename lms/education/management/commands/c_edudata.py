@@ -1,198 +1,246 @@
-from django.core.management import BaseCommand
-from django.utils.timezone import make_aware
+import multiprocessing
+import random
+import secrets
+from datetime import timedelta
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, connections, transaction, IntegrityError
+from django.utils import timezone
 from djmoney.money import Money
 from faker import Faker
 
+from education.cache import bump_generation
 from education.models import (Media, Section, Material, TestAnswer,
-                              TestQuestion, Test)
+                              TestQuestion, Test, TestAttempt,
+                              TestAttemptAnswer, TestStats, TestQuestionStats,
+                              TestQuestionAnalysis)
+
+# Разделы генерируются пачками, у каждой пачки свой seed, поэтому
+# результат не зависит от количества процессов
+SECTIONS_PER_CHUNK = 100
+STATUSES = 'ARCHIVED', 'CLOSED', 'OPEN'
+
+# Таблицы в порядке удаления: промежуточные и зависимые раньше
+DELETE_ORDER = (
+    TestQuestionAnalysis, TestQuestionStats, TestStats,
+    TestAttemptAnswer, TestAttempt,
+    Test.question.through, Test,
+    TestQuestion.choices.through, TestQuestion.media.through,
+    TestQuestion, TestAnswer,
+    Material.media.through, Material,
+    Section.media.through, Section,
+    Media,
+)
+
+
+def get_dates(rng, now):
+    """Дата создания от 2 лет до полугода назад, обновления - позже"""
+    creation_date = now - timedelta(days=rng.uniform(183, 730))
+    last_update = now - timedelta(days=rng.uniform(0, 183))
+    return creation_date, last_update
+
+
+def generate_chunk(options, chunk_index, media_ids):
+    """Создает пачку разделов со всеми материалами, тестами и вопросами"""
+    seed = f'{options["seed"]}:{chunk_index}'
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    now = timezone.now()
+    batch_size = options['batch_size']
+    first = chunk_index * SECTIONS_PER_CHUNK
+    sections_count = min(SECTIONS_PER_CHUNK, options['sections'] - first)
+
+    with transaction.atomic():
+        sections = []
+        for _ in range(sections_count):
+            creation_date, last_update = get_dates(rng, now)
+            sections.append(Section(
+                name=fake.sentence(nb_words=3).rstrip('.'),
+                description=fake.paragraph(),
+                status=rng.choice(STATUSES),
+                creation_date=creation_date,
+                last_update=last_update,
+                base_price=Money(rng.randint(100, 10_000), 'RUB'),
+            ))
+        Section.objects.bulk_create(sections, batch_size=batch_size)
+
+        materials = []
+        for section in sections:
+            for order in range(options['materials_per_section']):
+                creation_date, last_update = get_dates(rng, now)
+                materials.append(Material(
+                    name=fake.sentence(nb_words=4).rstrip('.'),
+                    text=fake.paragraph(nb_sentences=8),
+                    # Статус материала совпадает со статусом раздела
+                    status=section.status,
+                    section=section,
+                    _order=order,
+                    creation_date=max(creation_date,
+                                      section.creation_date),
+                    last_update=last_update,
+                ))
+        Material.objects.bulk_create(materials, batch_size=batch_size)
+
+        tests = []
+        for material in materials:
+            creation_date, last_update = get_dates(rng, now)
+            tests.append(Test(material=material,
+                              creation_date=creation_date,
+                              last_update=last_update))
+        Test.objects.bulk_create(tests, batch_size=batch_size)
+
+        choices_count = options['choices_per_question']
+        questions_count = len(tests) * options['questions_per_test']
+        answers = [TestAnswer(answer=fake.sentence(nb_words=3))
+                   for _ in range(questions_count * choices_count)]
+        TestAnswer.objects.bulk_create(answers, batch_size=batch_size)
+        # Правильный ответ - первый из вариантов вопроса
+        questions = [
+            TestQuestion(question=fake.paragraph(nb_sentences=2),
+                         answer=answers[num * choices_count])
+            for num in range(questions_count)]
+        TestQuestion.objects.bulk_create(questions, batch_size=batch_size)
+
+        links = {
+            TestQuestion.choices.through: [
+                TestQuestion.choices.through(
+                    testquestion_id=question.pk,
+                    testanswer_id=answers[num * choices_count + shift].pk)
+                for num, question in enumerate(questions)
+                for shift in range(choices_count)],
+            Test.question.through: [
+                Test.question.through(
+                    test_id=test.pk,
+                    testquestion_id=questions[
+                        num * options['questions_per_test'] + shift].pk)
+                for num, test in enumerate(tests)
+                for shift in range(options['questions_per_test'])],
+        }
+        if media_ids:
+            links[Section.media.through] = [
+                Section.media.through(section_id=section.pk,
+                                      media_id=rng.choice(media_ids))
+                for section in sections]
+            links[Material.media.through] = [
+                Material.media.through(material_id=material.pk,
+                                       media_id=rng.choice(media_ids))
+                for material in materials]
+            links[TestQuestion.media.through] = [
+                TestQuestion.media.through(testquestion_id=question.pk,
+                                           media_id=rng.choice(media_ids))
+                for question in questions]
+        for through, objects in links.items():
+            through.objects.bulk_create(objects, batch_size=batch_size)
 
-fake = Faker('ru_RU')
+    return len(sections), len(materials), len(tests), len(questions)
+
+
+def _generate_chunk(args):
+    return generate_chunk(*args)
 
 
 class Command(BaseCommand):
     """Команда для удаления всех данных из education и
-     наполнения всех моделей при помощи библиотеки Faker"""
+     наполнения всех моделей при помощи библиотеки Faker.
+     Объем данных задается параметрами, объекты создаются через
+     bulk_create, пачки разделов могут создаваться в нескольких процессах"""
     help = 'Удаляет все данные из education, и заполняет БД новыми данными'
 
-    @staticmethod
-    def get_creation_time():
-        return make_aware(fake.date_time_between(
-            start_date='-2y', end_date='-6M'))
-
-    @staticmethod
-    def get_update_time():
-        return make_aware(fake.date_time_between(
-            start_date='-6M', end_date='now'))
+    def add_arguments(self, parser):
+        parser.add_argument('--sections', type=int, default=3,
+                            help='Количество разделов')
+        parser.add_argument('--materials-per-section', type=int, default=2,
+                            help='Количество материалов с тестом в разделе')
+        parser.add_argument('--questions-per-test', type=int, default=1,
+                            help='Количество вопросов в тесте')
+        parser.add_argument('--choices-per-question', type=int, default=4,
+                            help='Количество вариантов ответа в вопросе')
+        parser.add_argument('--media', type=int, default=3,
+                            help='Количество медиа')
+        parser.add_argument('--seed', type=int,
+                            help='Seed для воспроизводимых данных')
+        parser.add_argument('--batch-size', type=int, default=5_000,
+                            help='Количество строк в одном INSERT')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Количество процессов')
 
     def handle(self, *args, **options):
+        for option in ('sections', 'materials_per_section',
+                       'questions_per_test', 'media'):
+            if options[option] < 0:
+                raise CommandError(
+                    f'{option} не может быть отрицательным')
+        for option in ('choices_per_question', 'batch_size', 'workers'):
+            if options[option] < 1:
+                raise CommandError(f'{option} должен быть больше нуля')
+        if options['seed'] is None:
+            options['seed'] = secrets.randbelow(2 ** 31)
+        self.stdout.write(f'Seed: {options["seed"]}')
+
+        self.delete_all()
+        media_ids = self.create_media(options)
 
-        # Media
-        Media.objects.all().delete()
-        media1 = Media.objects.create(
-            name=fake.word(),
-            creation_date=self.get_creation_time(),
-            local_image=fake.file_name(extension='jpg'),
-            )
-        media2 = Media.objects.create(
-            name=fake.word(),
-            creation_date=self.get_creation_time(),
-            external_video=fake.url(),
-        )
-        media3 = Media.objects.create(
-            name=fake.word(),
-            creation_date=self.get_creation_time(),
-            local_audio=fake.file_name(extension='mp3'),
-        )
-
-        # Section
-        Section.objects.all().delete()
-        section1 = Section.objects.create(
-            name=fake.word(),
-            description=fake.paragraph(),
-            status='ARCHIVED',
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-            base_price=Money(fake.random_int(min=100, max=10000), 'RUB')
-        )
-        section1.media.add(media1)
-        section2 = Section.objects.create(
-            name=fake.word(),
-            description=fake.paragraph(),
-            status='CLOSED',
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-            base_price=Money(fake.random_int(min=100, max=10000), 'RUB')
-        )
-        section2.media.add(media2)
-        section3 = Section.objects.create(
-            name=fake.word(),
-            description=fake.paragraph(),
-            status='OPEN',
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-            base_price=Money(fake.random_int(min=100, max=10000), 'RUB')
-        )
-        section3.media.add(media3)
-
-        # Material
-        Material.objects.all().delete()
-        material1 = Material.objects.create(
-            name=fake.word(),
-            text=fake.paragraph(),
-            status='ARCHIVED',
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-        )
-        material1.section = section1
-        material1.save()
-        material1.media.add(media1)
-        material2 = Material.objects.create(
-            name=fake.word(),
-            text=fake.paragraph(),
-            status='ARCHIVED',
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-        )
-        material2.section = section1
-        material2.save()
-        material2.media.add(media2)
-        material3 = Material.objects.create(
-            name=fake.word(),
-            text=fake.paragraph(),
-            status='CLOSED',
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-        )
-        material3.section = section2
-        material3.save()
-        material3.media.add(media3)
-        material4 = Material.objects.create(
-            name=fake.word(),
-            text=fake.paragraph(),
-            status='CLOSED',
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-        )
-        material4.section = section2
-        material4.save()
-        material4.media.add(media1)
-        material5 = Material.objects.create(
-            name=fake.word(),
-            text=fake.paragraph(),
-            status='OPEN',
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-        )
-        material5.section = section3
-        material5.save()
-        material5.media.add(media2)
-        material6 = Material.objects.create(
-            name=fake.word(),
-            text=fake.paragraph(),
-            status='OPEN',
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-        )
-        material6.section = section3
-        material6.save()
-        material6.media.add(media3)
-
-        # TestAnswer
-        TestAnswer.objects.all().delete()
-        testanswer1 = TestAnswer.objects.create(answer=fake.word())
-        testanswer2 = TestAnswer.objects.create(answer=fake.word())
-        testanswer3 = TestAnswer.objects.create(answer=fake.word())
-        testanswer4 = TestAnswer.objects.create(answer=fake.word())
-        testanswer5 = TestAnswer.objects.create(answer=fake.word())
-        testanswer6 = TestAnswer.objects.create(answer=fake.word())
-
-        # TestQuestion
-        TestQuestion.objects.all().delete()
-        testquestion1 = TestQuestion(
-            question=fake.paragraph(),
-            answer=testanswer1,
-        )
-        testquestion1.save()
-        testquestion1.choices.add(testanswer1, testanswer2,
-                                  testanswer3, testanswer4)
-        testquestion1.media.add(media1)
-        testquestion2 = TestQuestion(
-            question=fake.paragraph(),
-            answer=testanswer2,
-        )
-        testquestion2.save()
-        testquestion2.choices.add(testanswer2, testanswer3,
-                                  testanswer4, testanswer5)
-        testquestion2.media.add(media2)
-        testquestion3 = TestQuestion(
-            question=fake.paragraph(),
-            answer=testanswer3,
-        )
-        testquestion3.save()
-        testquestion3.choices.add(testanswer3, testanswer4,
-                                  testanswer5, testanswer6)
-        testquestion3.media.add(media3)
-
-        # Test
-        Test.objects.all().delete()
-        test1 = Test.objects.create(
-            material=material1,
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-        )
-        test1.question.add(testquestion1)
-        test2 = Test.objects.create(
-            material=material2,
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-        )
-        test2.question.add(testquestion2)
-        test3 = Test.objects.create(
-            material=material3,
-            creation_date=self.get_creation_time(),
-            last_update=self.get_update_time(),
-        )
-        test3.question.add(testquestion3)
+        chunks = [(options, chunk_index, media_ids) for chunk_index in range(
+            -(-options['sections'] // SECTIONS_PER_CHUNK))]
+        totals = [0, 0, 0, 0]
+        if options['workers'] > 1:
+            # Дочерние процессы открывают свои соединения с БД
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(options['workers']) as pool:
+                results = pool.imap_unordered(_generate_chunk, chunks)
+                for counts in results:
+                    totals = self.add_counts(totals, counts)
+        else:
+            for chunk in chunks:
+                totals = self.add_counts(totals, generate_chunk(*chunk))
 
+        # bulk_create не отправляет сигналы
+        bump_generation(Section, Material, Media)
         self.stdout.write(self.style.SUCCESS(
-            'Добавили данные для приложения education'))
+            f'Добавили данные для приложения education: '
+            f'медиа {len(media_ids)}, разделов {totals[0]}, '
+            f'материалов {totals[1]}, тестов {totals[2]}, '
+            f'вопросов {totals[3]}'))
+
+    def add_counts(self, totals, counts):
+        totals = [total + count for total, count in zip(totals, counts)]
+        self.stdout.write(f'Разделов создано: {totals[0]}')
+        return totals
+
+    @staticmethod
+    def delete_all():
+        # delete() загружает объекты ради сигналов и каскадов,
+        # для миллионов строк удаляем таблицы напрямую
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                for model in DELETE_ORDER:
+                    cursor.execute(
+                        f'DELETE FROM '
+                        f'{connection.ops.quote_name(model._meta.db_table)}')
+        except IntegrityError:
+            raise CommandError('На разделы ссылаются платежи, '
+                               'сначала удалите их')
+
+    @staticmethod
+    def create_media(options):
+        rng = random.Random(options['seed'])
+        fake = Faker('ru_RU')
+        fake.seed_instance(options['seed'])
+        now = timezone.now()
+        media = []
+        for num in range(options['media']):
+            # Чередуются локальные изображения, внешние видео и аудио
+            kind = num % 3
+            media.append(Media(
+                name=fake.word(),
+                creation_date=get_dates(rng, now)[0],
+                local_image=(fake.file_name(extension='jpg')
+                             if kind == 0 else None),
+                external_video=fake.url() if kind == 1 else None,
+                local_audio=(fake.file_name(extension='mp3')
+                             if kind == 2 else None),
+            ))
+        Media.objects.bulk_create(media, batch_size=options['batch_size'])
+        return [item.pk for item in media]
@@ -0,0 +1,126 @@
+import csv
+import itertools
+import json
+from pathlib import Path
+
+import tablib
+from django.core.management import BaseCommand, CommandError
+from openpyxl import load_workbook
+
+from education.resources import RESOURCES
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        yield from csv.reader(file)
+
+
+def read_xlsx(path):
+    # read_only не загружает весь лист в память
+    workbook = load_workbook(path, read_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as file:
+        headers = None
+        for line in file:
+            if not line.strip():
+                continue
+            obj = json.loads(line)
+            if headers is None:
+                headers = list(obj)
+                yield headers
+            yield [obj.get(header) for header in headers]
+
+
+def read_json(path):
+    # Массив JSON нельзя прочитать по частям, для больших файлов - jsonl
+    with open(path, encoding='utf-8') as file:
+        objects = json.load(file)
+    if objects:
+        headers = list(objects[0])
+        yield headers
+        for obj in objects:
+            yield [obj.get(header) for header in headers]
+
+
+READERS = {
+    'csv': read_csv,
+    'xlsx': read_xlsx,
+    'jsonl': read_jsonl,
+    'json': read_json,
+}
+
+
+class Command(BaseCommand):
+    """Команда для потокового импорта данных education из файла.
+    Файл читается пачками, каждая пачка проверяется и сохраняется
+    через bulk_create в отдельной транзакции"""
+    help = ('Импортирует медиа, разделы, материалы, ответы, вопросы '
+            'или тесты из CSV, XLSX, JSON или JSON Lines')
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=RESOURCES,
+                            help='Импортируемая модель')
+        parser.add_argument('path', help='Путь к файлу')
+        parser.add_argument('--format', choices=READERS,
+                            help='Формат файла, по умолчанию по расширению')
+        parser.add_argument('--batch-size', type=int, default=1_000,
+                            help='Количество строк в одной транзакции')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только проверить данные')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or Path(path).suffix.lstrip('.')
+        if file_format.lower() not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {file_format}')
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('Размер пачки должен быть больше нуля')
+
+        rows = READERS[file_format.lower()](path)
+        headers = [str(header).strip() for header in next(rows, [])]
+        if not headers:
+            raise CommandError('Файл пуст')
+
+        totals = {}
+        imported = 0
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            dataset = tablib.Dataset(*batch, headers=headers)
+            result = RESOURCES[options['model']]().import_data(
+                dataset, dry_run=options['dry_run'], use_transactions=True,
+                rollback_on_validation_errors=True)
+            if result.has_errors() or result.has_validation_errors():
+                self.write_errors(result, imported)
+                raise CommandError(
+                    f'Импорт остановлен на строках {imported + 1}-'
+                    f'{imported + len(batch)}, сохранено строк: {imported}')
+            for import_type, count in result.totals.items():
+                totals[import_type] = totals.get(import_type, 0) + count
+            imported += len(batch)
+            self.stdout.write(f'Обработано строк: {imported}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт {options["model"]} завершен: '
+            f'новых {totals.get("new", 0)}, '
+            f'обновлено {totals.get("update", 0)}, '
+            f'пропущено {totals.get("skip", 0)}'))
+
+    def write_errors(self, result, offset):
+        for error in result.base_errors:
+            self.stderr.write(str(error.error))
+        for number, errors in result.row_errors():
+            for error in errors:
+                self.stderr.write(f'Строка {offset + number}: {error.error}')
+        for row in result.invalid_rows:
+            self.stderr.write(
+                f'Строка {offset + row.number}: '
+                f'{"; ".join(row.error.messages)}')
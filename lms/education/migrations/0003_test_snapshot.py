@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='answer_key',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='Ключ ответов'),
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='snapshot',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='Снимок теста'),
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='snapshot_version',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Дата обновления теста, по которой собран снимок', null=True, verbose_name='Версия снимка'),
+        ),
+    ]
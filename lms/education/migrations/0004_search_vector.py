@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:09
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Вектор пересчитывается в БД при изменении только индексируемых колонок,
+# поэтому bulk-операции и update() его тоже поддерживают
+TRIGGER_SQL = """
+CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.{body}, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER {table}_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, {body} ON {table}
+    FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update();
+
+UPDATE {table} SET search_vector =
+    setweight(to_tsvector('russian', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce({body}, '')), 'B');
+"""
+
+REVERSE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table};
+DROP FUNCTION IF EXISTS {table}_search_vector_update();
+"""
+
+SEARCH_TABLES = (
+    ('education_material', 'text'),
+    ('education_section', 'description'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0003_test_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, help_text='Заполняется триггером БД из названия и текста', null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, help_text='Заполняется триггером БД из названия и описания', null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='education_material_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='education_section_search_idx'),
+        ),
+    ] + [
+        migrations.RunSQL(
+            sql=TRIGGER_SQL.format(table=table, body=body),
+            reverse_sql=REVERSE_TRIGGER_SQL.format(table=table),
+        )
+        for table, body in SEARCH_TABLES
+    ]
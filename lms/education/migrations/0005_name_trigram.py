@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:12
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0004_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='material',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='education_material_name_trgm', opclasses=('gin_trgm_ops',)),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='education_section_name_trgm', opclasses=('gin_trgm_ops',)),
+        ),
+    ]
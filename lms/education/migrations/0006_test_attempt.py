@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('education', '0005_name_trigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seed', models.BigIntegerField(blank=True, help_text='Seed порядка вариантов ответа, выданного StartTest', null=True, verbose_name='Seed')),
+                ('score', models.PositiveIntegerField(verbose_name='Кол-во правильных ответов')),
+                ('max_score', models.PositiveIntegerField(verbose_name='Кол-во вопросов')),
+                ('test_version', models.DateTimeField(blank=True, help_text='Дата обновления теста, по которой проверены ответы', null=True, verbose_name='Версия теста')),
+                ('submitted_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата отправки')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='education.test', verbose_name='Тест')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_attempts', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'попытка прохождения теста',
+                'verbose_name_plural': 'попытки прохождения тестов',
+                'db_table_comment': 'Модель попытки прохождения теста',
+                'ordering': ('-submitted_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='TestAttemptAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_correct', models.BooleanField(verbose_name='Ответ верный')),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='education.testattempt', verbose_name='Попытка')),
+                ('choice', models.ForeignKey(blank=True, help_text='Пусто, если вопрос пропущен', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attempt_answers', to='education.testanswer', verbose_name='Выбранный ответ')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_answers', to='education.testquestion', verbose_name='Вопрос')),
+            ],
+            options={
+                'verbose_name': 'ответ в попытке',
+                'verbose_name_plural': 'ответы в попытках',
+                'db_table_comment': 'Модель ответа на вопрос в попытке',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='testattemptanswer',
+            constraint=models.UniqueConstraint(fields=('attempt', 'question'), name='education_testattemptanswer_unique_question'),
+        ),
+        migrations.AddIndex(
+            model_name='testattempt',
+            index=models.Index(fields=['user', '-submitted_at'], name='education_attempt_user_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0006_test_attempt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestQuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='education.testquestion', verbose_name='Вопрос')),
+                ('answers_count', models.PositiveIntegerField(default=0, verbose_name='Кол-во ответов')),
+                ('correct_count', models.PositiveIntegerField(default=0, verbose_name='Кол-во правильных ответов')),
+                ('skipped_count', models.PositiveIntegerField(default=0, verbose_name='Кол-во пропусков')),
+            ],
+            options={
+                'verbose_name': 'статистика вопроса',
+                'verbose_name_plural': 'статистика вопросов',
+                'db_table_comment': 'Модель статистики ответов на вопрос',
+            },
+        ),
+        migrations.CreateModel(
+            name='TestStats',
+            fields=[
+                ('test', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='education.test', verbose_name='Тест')),
+                ('attempts_count', models.PositiveIntegerField(default=0, verbose_name='Кол-во попыток')),
+                ('score_sum', models.PositiveBigIntegerField(default=0, verbose_name='Сумма правильных ответов')),
+                ('max_score_sum', models.PositiveBigIntegerField(default=0, verbose_name='Сумма вопросов')),
+            ],
+            options={
+                'verbose_name': 'статистика теста',
+                'verbose_name_plural': 'статистика тестов',
+                'db_table_comment': 'Модель статистики попыток теста',
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0007_test_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teststats',
+            name='analyzed_attempts_count',
+            field=models.PositiveIntegerField(default=0, help_text='Анализ вопросов пересчитывается, если попыток стало больше или меньше', verbose_name='Кол-во попыток в анализе вопросов'),
+        ),
+        migrations.CreateModel(
+            name='TestQuestionAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answers_count', models.PositiveIntegerField(default=0, verbose_name='Кол-во ответов')),
+                ('difficulty', models.FloatField(blank=True, help_text='Доля правильных ответов (p-value)', null=True, verbose_name='Трудность')),
+                ('discrimination', models.FloatField(blank=True, help_text='Точечно-бисериальная корреляция ответа с баллом за остальные вопросы', null=True, verbose_name='Дискриминативность')),
+                ('skipped_rate', models.FloatField(blank=True, null=True, verbose_name='Доля пропусков')),
+                ('distractors', models.JSONField(default=list, help_text='Доля выбора и корреляция для каждого варианта ответа', verbose_name='Анализ вариантов ответа')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Дата расчета')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analyses', to='education.testquestion', verbose_name='Вопрос')),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_analyses', to='education.test', verbose_name='Тест')),
+            ],
+            options={
+                'verbose_name': 'анализ вопроса',
+                'verbose_name_plural': 'анализ вопросов',
+                'db_table_comment': 'Модель анализа вопроса по попыткам теста',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='testquestionanalysis',
+            constraint=models.UniqueConstraint(fields=('test', 'question'), name='education_testquestionanalysis_unique_question'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:17
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0008_test_question_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='pool_size',
+            field=models.PositiveIntegerField(blank=True, help_text='Вопросы попытки выбираются случайно из всех вопросов теста. Пусто - в попытке все вопросы', null=True, verbose_name='Кол-во вопросов в попытке'),
+        ),
+        migrations.AddField(
+            model_name='testattempt',
+            name='questions',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, help_text='pk выбранных вопросов в порядке выдачи. Пусто - в попытке все вопросы теста', null=True, size=None, verbose_name='Вопросы попытки'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:43
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0009_test_question_pool'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(fields=['creation_date'], name='education_material_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='education_media_name_trgm', opclasses=('gin_trgm_ops',)),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['creation_date'], name='education_section_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testquestion',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['question'], name='education_question_trgm', opclasses=('gin_trgm_ops',)),
+        ),
+    ]
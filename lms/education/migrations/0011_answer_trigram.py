@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:51
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0010_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testanswer',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['answer'], name='education_answer_trgm', opclasses=('gin_trgm_ops',)),
+        ),
+    ]
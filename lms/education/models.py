@@ -1,5 +1,11 @@
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (SearchVectorField, SearchQuery,
+                                            SearchRank, SearchHeadline)
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Cast, Coalesce
 from django.utils import timezone
 from djmoney.models.fields import MoneyField
 
@@ -9,6 +15,27 @@ app_name = EducationConfig.name
 
 NULLABLE = {'blank': True, 'null': True}
 
+# Поля медиа, которые отдаются в API вместе с разделами и материалами
+MEDIA_LINK_FIELDS = ('pk', 'name',
+                     'local_image', 'external_image',
+                     'local_video', 'external_video',
+                     'local_audio', 'external_audio',)
+
+
+# Конфигурация полнотекстового поиска, контент на русском
+SEARCH_CONFIG = 'russian'
+
+
+def search_query(text):
+    """Запрос в синтаксисе поисковых систем: слова, "фразы", -исключения"""
+    return SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+
+
+def media_prefetch(lookup='media'):
+    """Предзагрузка медиа только с полями, нужными для сериализации"""
+    return models.Prefetch(
+        lookup, queryset=Media.objects.only(*MEDIA_LINK_FIELDS))
+
 
 class Media(models.Model):
     """Модель медиа"""
@@ -66,6 +93,11 @@ class Media(models.Model):
         ordering = 'name',
         db_table_comment = ('Модель медиафайла для разделов, материалов, '
                             'вопросов к тестам')
+        indexes = [
+            # Поиск в админке через ILIKE
+            GinIndex(fields=('name',), opclasses=('gin_trgm_ops',),
+                     name='education_media_name_trgm'),
+        ]
 
     def clean(self):
         # Проверка на обязательный выбор только одного медиа файла
@@ -88,6 +120,32 @@ class Media(models.Model):
                      *args, **kwargs)
 
 
+class SectionQuerySet(models.QuerySet):
+    """Запросы разделов под конкретные эндпоинты API"""
+
+    def for_list(self):
+        # Кол-во материалов считается коррелированным подзапросом только
+        # для разделов страницы: с GROUP BY по JOIN страница выбиралась бы
+        # после агрегации всех материалов, мимо индекса (name, id).
+        # Медиа грузится одним запросом
+        materials_count = Material.objects.filter(
+            section=models.OuterRef('pk')).order_by().values(
+            'section').annotate(count=models.Count('pk')).values('count')
+        return self.annotate(
+            materials_count=Coalesce(models.Subquery(materials_count), 0),
+        ).order_by('name').prefetch_related(media_prefetch())
+
+    def for_retrieve(self):
+        return self.defer('search_vector').prefetch_related(
+            media_prefetch(),
+            models.Prefetch('material_section',
+                            queryset=Material.objects.only('name', 'section')),
+        )
+
+    def search(self, query):
+        return _search(self, query, 'description')
+
+
 class Section(models.Model):
     """Модель раздела"""
     name = models.CharField(
@@ -118,6 +176,12 @@ class Section(models.Model):
         blank=True, to=Media, related_name='section_media',
         verbose_name='Медиа')
 
+    search_vector = SearchVectorField(
+        **NULLABLE, editable=False, verbose_name='Поисковый вектор',
+        help_text='Заполняется триггером БД из названия и описания')
+
+    objects = SectionQuerySet.as_manager()
+
     def __str__(self):
         return (f'Название: {self.name}, Статус: {self.get_status_display()}, '
                 f'Дата создания: {self.creation_date}, '
@@ -128,6 +192,19 @@ class Section(models.Model):
         verbose_name_plural = 'разделы'
         ordering = 'name',
         db_table_comment = 'Модель раздела'
+        indexes = [
+            # Ключ пагинации списка разделов
+            models.Index(fields=('name', 'id'),
+                         name='education_section_name_id_idx'),
+            GinIndex(fields=('search_vector',),
+                     name='education_section_search_idx'),
+            # Нечеткий поиск подсказок по названию и поиск в админке
+            GinIndex(fields=('name',), opclasses=('gin_trgm_ops',),
+                     name='education_section_name_trgm'),
+            # Фильтр админки по дате создания
+            models.Index(fields=('creation_date',),
+                         name='education_section_created_idx'),
+        ]
         constraints = [
             # Проверка даты обновления позже или одинаковой с датой создания
             models.CheckConstraint(
@@ -155,6 +232,35 @@ class Section(models.Model):
                      *args, **kwargs)
 
 
+class MaterialQuerySet(models.QuerySet):
+    """Запросы материалов под конкретные эндпоинты API"""
+
+    def for_list(self):
+        return self.select_related('section').prefetch_related(
+            media_prefetch())
+
+    def for_retrieve(self):
+        return self.for_list().defer('search_vector')
+
+    def search(self, query):
+        return _search(self, query, 'text').select_related('section')
+
+
+def _search(queryset, query, body_field):
+    # search_vector поддерживается триггером в БД, см. миграцию 0004.
+    # rank приводится к double precision, чтобы значение из курсора
+    # пагинации точно совпадало со значением в БД
+    return queryset.filter(search_vector=query).defer(
+        'search_vector', body_field).annotate(
+        rank=Cast(SearchRank(models.F('search_vector'), query),
+                  models.FloatField()),
+        headline=SearchHeadline(
+            Coalesce(body_field, models.Value('')), query,
+            config=SEARCH_CONFIG, start_sel='<b>', stop_sel='</b>',
+            max_words=35, min_words=15, max_fragments=2),
+    )
+
+
 class Material(models.Model):
     """Модель материала"""
     name = models.CharField(
@@ -184,6 +290,12 @@ class Material(models.Model):
         **NULLABLE, to=Section, on_delete=models.SET_NULL,
         related_name='material_section', verbose_name='Раздел')
 
+    search_vector = SearchVectorField(
+        **NULLABLE, editable=False, verbose_name='Поисковый вектор',
+        help_text='Заполняется триггером БД из названия и текста')
+
+    objects = MaterialQuerySet.as_manager()
+
     def __str__(self):
         return (f'Название: {self.name}, Статус: {self.get_status_display()}, '
                 f'Дата создания: {self.creation_date}')
@@ -193,6 +305,19 @@ class Material(models.Model):
         verbose_name_plural = 'материалы'
         order_with_respect_to = 'section'
         db_table_comment = 'Модель материала к разделам'
+        indexes = [
+            # Ключ пагинации списка материалов
+            models.Index(fields=('name', 'id'),
+                         name='education_material_name_id_idx'),
+            GinIndex(fields=('search_vector',),
+                     name='education_material_search_idx'),
+            # Нечеткий поиск подсказок по названию и поиск в админке
+            GinIndex(fields=('name',), opclasses=('gin_trgm_ops',),
+                     name='education_material_name_trgm'),
+            # Фильтр админки по дате создания
+            models.Index(fields=('creation_date',),
+                         name='education_material_created_idx'),
+        ]
         constraints = [
             # Проверка даты обновления позже или одинаковой с датой создания
             models.CheckConstraint(
@@ -208,6 +333,8 @@ class Material(models.Model):
                 'Дата обновления не может быть раньше даты создания'
             )
         # Проверка на соответствие статуса материала статусу раздела
+        if self.section is None:
+            return
         if self.section.status == 'ARCHIVED' and self.status != 'ARCHIVED':
             raise ValidationError('Материал должен иметь тот же статус,'
                                   'что и родительский раздел')
@@ -241,6 +368,11 @@ class TestAnswer(models.Model):
         verbose_name_plural = 'ответы на тест'
         ordering = 'answer',
         db_table_comment = 'Модель ответа на вопрос теста'
+        indexes = [
+            # Поиск в админке и автодополнении через ILIKE
+            GinIndex(fields=('answer',), opclasses=('gin_trgm_ops',),
+                     name='education_answer_trgm'),
+        ]
 
 
 class TestQuestion(models.Model):
@@ -265,6 +397,11 @@ class TestQuestion(models.Model):
         verbose_name_plural = 'вопросы на тесты'
         ordering = 'question',
         db_table_comment = 'Модель вопроса к тесту'
+        indexes = [
+            # Поиск в админке через ILIKE
+            GinIndex(fields=('question',), opclasses=('gin_trgm_ops',),
+                     name='education_question_trgm'),
+        ]
 
 
 class Test(models.Model):
@@ -275,6 +412,10 @@ class Test(models.Model):
     question = models.ManyToManyField(
         to=TestQuestion, related_name='test_question',
         verbose_name='Вопрос')
+    pool_size = models.PositiveIntegerField(
+        **NULLABLE, verbose_name='Кол-во вопросов в попытке',
+        help_text='Вопросы попытки выбираются случайно из всех вопросов '
+                  'теста. Пусто - в попытке все вопросы')
 
     creation_date = models.DateTimeField(
         **NULLABLE, verbose_name='Дата создания')
@@ -282,6 +423,15 @@ class Test(models.Model):
         **NULLABLE, verbose_name='Дата последнего обновления',
         help_text='Дата обновления должна быть больше даты создания')
 
+    # Скомпилированный тест для выдачи, см. education.snapshots
+    snapshot = models.JSONField(
+        **NULLABLE, editable=False, verbose_name='Снимок теста')
+    answer_key = models.JSONField(
+        **NULLABLE, editable=False, verbose_name='Ключ ответов')
+    snapshot_version = models.DateTimeField(
+        **NULLABLE, editable=False, verbose_name='Версия снимка',
+        help_text='Дата обновления теста, по которой собран снимок')
+
     def __str__(self):
         question_list = ', '.join(
             [str(question.question) for question in self.question.all()])
@@ -317,3 +467,187 @@ class Test(models.Model):
             self.last_update = timezone.now()
         super().save(force_insert, force_update, using, update_fields,
                      *args, **kwargs)
+
+
+class TestAttempt(models.Model):
+    """Модель попытки прохождения теста"""
+    test = models.ForeignKey(
+        to=Test, on_delete=models.CASCADE, related_name='attempts',
+        verbose_name='Тест')
+    user = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='test_attempts', verbose_name='Пользователь')
+    seed = models.BigIntegerField(
+        **NULLABLE, verbose_name='Seed',
+        help_text='Seed порядка вариантов ответа, выданного StartTest')
+    score = models.PositiveIntegerField(
+        verbose_name='Кол-во правильных ответов')
+    max_score = models.PositiveIntegerField(
+        verbose_name='Кол-во вопросов')
+    test_version = models.DateTimeField(
+        **NULLABLE, verbose_name='Версия теста',
+        help_text='Дата обновления теста, по которой проверены ответы')
+    questions = ArrayField(
+        models.BigIntegerField(), **NULLABLE,
+        verbose_name='Вопросы попытки',
+        help_text='pk выбранных вопросов в порядке выдачи. Пусто - '
+                  'в попытке все вопросы теста')
+    submitted_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата отправки')
+
+    def __str__(self):
+        return (f'Попытка: {self.user_id}, Тест: {self.test_id}, '
+                f'Результат: {self.score}/{self.max_score}')
+
+    class Meta:
+        verbose_name = 'попытка прохождения теста'
+        verbose_name_plural = 'попытки прохождения тестов'
+        ordering = '-submitted_at',
+        db_table_comment = 'Модель попытки прохождения теста'
+        indexes = [
+            models.Index(fields=('user', '-submitted_at'),
+                         name='education_attempt_user_idx'),
+        ]
+
+
+class TestAttemptAnswer(models.Model):
+    """Модель ответа на вопрос в попытке прохождения теста"""
+    attempt = models.ForeignKey(
+        to=TestAttempt, on_delete=models.CASCADE, related_name='answers',
+        verbose_name='Попытка')
+    question = models.ForeignKey(
+        to=TestQuestion, on_delete=models.CASCADE,
+        related_name='attempt_answers', verbose_name='Вопрос')
+    choice = models.ForeignKey(
+        **NULLABLE, to=TestAnswer, on_delete=models.SET_NULL,
+        related_name='attempt_answers', verbose_name='Выбранный ответ',
+        help_text='Пусто, если вопрос пропущен')
+    is_correct = models.BooleanField(verbose_name='Ответ верный')
+
+    def __str__(self):
+        return f'Вопрос: {self.question_id}, Ответ: {self.choice_id}'
+
+    class Meta:
+        verbose_name = 'ответ в попытке'
+        verbose_name_plural = 'ответы в попытках'
+        db_table_comment = 'Модель ответа на вопрос в попытке'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('attempt', 'question'),
+                name='%(app_label)s_%(class)s_unique_question'),
+        ]
+
+
+class TestStats(models.Model):
+    """
+    Модель статистики попыток теста
+
+    Обновляется при каждой попытке, см. education.stats
+    """
+    test = models.OneToOneField(
+        to=Test, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats', verbose_name='Тест')
+    attempts_count = models.PositiveIntegerField(
+        default=0, verbose_name='Кол-во попыток')
+    score_sum = models.PositiveBigIntegerField(
+        default=0, verbose_name='Сумма правильных ответов')
+    max_score_sum = models.PositiveBigIntegerField(
+        default=0, verbose_name='Сумма вопросов')
+    analyzed_attempts_count = models.PositiveIntegerField(
+        default=0, verbose_name='Кол-во попыток в анализе вопросов',
+        help_text='Анализ вопросов пересчитывается, если попыток стало '
+                  'больше или меньше')
+
+    @property
+    def average_score(self):
+        if not self.attempts_count:
+            return None
+        return self.score_sum / self.attempts_count
+
+    @property
+    def correct_rate(self):
+        if not self.max_score_sum:
+            return None
+        return self.score_sum / self.max_score_sum
+
+    def __str__(self):
+        return f'Тест: {self.test_id}, Попыток: {self.attempts_count}'
+
+    class Meta:
+        verbose_name = 'статистика теста'
+        verbose_name_plural = 'статистика тестов'
+        db_table_comment = 'Модель статистики попыток теста'
+
+
+class TestQuestionStats(models.Model):
+    """
+    Модель статистики ответов на вопрос по всем тестам с вопросом
+
+    Обновляется при каждой попытке, см. education.stats
+    """
+    question = models.OneToOneField(
+        to=TestQuestion, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats', verbose_name='Вопрос')
+    answers_count = models.PositiveIntegerField(
+        default=0, verbose_name='Кол-во ответов')
+    correct_count = models.PositiveIntegerField(
+        default=0, verbose_name='Кол-во правильных ответов')
+    skipped_count = models.PositiveIntegerField(
+        default=0, verbose_name='Кол-во пропусков')
+
+    @property
+    def correct_rate(self):
+        if not self.answers_count:
+            return None
+        return self.correct_count / self.answers_count
+
+    def __str__(self):
+        return f'Вопрос: {self.question_id}, Ответов: {self.answers_count}'
+
+    class Meta:
+        verbose_name = 'статистика вопроса'
+        verbose_name_plural = 'статистика вопросов'
+        db_table_comment = 'Модель статистики ответов на вопрос'
+
+
+class TestQuestionAnalysis(models.Model):
+    """
+    Модель анализа вопроса по попыткам теста
+
+    Рассчитывается задачей Celery, см. education.analysis
+    """
+    test = models.ForeignKey(
+        to=Test, on_delete=models.CASCADE, related_name='question_analyses',
+        verbose_name='Тест')
+    question = models.ForeignKey(
+        to=TestQuestion, on_delete=models.CASCADE, related_name='analyses',
+        verbose_name='Вопрос')
+    answers_count = models.PositiveIntegerField(
+        default=0, verbose_name='Кол-во ответов')
+    difficulty = models.FloatField(
+        **NULLABLE, verbose_name='Трудность',
+        help_text='Доля правильных ответов (p-value)')
+    discrimination = models.FloatField(
+        **NULLABLE, verbose_name='Дискриминативность',
+        help_text='Точечно-бисериальная корреляция ответа с баллом '
+                  'за остальные вопросы')
+    skipped_rate = models.FloatField(
+        **NULLABLE, verbose_name='Доля пропусков')
+    distractors = models.JSONField(
+        default=list, verbose_name='Анализ вариантов ответа',
+        help_text='Доля выбора и корреляция для каждого варианта ответа')
+    computed_at = models.DateTimeField(
+        auto_now=True, verbose_name='Дата расчета')
+
+    def __str__(self):
+        return f'Тест: {self.test_id}, Вопрос: {self.question_id}'
+
+    class Meta:
+        verbose_name = 'анализ вопроса'
+        verbose_name_plural = 'анализ вопросов'
+        db_table_comment = 'Модель анализа вопроса по попыткам теста'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('test', 'question'),
+                name='%(app_label)s_%(class)s_unique_question'),
+        ]
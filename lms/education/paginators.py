@@ -0,0 +1,11 @@
+from lms.paginators import KeysetPagination
+
+
+class NameKeysetPagination(KeysetPagination):
+    """Пагинация разделов и материалов по названию"""
+    ordering = 'name', 'pk'
+
+
+class RankKeysetPagination(KeysetPagination):
+    """Пагинация результатов поиска по убыванию релевантности"""
+    ordering = '-rank', 'pk'
@@ -0,0 +1,291 @@
+import functools
+
+from django.core.exceptions import ValidationError
+from django.db.models import Max, Q
+from django.utils import timezone
+from import_export import resources, widgets
+from import_export.instance_loaders import CachedInstanceLoader
+
+from education.cache import bump_generation
+from education.models import (Media, Section, Material, TestAnswer,
+                              TestQuestion, Test)
+from education.snapshots import (touch_tests, touch_question_tests,
+                                 touch_answer_tests)
+
+
+def _key(value):
+    # Числа из XLSX приходят как float
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() if value is not None else ''
+
+
+class CachedForeignKeyWidget(widgets.ForeignKeyWidget):
+    """
+    Связанный объект из словаря, загруженного одним запросом на пачку
+
+    Стандартный ForeignKeyWidget делает запрос на каждую строку
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.objects = None
+
+    def prefetch(self, values, only=()):
+        keys = {_key(value) for value in values} - {''}
+        queryset = self.model.objects.filter(
+            **{f'{self.field}__in': keys}).only(self.field, *only)
+        self.objects = {_key(getattr(obj, self.field)): obj
+                        for obj in queryset}
+
+    def clean(self, value, row=None, **kwargs):
+        if self.objects is None:
+            return super().clean(value, row, **kwargs)
+        key = _key(value)
+        if not key:
+            return None
+        try:
+            return self.objects[key]
+        except KeyError:
+            raise ValueError(
+                f'{self.model._meta.verbose_name} {key} не найден')
+
+
+class BulkModelResource(resources.ModelResource):
+    """
+    Импорт пачками через bulk_create и bulk_update
+
+    Связанные объекты загружаются одним запросом на пачку, связи
+    многие-ко-многим пишутся в промежуточные таблицы одним запросом
+    на поле. Проверка выполняется clean() модели без запросов к БД,
+    кеши и снимки тестов сбрасываются после импорта, так как
+    bulk-операции не отправляют сигналы.
+    """
+    # Поля связанных моделей, нужные для clean(): {'section': ('status',)}
+    related_only = {}
+
+    class Meta:
+        use_bulk = True
+        batch_size = 1_000
+        skip_diff = True
+        instance_loader_class = CachedInstanceLoader
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.pending_m2m = []
+        self.saved_pks = []
+
+    @classmethod
+    def get_fk_widget(cls, field):
+        return functools.partial(
+            CachedForeignKeyWidget,
+            model=resources.get_related_model(field))
+
+    def get_m2m_fields(self):
+        return [field for field in self.get_import_fields()
+                if isinstance(field.widget, widgets.ManyToManyWidget)]
+
+    def get_bulk_update_fields(self):
+        m2m_names = {field.attribute for field in self.get_m2m_fields()}
+        return [name for name in super().get_bulk_update_fields()
+                if name not in m2m_names]
+
+    def before_import(self, dataset, using_transactions, dry_run, **kwargs):
+        for field in self.get_import_fields():
+            if (isinstance(field.widget, CachedForeignKeyWidget)
+                    and field.column_name in dataset.headers):
+                field.widget.prefetch(
+                    dataset[field.column_name],
+                    self.related_only.get(field.attribute, ()))
+
+    def validate_instance(self, instance, import_validation_errors=None,
+                          validate_unique=True):
+        errors = dict(import_validation_errors or {})
+        # Значения, которые иначе заполнил бы save() модели
+        for field_name in ('creation_date', 'last_update'):
+            if hasattr(instance, field_name) and not getattr(instance,
+                                                             field_name):
+                setattr(instance, field_name, timezone.now())
+        # Проверка связей в clean_fields() делает запрос на каждую строку,
+        # служебные поля заполняются при сохранении
+        exclude = [field.name for field in instance._meta.concrete_fields
+                   if field.is_relation or not field.editable]
+        try:
+            instance.clean_fields(exclude=[*errors, *exclude])
+        except ValidationError as error:
+            errors = error.update_error_dict(errors)
+        if not errors:
+            try:
+                instance.clean()
+            except ValidationError as error:
+                errors = error.update_error_dict(errors)
+        if errors:
+            raise ValidationError(errors)
+
+    def save_m2m(self, obj, data, using_transactions, dry_run):
+        if not using_transactions and dry_run:
+            return
+        # Объекты получат pk только после bulk_create
+        self.pending_m2m.append((obj, data))
+
+    def bulk_create(self, using_transactions, dry_run, raise_errors,
+                    batch_size=None, result=None):
+        self.before_bulk_create(self.create_instances)
+        created = list(self.create_instances)
+        super().bulk_create(using_transactions, dry_run, raise_errors,
+                            batch_size, result)
+        self.saved_pks.extend(obj.pk for obj in created if obj.pk)
+        self.write_m2m(raise_errors, result)
+
+    def bulk_update(self, using_transactions, dry_run, raise_errors,
+                    batch_size=None, result=None):
+        self.saved_pks.extend(obj.pk for obj in self.update_instances)
+        super().bulk_update(using_transactions, dry_run, raise_errors,
+                            batch_size, result)
+        self.write_m2m(raise_errors, result)
+
+    def before_bulk_create(self, instances):
+        pass
+
+    def write_m2m(self, raise_errors, result):
+        ready = [(obj, row) for obj, row in self.pending_m2m if obj.pk]
+        self.pending_m2m = [(obj, row) for obj, row in self.pending_m2m
+                            if not obj.pk]
+        if not ready:
+            return
+        try:
+            for field in self.get_m2m_fields():
+                self.write_m2m_field(field, ready)
+        except Exception as error:
+            self.handle_import_error(result, error, raise_errors)
+
+    def write_m2m_field(self, field, objects):
+        model_field = self._meta.model._meta.get_field(field.attribute)
+        through = model_field.remote_field.through
+        source = model_field.m2m_field_name() + '_id'
+        target = model_field.m2m_reverse_field_name() + '_id'
+        links, pks = [], []
+        for obj, row in objects:
+            if field.column_name not in row:
+                continue
+            value = row[field.column_name]
+            if isinstance(value, (list, tuple)):
+                ids = value
+            elif isinstance(value, (int, float)):
+                ids = [value]
+            else:
+                ids = (value or '').split(field.widget.separator)
+            pks.append(obj.pk)
+            links.extend(through(**{source: obj.pk, target: int(_key(pk))})
+                         for pk in ids if _key(pk))
+        if not pks:
+            return
+        through.objects.filter(**{f'{source}__in': pks}).delete()
+        through.objects.bulk_create(links, ignore_conflicts=True)
+
+    def after_import(self, dataset, result, using_transactions, dry_run,
+                     **kwargs):
+        super().after_import(dataset, result, using_transactions, dry_run,
+                             **kwargs)
+        if not dry_run and self.saved_pks:
+            self.invalidate(self.saved_pks)
+
+    def invalidate(self, pks):
+        """Сбрасывает кеши, зависящие от импортированных объектов"""
+
+
+class MediaResource(BulkModelResource):
+
+    class Meta(BulkModelResource.Meta):
+        model = Media
+        fields = ('id', 'name', 'creation_date',
+                  'local_image', 'external_image',
+                  'local_video', 'external_video',
+                  'local_audio', 'external_audio',)
+
+    def invalidate(self, pks):
+        bump_generation(Section, Material, Media,
+                        using=self.get_db_connection_name())
+        touch_tests(Q(question__media__pk__in=pks))
+
+
+class SectionResource(BulkModelResource):
+
+    class Meta(BulkModelResource.Meta):
+        model = Section
+        fields = ('id', 'name', 'description', 'status',
+                  'creation_date', 'last_update',
+                  'base_price', 'base_price_currency', 'media',)
+
+    def invalidate(self, pks):
+        bump_generation(Section, using=self.get_db_connection_name())
+
+
+class MaterialResource(BulkModelResource):
+    # Статус раздела нужен для проверки в Material.clean()
+    related_only = {'section': ('status',)}
+
+    class Meta(BulkModelResource.Meta):
+        model = Material
+        fields = ('id', 'name', 'text', 'status',
+                  'creation_date', 'last_update',
+                  'section', 'media',)
+
+    def before_bulk_create(self, instances):
+        # bulk_create не заполняет _order для order_with_respect_to,
+        # номера продолжают уже существующие в разделе
+        section_ids = {material.section_id for material in instances}
+        condition = Q(section__in=section_ids - {None})
+        if None in section_ids:
+            condition |= Q(section__isnull=True)
+        last_orders = dict(Material.objects.filter(condition).values_list(
+            'section').annotate(Max('_order')).order_by())
+        for material in instances:
+            order = last_orders.get(material.section_id)
+            material._order = 0 if order is None else order + 1
+            last_orders[material.section_id] = material._order
+
+    def invalidate(self, pks):
+        bump_generation(Material, using=self.get_db_connection_name())
+
+
+class TestAnswerResource(BulkModelResource):
+
+    class Meta(BulkModelResource.Meta):
+        model = TestAnswer
+        fields = 'id', 'answer',
+
+    def invalidate(self, pks):
+        touch_answer_tests(pks)
+
+
+class TestQuestionResource(BulkModelResource):
+
+    class Meta(BulkModelResource.Meta):
+        model = TestQuestion
+        fields = 'id', 'question', 'answer', 'choices', 'media',
+
+    def invalidate(self, pks):
+        touch_question_tests(pks)
+
+
+class TestResource(BulkModelResource):
+
+    class Meta(BulkModelResource.Meta):
+        model = Test
+        fields = ('id', 'material', 'question', 'pool_size',
+                  'creation_date', 'last_update',)
+
+    def invalidate(self, pks):
+        touch_tests(Q(pk__in=pks))
+
+
+# Ресурсы в порядке импорта: связанные объекты загружаются раньше
+RESOURCES = {
+    'media': MediaResource,
+    'section': SectionResource,
+    'material': MaterialResource,
+    'testanswer': TestAnswerResource,
+    'testquestion': TestQuestionResource,
+    'test': TestResource,
+}
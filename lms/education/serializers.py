@@ -1,7 +1,12 @@
+from django.core import signing
 from rest_framework import serializers
 
-from education.models import (Media, Section, Material, TestAnswer,
-                              TestQuestion)
+from lms.fieldsets import SparseFieldsetSerializerMixin
+
+from education.autocomplete import AUTOCOMPLETE_MODELS
+from education.models import (MEDIA_LINK_FIELDS, Media, Section, Material,
+                              TestAnswer, TestAttempt)
+from education.utils import SEED_MAX, load_attempt
 
 
 class MediaLinkSerializer(serializers.ModelSerializer):
@@ -12,33 +17,35 @@ class MediaLinkSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Media
-        fields = ('pk', 'name',
-                  'local_image', 'external_image',
-                  'local_video', 'external_video',
-                  'local_audio', 'external_audio',)
+        fields = MEDIA_LINK_FIELDS
 
 
-class MaterialListSerializer(serializers.ModelSerializer):
-    section = serializers.SerializerMethodField('get_section')
-    media_links = MediaLinkSerializer(source='media', many=True)
+class SectionNameField(serializers.CharField):
+    """Название раздела материала, None для материала без раздела"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'section.name')
+        super().__init__(read_only=True, allow_null=True, default=None,
+                         **kwargs)
 
-    def get_section(self, obj):
-        return obj.section.name
+
+class MaterialListSerializer(SparseFieldsetSerializerMixin,
+                             serializers.ModelSerializer):
+    section = SectionNameField()
+    media_links = MediaLinkSerializer(source='media', many=True)
 
     class Meta:
         model = Material
         fields = ('pk', 'name', 'section', 'status',
                   'creation_date', 'last_update',
                   'media_links',)
+        field_sources = {'section': ('section__name',)}
 
 
 class MaterialRetrieveSerializer(serializers.ModelSerializer):
-    section = serializers.SerializerMethodField('get_section')
+    section = SectionNameField()
     media_links = MediaLinkSerializer(source='media', many=True)
 
-    def get_section(self, obj):
-        return obj.section.name
-
     class Meta:
         model = Material
         fields = ('pk', 'name', 'section', 'status', 'text',
@@ -46,9 +53,10 @@ class MaterialRetrieveSerializer(serializers.ModelSerializer):
                   'media_links',)
 
 
-class SectionListSerializer(serializers.ModelSerializer):
-    materials_count = serializers.IntegerField(
-        source='material_section.all.count')
+class SectionListSerializer(SparseFieldsetSerializerMixin,
+                            serializers.ModelSerializer):
+    # Аннотация из SectionQuerySet.for_list
+    materials_count = serializers.IntegerField(read_only=True)
     media_links = MediaLinkSerializer(source='media', many=True)
 
     class Meta:
@@ -56,6 +64,7 @@ class SectionListSerializer(serializers.ModelSerializer):
         fields = ('pk', 'name', 'status', 'creation_date', 'last_update',
                   'materials_count', 'base_price',
                   'media_links',)
+        field_sources = {'base_price': ('base_price', 'base_price_currency')}
 
 
 class SectionRetrieveSerializer(serializers.ModelSerializer):
@@ -63,8 +72,8 @@ class SectionRetrieveSerializer(serializers.ModelSerializer):
     media_links = MediaLinkSerializer(source='media', many=True)
 
     def get_materials_names(self, obj):
-        materials_names = obj.material_section.values_list('name', flat=True)
-        return materials_names
+        # Итерация по all() использует предзагрузку из for_retrieve
+        return [material.name for material in obj.material_section.all()]
 
     class Meta:
         model = Section
@@ -73,6 +82,34 @@ class SectionRetrieveSerializer(serializers.ModelSerializer):
                   'materials', 'media_links',)
 
 
+class MaterialSearchSerializer(serializers.ModelSerializer):
+    section = SectionNameField()
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Material
+        fields = ('pk', 'name', 'section', 'status',
+                  'rank', 'headline',)
+
+
+class SectionSearchSerializer(serializers.ModelSerializer):
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Section
+        fields = ('pk', 'name', 'status', 'base_price',
+                  'rank', 'headline',)
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    """Подсказка автодополнения, для схемы API"""
+    type = serializers.ChoiceField(choices=list(AUTOCOMPLETE_MODELS))
+    pk = serializers.IntegerField()
+    name = serializers.CharField()
+
+
 class TestAnswerSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -80,15 +117,100 @@ class TestAnswerSerializer(serializers.ModelSerializer):
         fields = 'pk', 'answer',
 
 
-class TestQuestionSerializer(serializers.ModelSerializer):
-    choices = serializers.SerializerMethodField()
-
-    def get_choices(self, obj):
-        ordered_queryset = TestAnswer.objects.filter(
-            testquestion_choices__pk=obj.pk).order_by('?')
-        return TestAnswerSerializer(ordered_queryset,
-                                    many=True, context=self.context).data
+class SeedField(serializers.IntegerField):
+    """Seed попытки, в том же диапазоне, что выдает new_seed"""
+
+    def __init__(self, **kwargs):
+        super().__init__(min_value=0, max_value=SEED_MAX - 1, **kwargs)
+
+
+class AttemptTokenField(serializers.CharField):
+    """
+    Токен попытки из заголовка X-Test-Attempt
+
+    Возвращает данные токена, если он подписан сервером для теста из
+    контекста и не устарел
+    """
+    default_error_messages = {
+        'invalid_token': 'Недействительный или устаревший токен попытки',
+    }
+
+    def to_internal_value(self, data):
+        try:
+            attempt = load_attempt(super().to_internal_value(data))
+        except signing.BadSignature:
+            self.fail('invalid_token')
+        if attempt['test'] != self.context['test'].pk:
+            self.fail('invalid_token')
+        return attempt
+
+
+class StartTestSerializer(serializers.Serializer):
+    """
+    Параметры запроса вопросов теста
+
+    С токеном попытки повторно выдаются ее вопросы в том же порядке,
+    seed при этом не учитывается
+    """
+    seed = SeedField(required=False,
+                     label='Seed предыдущей выдачи для повтора порядка')
+    attempt = AttemptTokenField(required=False,
+                                label='Токен из заголовка X-Test-Attempt')
+
+
+class TestSubmissionSerializer(serializers.Serializer):
+    """
+    Ответы попытки: {pk вопроса: pk выбранного ответа или null}
+
+    Вопросы и варианты проверяются по снимку попытки, который возвращает
+    get_snapshot(question_pks) из контекста. Seed и вопросы берутся из
+    токена попытки, выданного StartTest. Для теста с выборкой вопросов
+    токен обязателен, для остальных можно передать только seed
+    """
+    seed = SeedField(required=False, allow_null=True,
+                     label='Seed из заголовка X-Test-Seed')
+    attempt = AttemptTokenField(required=False,
+                                label='Токен из заголовка X-Test-Attempt')
+    answers = serializers.DictField(
+        child=serializers.IntegerField(allow_null=True), allow_empty=False,
+        label='Ответы')
+
+    def validate(self, attrs):
+        attempt = attrs.pop('attempt', None)
+        if attempt is not None:
+            attrs['seed'] = attempt['seed']
+            attrs['questions'] = attempt['questions']
+        elif self.context['test'].pool_size is not None:
+            raise serializers.ValidationError(
+                {'attempt': 'Токен попытки обязателен для теста с выборкой '
+                            'вопросов'})
+        else:
+            attrs['questions'] = None
+        snapshot = self.context['get_snapshot'](attrs['questions'])
+        choices = {str(question['pk']): {choice['pk'] for choice
+                                         in question['choices']}
+                   for question in snapshot}
+        errors = {}
+        for question_pk, choice_pk in attrs['answers'].items():
+            if question_pk not in choices:
+                errors[question_pk] = 'Вопроса нет в тесте'
+            elif choice_pk is not None and choice_pk not in choices[
+                    question_pk]:
+                errors[question_pk] = 'Варианта ответа нет в вопросе'
+        if errors:
+            raise serializers.ValidationError({'answers': errors})
+        return attrs
+
+
+class TestAttemptSerializer(serializers.ModelSerializer):
+    results = serializers.SerializerMethodField('get_results')
+
+    def get_results(self, obj):
+        # Верные ответы не выдаются, только отметка о правильности
+        return {str(answer.question_id): answer.is_correct
+                for answer in self.context['answers']}
 
     class Meta:
-        model = TestQuestion
-        fields = 'pk', 'question', 'choices',
+        model = TestAttempt
+        fields = ('pk', 'score', 'max_score', 'seed', 'questions',
+                  'submitted_at', 'results',)
@@ -0,0 +1,80 @@
+from django.db.models import Q
+from django.db.models.signals import (post_save, post_delete, pre_delete,
+                                      m2m_changed)
+from django.dispatch import receiver
+
+from education.cache import bump_generation
+from education.models import (Media, Section, Material, TestAnswer,
+                              TestQuestion, Test)
+from education.snapshots import (touch_tests, touch_question_tests,
+                                 touch_answer_tests)
+
+M2M_POST_ACTIONS = 'post_add', 'post_remove', 'post_clear'
+
+
+@receiver(post_save, sender=Media)
+@receiver(post_save, sender=Section)
+@receiver(post_save, sender=Material)
+@receiver(post_delete, sender=Media)
+@receiver(post_delete, sender=Section)
+@receiver(post_delete, sender=Material)
+def invalidate_catalog_cache(sender, using, **kwargs):
+    bump_generation(sender, using=using)
+
+
+@receiver(m2m_changed, sender=Section.media.through)
+@receiver(m2m_changed, sender=Material.media.through)
+def invalidate_catalog_media_cache(sender, instance, action, using,
+                                   **kwargs):
+    if action in M2M_POST_ACTIONS:
+        bump_generation(Section, Material, Media, using=using)
+
+
+# Снимки тестов пересобираются при следующем запросе после изменения
+# даты обновления теста, см. education.snapshots
+
+@receiver(m2m_changed, sender=Test.question.through)
+def invalidate_test_snapshot_questions(sender, instance, action, reverse,
+                                       pk_set, **kwargs):
+    if not reverse:
+        if action in M2M_POST_ACTIONS:
+            touch_tests(Q(pk=instance.pk))
+    elif action in ('post_add', 'post_remove'):
+        touch_tests(Q(pk__in=pk_set))
+    elif action == 'pre_clear':
+        touch_question_tests([instance.pk])
+
+
+@receiver(m2m_changed, sender=TestQuestion.choices.through)
+@receiver(m2m_changed, sender=TestQuestion.media.through)
+def invalidate_test_snapshot_question_relations(sender, instance, action,
+                                                reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in M2M_POST_ACTIONS:
+            touch_question_tests([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        touch_question_tests(pk_set)
+    elif action == 'pre_clear':
+        # После очистки со стороны ответа или медиа связи уже не найти
+        field = ('choices' if sender is TestQuestion.choices.through
+                 else 'media')
+        touch_question_tests(TestQuestion.objects.filter(
+            **{field: instance}).values('pk'))
+
+
+@receiver(post_save, sender=TestQuestion)
+@receiver(pre_delete, sender=TestQuestion)
+def invalidate_test_snapshot_question(sender, instance, **kwargs):
+    touch_question_tests([instance.pk])
+
+
+@receiver(post_save, sender=TestAnswer)
+@receiver(pre_delete, sender=TestAnswer)
+def invalidate_test_snapshot_answer(sender, instance, **kwargs):
+    touch_answer_tests([instance.pk])
+
+
+@receiver(post_save, sender=Media)
+@receiver(pre_delete, sender=Media)
+def invalidate_test_snapshot_media(sender, instance, **kwargs):
+    touch_tests(Q(question__media__pk=instance.pk))
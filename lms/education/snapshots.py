@@ -0,0 +1,179 @@
+import secrets
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from education.models import TestQuestion, Test, media_prefetch
+from education.serializers import MediaLinkSerializer
+
+SNAPSHOT_KEY = 'education:test_snapshot:{}:{}'
+ANSWER_KEY_KEY = 'education:test_answer_key:{}:{}'
+POOL_KEY = 'education:test_pool:{}:{}'
+QUESTION_KEY = 'education:test_question:{}:{}:{}'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+def compile_question(question):
+    """Снимок вопроса: варианты ответа в порядке pk и медиа"""
+    choices = sorted(question.choices.all(), key=lambda choice: choice.pk)
+    return {
+        'pk': question.pk,
+        'question': question.question,
+        'choices': [{'pk': choice.pk, 'answer': choice.answer}
+                    for choice in choices],
+        'media_links': [dict(media) for media in MediaLinkSerializer(
+            question.media.all(), many=True).data],
+    }
+
+
+def compile_test(test):
+    """
+    Собирает снимок теста и ключ ответов и сохраняет их в тесте
+
+    Снимок содержит вопросы, варианты ответа в порядке pk и медиа.
+    Ключ ответов хранится отдельно, чтобы не попасть в выдачу
+    """
+    questions = test.question.prefetch_related('choices', media_prefetch())
+    snapshot = []
+    answer_key = {}
+    for question in questions:
+        snapshot.append(compile_question(question))
+        answer_key[str(question.pk)] = question.answer_id
+    # Версия берется из загруженного теста: если тест изменится во время
+    # сборки, снимок не совпадет с новой датой обновления и будет пересобран
+    Test.objects.filter(pk=test.pk).update(
+        snapshot=snapshot, answer_key=answer_key,
+        snapshot_version=test.last_update)
+    test.snapshot_version = test.last_update
+    # Ключ ответов понадобится при проверке попытки по этому снимку
+    cache.set(ANSWER_KEY_KEY.format(test.pk, test.last_update.timestamp()),
+              answer_key, SNAPSHOT_TIMEOUT)
+    return snapshot, answer_key
+
+
+def get_test_snapshot(test):
+    """
+    Возвращает снимок теста из кеша, из БД или собирает новый
+
+    test должен содержать актуальные last_update и snapshot_version
+    """
+    cache_key = SNAPSHOT_KEY.format(test.pk, test.last_update.timestamp())
+    snapshot = cache.get(cache_key)
+    if snapshot is not None:
+        return snapshot
+    if test.snapshot_version == test.last_update:
+        snapshot = Test.objects.filter(pk=test.pk).values_list(
+            'snapshot', flat=True).first()
+    if snapshot is None:
+        snapshot, _ = compile_test(test)
+    cache.set(cache_key, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def get_answer_key(test):
+    """
+    Возвращает ключ ответов {pk вопроса: pk ответа} из кеша, из БД
+    одним запросом или собирает новый
+
+    Как и снимок, кешируется по версии теста
+    """
+    cache_key = ANSWER_KEY_KEY.format(test.pk, test.last_update.timestamp())
+    answer_key = cache.get(cache_key)
+    if answer_key is not None:
+        return answer_key
+    if test.snapshot_version == test.last_update:
+        answer_key = Test.objects.filter(pk=test.pk).values_list(
+            'answer_key', flat=True).first()
+    if answer_key is None:
+        _, answer_key = compile_test(test)
+    cache.set(cache_key, answer_key, SNAPSHOT_TIMEOUT)
+    return answer_key
+
+
+def get_question_pool(test):
+    """
+    Возвращает pk всех вопросов теста по возрастанию из кеша или БД
+
+    Кешируется по версии теста, как и снимок
+    """
+    cache_key = POOL_KEY.format(test.pk, test.last_update.timestamp())
+    pool = cache.get(cache_key)
+    if pool is None:
+        pool = list(Test.question.through.objects.filter(
+            test=test).order_by('testquestion').values_list(
+            'testquestion', flat=True))
+        cache.set(cache_key, pool, SNAPSHOT_TIMEOUT)
+    return pool
+
+
+def select_questions(test):
+    """
+    Выбирает pool_size случайных вопросов теста для новой попытки
+
+    Выборка делается из массива pk, поэтому не требует ORDER BY RANDOM()
+    по всем вопросам. Случайность серверная и не зависит от seed
+    клиента, выбранные вопросы сохраняются в токене попытки. Для теста
+    без выборки возвращает None
+    """
+    if test.pool_size is None:
+        return None
+    pool = get_question_pool(test)
+    return secrets.SystemRandom().sample(
+        pool, min(test.pool_size, len(pool)))
+
+
+def get_questions_snapshot(test, question_pks):
+    """
+    Возвращает снимки вопросов в порядке question_pks
+
+    Снимки вопросов кешируются по отдельности по версии теста, поэтому
+    для выборки из большого теста не нужен снимок всех вопросов.
+    Недостающие собираются из БД одним запросом с предзагрузкой
+    """
+    version = test.last_update.timestamp()
+    keys = {pk: QUESTION_KEY.format(test.pk, version, pk)
+            for pk in question_pks}
+    cached = cache.get_many(keys.values())
+    snapshots = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = [pk for pk in question_pks if pk not in snapshots]
+    if missing:
+        questions = TestQuestion.objects.filter(
+            pk__in=missing).prefetch_related('choices', media_prefetch())
+        compiled = {question.pk: compile_question(question)
+                    for question in questions}
+        cache.set_many({keys[pk]: snapshot
+                        for pk, snapshot in compiled.items()},
+                       SNAPSHOT_TIMEOUT)
+        snapshots.update(compiled)
+    return [snapshots[pk] for pk in question_pks if pk in snapshots]
+
+
+def get_attempt_snapshot(test, question_pks):
+    """
+    Возвращает снимок вопросов попытки
+
+    question_pks - вопросы из токена попытки, для теста без выборки
+    None - тогда возвращается снимок всего теста
+    """
+    if question_pks is None:
+        return get_test_snapshot(test)
+    return get_questions_snapshot(test, question_pks)
+
+
+def touch_tests(condition):
+    """
+    Обновляет дату обновления тестов, чтобы их снимки были пересобраны
+
+    update() не вызывает сигналы и save(), поэтому безопасен в обработчиках
+    """
+    Test.objects.filter(condition).update(last_update=timezone.now())
+
+
+def touch_question_tests(question_pks):
+    touch_tests(Q(question__pk__in=question_pks))
+
+
+def touch_answer_tests(answer_pks):
+    touch_tests(Q(question__choices__pk__in=answer_pks)
+                | Q(question__answer__pk__in=answer_pks))
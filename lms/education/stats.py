@@ -0,0 +1,131 @@
+from django.db import transaction
+from django.db.models import (Case, Count, F, PositiveIntegerField, Q, Sum,
+                              When)
+
+from education.models import (TestQuestion, Test, TestAttempt,
+                              TestAttemptAnswer, TestStats, TestQuestionStats)
+
+# Количество тестов или вопросов, пересчитываемых в одной транзакции
+RECONCILE_BATCH_SIZE = 1_000
+
+
+def record_attempt(attempt, attempt_answers):
+    """
+    Добавляет попытку к статистике теста и его вопросов
+
+    Счетчики увеличиваются через F() одним UPDATE на таблицу, поэтому
+    параллельные попытки не теряют друг друга. Вызывается в транзакции
+    сохранения попытки, после вставки ответов: так сверка статистики,
+    заблокировавшая строки, учитывает попытку либо в пересчете, либо
+    через инкремент после себя
+    """
+    question_pks = sorted(answer.question_id for answer in attempt_answers)
+    # Строки статистики создаются при первой попытке
+    TestStats.objects.bulk_create([TestStats(test_id=attempt.test_id)],
+                                  ignore_conflicts=True)
+    TestQuestionStats.objects.bulk_create(
+        [TestQuestionStats(question_id=pk) for pk in question_pks],
+        ignore_conflicts=True)
+
+    TestStats.objects.filter(test_id=attempt.test_id).update(
+        attempts_count=F('attempts_count') + 1,
+        score_sum=F('score_sum') + attempt.score,
+        max_score_sum=F('max_score_sum') + attempt.max_score)
+    if not question_pks:
+        return
+    # Вопросы бывают общими у разных тестов, попытки которых не
+    # упорядочены блокировкой строки TestStats. Строки вопросов
+    # блокируются по возрастанию pk, иначе две попытки могут взять их
+    # в разном порядке и попасть в deadlock
+    list(TestQuestionStats.objects.filter(pk__in=question_pks).order_by(
+        'pk').select_for_update().values_list('pk', flat=True))
+    increments = {'answers_count': F('answers_count') + 1}
+    groups = {
+        'correct_count': [answer.question_id for answer in attempt_answers
+                          if answer.is_correct],
+        'skipped_count': [answer.question_id for answer in attempt_answers
+                          if not answer.is_correct
+                          and answer.choice_id is None],
+    }
+    for counter, pks in groups.items():
+        if pks:
+            increments[counter] = Case(
+                When(pk__in=pks, then=F(counter) + 1), default=F(counter),
+                output_field=PositiveIntegerField())
+    TestQuestionStats.objects.filter(pk__in=question_pks).update(
+        **increments)
+
+
+def _batches(model, batch_size):
+    """pk модели пачками, по ключу pk без OFFSET"""
+    last_pk = 0
+    while True:
+        pks = list(model.objects.filter(pk__gt=last_pk).order_by(
+            'pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def reconcile_test_stats(batch_size=RECONCILE_BATCH_SIZE):
+    """
+    Пересчитывает статистику тестов из сохраненных попыток
+
+    Исправляет расхождения после удаления попыток и ошибок. Строки
+    статистики пачки блокируются до записи, чтобы попытки, сохраняемые
+    во время пересчета, добавили свой инкремент к новому значению
+    """
+    for pks in _batches(Test, batch_size):
+        with transaction.atomic():
+            existing = set(TestStats.objects.filter(
+                pk__in=pks).order_by('pk').select_for_update().values_list(
+                'pk', flat=True))
+            totals = {row['test']: row for row in TestAttempt.objects.filter(
+                test__in=pks).order_by().values('test').annotate(
+                attempts_count=Count('pk'), score_sum=Sum('score'),
+                max_score_sum=Sum('max_score'))}
+            stats = []
+            # Нулевая статистика создается, только если строка уже есть
+            for pk in sorted(existing | set(totals)):
+                row = totals.get(pk, {})
+                stats.append(TestStats(
+                    test_id=pk,
+                    attempts_count=row.get('attempts_count', 0),
+                    score_sum=row.get('score_sum', 0),
+                    max_score_sum=row.get('max_score_sum', 0)))
+            TestStats.objects.bulk_create(
+                stats, update_conflicts=True, unique_fields=('test',),
+                update_fields=('attempts_count', 'score_sum',
+                               'max_score_sum'))
+
+
+def reconcile_question_stats(batch_size=RECONCILE_BATCH_SIZE):
+    """Пересчитывает статистику вопросов из сохраненных ответов"""
+    for pks in _batches(TestQuestion, batch_size):
+        with transaction.atomic():
+            existing = set(TestQuestionStats.objects.filter(
+                pk__in=pks).order_by('pk').select_for_update().values_list(
+                'pk', flat=True))
+            totals = {row['question']: row for row in
+                      TestAttemptAnswer.objects.filter(
+                          question__in=pks).order_by().values(
+                          'question').annotate(
+                          answers_count=Count('pk'),
+                          correct_count=Count('pk', filter=Q(
+                              is_correct=True)),
+                          skipped_count=Count('pk', filter=Q(
+                              choice__isnull=True, is_correct=False)))}
+            stats = []
+            # Нулевая статистика создается, только если строка уже есть
+            for pk in sorted(existing | set(totals)):
+                row = totals.get(pk, {})
+                stats.append(TestQuestionStats(
+                    question_id=pk,
+                    answers_count=row.get('answers_count', 0),
+                    correct_count=row.get('correct_count', 0),
+                    skipped_count=row.get('skipped_count', 0)))
+            TestQuestionStats.objects.bulk_create(
+                stats, update_conflicts=True, unique_fields=('question',),
+                update_fields=('answers_count', 'correct_count',
+                               'skipped_count'))
@@ -0,0 +1,31 @@
+from celery import shared_task
+from django.db.models import F
+
+from education.analysis import analyze_questions
+from education.models import Test, TestStats
+from education.stats import reconcile_test_stats, reconcile_question_stats
+
+
+@shared_task()
+def reconcile_stats():
+    """Сверка статистики тестов и вопросов с сохраненными попытками"""
+    reconcile_test_stats()
+    reconcile_question_stats()
+
+
+@shared_task()
+def analyze_test(test_pk):
+    """Анализ вопросов одного теста"""
+    test = Test.objects.filter(pk=test_pk).first()
+    if test is not None:
+        analyze_questions(test)
+
+
+@shared_task()
+def analyze_tests():
+    """Ставит в очередь анализ тестов, у которых изменились попытки"""
+    test_pks = TestStats.objects.exclude(
+        attempts_count=F('analyzed_attempts_count')).values_list(
+        'test', flat=True)
+    for test_pk in test_pks.iterator():
+        analyze_test.delay(test_pk)
@@ -1,12 +1,17 @@
 from django.contrib.admin.sites import AdminSite
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase, RequestFactory
+from django.urls import reverse
 from django.utils import timezone
 
-from education.admin import (SectionAdmin, MaterialAdmin, TestQuestionAdmin,
-                             set_last_update_now,
+from education.admin import (MediaAdmin, SectionAdmin, MaterialAdmin,
+                             TestQuestionAdmin, set_last_update_now,
                              set_archived_status, set_closed_status,
                              set_open_status)
-from education.models import Section, Material, TestAnswer, TestQuestion
+from education.models import (Media, Section, Material, TestAnswer,
+                              TestQuestion)
+from jobs.tests.utils import run_action
 
 
 class AdminActionsTests(TestCase):
@@ -17,7 +22,7 @@ class AdminActionsTests(TestCase):
 
     def test_set_last_update_now(self):
         queryset = Section.objects.filter(pk=self.section.pk)
-        set_last_update_now(None, None, queryset)
+        run_action(set_last_update_now, queryset)
         self.section.refresh_from_db()
         self.assertAlmostEqual(self.section.last_update, timezone.now(),
                                delta=timezone.timedelta(seconds=1))
@@ -25,21 +30,21 @@ class AdminActionsTests(TestCase):
     def test_set_archived_status(self):
         self.section.status = 'OPEN'
         queryset = Section.objects.filter(pk=self.section.pk)
-        set_archived_status(None, None, queryset)
+        run_action(set_archived_status, queryset)
         self.section.refresh_from_db()
         self.assertEqual(self.section.status, 'ARCHIVED')
 
     def test_set_closed_status(self):
         self.section.status = 'OPEN'
         queryset = Section.objects.filter(pk=self.section.pk)
-        set_closed_status(None, None, queryset)
+        run_action(set_closed_status, queryset)
         self.section.refresh_from_db()
         self.assertEqual(self.section.status, 'CLOSED')
 
     def test_set_open_status(self):
         self.section.status = 'CLOSED'
         queryset = Section.objects.filter(pk=self.section.pk)
-        set_open_status(None, None, queryset)
+        run_action(set_open_status, queryset)
         self.section.refresh_from_db()
         self.assertEqual(self.section.status, 'OPEN')
 
@@ -83,7 +88,7 @@ class TestQuestionAdminTests(TestCase):
     def test_answer_link(self):
         link = self.testquestion_admin.answer_link(self.testquestion)
         expected_link = (f'<a href="/admin/education/testanswer/'
-                         f'{self.testquestion.pk}/change/">'
+                         f'{self.answer1.pk}/change/">'
                          f'Test_Answer1</a>')
         self.assertEqual(link, expected_link)
 
@@ -92,3 +97,90 @@ class TestQuestionAdminTests(TestCase):
         link = self.testquestion_admin.answer_link(self.testquestion)
         expected_link = ''
         self.assertEqual(link, expected_link)
+
+
+class AdminSearchTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.admin_site = AdminSite()
+        self.section = Section.objects.create(name='Python Section')
+        Material.objects.create(name='Основы PYTHON', section=self.section)
+        Material.objects.create(name='100% Java', section=self.section)
+
+    def search(self, model_admin, term):
+        queryset, _ = model_admin.get_search_results(
+            self.factory.get('/'), model_admin.get_queryset(None), term)
+        return queryset
+
+    def test_case_insensitive_substring(self):
+        material_admin = MaterialAdmin(Material, self.admin_site)
+        self.assertEqual(
+            [material.name for material in self.search(material_admin,
+                                                       'pyth')],
+            ['Основы PYTHON'])
+        # Спецсимволы LIKE ищутся как обычные символы
+        self.assertEqual(self.search(material_admin, '%').count(), 1)
+
+    def test_search_uses_trigram_index(self):
+        cases = (
+            (MediaAdmin(Media, self.admin_site), 'education_media_name_trgm'),
+            (SectionAdmin(Section, self.admin_site),
+             'education_section_name_trgm'),
+            (MaterialAdmin(Material, self.admin_site),
+             'education_material_name_trgm'),
+            (TestQuestionAdmin(TestQuestion, self.admin_site),
+             'education_question_trgm'),
+        )
+        with connection.cursor() as cursor:
+            # В маленькой таблице планировщик иначе выберет Seq Scan
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        for model_admin, index in cases:
+            with self.subTest(index):
+                # Без соединения с ответами вопросов для вывода в списке,
+                # иначе на пустых таблицах таблицу ведет индекс ответа
+                queryset = self.search(model_admin, 'python')
+                self.assertIn(index, queryset.select_related(
+                    None).order_by().explain())
+
+
+class AutocompleteFieldsTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser(
+            email='admin@example.com', password='password123'))
+        Media.objects.bulk_create(
+            Media(name=f'Media_{num}',
+                  external_image=f'https://example.com/{num}.jpg')
+            for num in range(30))
+        TestAnswer.objects.bulk_create(TestAnswer(answer=f'Answer_{num}')
+                                       for num in range(30))
+        self.section = Section.objects.create(name='Python Section')
+        self.section.media.add(Media.objects.get(name='Media_1'))
+
+    def test_change_forms_render_selected_only(self):
+        answer = TestAnswer.objects.get(answer='Answer_1')
+        question = TestQuestion.objects.create(question='Question',
+                                               answer=answer)
+        pages = (
+            (reverse('admin:education_section_change',
+                     args=(self.section.pk,)), 'Media_1', 'Media_2'),
+            (reverse('admin:education_material_add'), None, 'Media_2'),
+            (reverse('admin:education_testquestion_change',
+                     args=(question.pk,)), 'Answer_1', 'Answer_2'),
+        )
+        for url, selected, other in pages:
+            with self.subTest(url):
+                content = self.client.get(url).content.decode()
+                self.assertIn('admin-autocomplete', content)
+                if selected is not None:
+                    self.assertIn(selected, content)
+                self.assertNotIn(other, content)
+
+    def test_autocomplete_search(self):
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'education', 'model_name': 'testquestion',
+            'field_name': 'choices', 'term': 'answer_2'})
+        self.assertEqual(
+            sorted(result['text'] for result in response.json()['results']),
+            ['Ответ: Answer_2'] + [f'Ответ: Answer_{num}'
+                                   for num in range(20, 30)])
+        self.assertFalse(response.json()['pagination']['more'])
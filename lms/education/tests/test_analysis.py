@@ -0,0 +1,138 @@
+from statistics import correlation
+from unittest import mock
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from education import tasks
+from education.admin import TestQuestionAdmin
+from education.analysis import analyze_questions
+from education.grading import grade_attempt
+from education.models import (Material, TestAnswer, TestQuestion, Test,
+                              TestStats, TestQuestionAnalysis)
+
+
+class AnalyzeQuestionsTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password123',
+            first_name='Test', last_name='User')
+        self.answers = [TestAnswer.objects.create(answer=f'Answer_{num}')
+                        for num in range(5)]
+        a1, a2, a3, a4, a5 = self.answers
+        self.question1 = TestQuestion.objects.create(
+            question='Question_1', answer=a1)
+        self.question1.choices.add(a1, a2)
+        self.question2 = TestQuestion.objects.create(
+            question='Question_2', answer=a3)
+        self.question2.choices.add(a3, a4, a5)
+        self.test = Test.objects.create(
+            material=Material.objects.create(name='Test_Material'))
+        self.test.question.add(self.question1, self.question2)
+        for first, second in (a1, a3), (a1, a4), (a2, a4), (a2, None):
+            answers = {str(self.question1.pk): first.pk}
+            if second is not None:
+                answers[str(self.question2.pk)] = second.pk
+            grade_attempt(self.test, self.user, answers)
+
+    def get_analysis(self, question):
+        return TestQuestionAnalysis.objects.get(test=self.test,
+                                                question=question)
+
+    def test_difficulty_and_discrimination(self):
+        self.assertEqual(analyze_questions(self.test), 4)
+        first = self.get_analysis(self.question1)
+        second = self.get_analysis(self.question2)
+        self.assertEqual((first.answers_count, first.difficulty,
+                          first.skipped_rate), (4, 0.5, 0))
+        self.assertEqual((second.answers_count, second.difficulty,
+                          second.skipped_rate), (4, 0.25, 0.25))
+        # Балл за остальные вопросы - правильность другого вопроса
+        self.assertAlmostEqual(first.discrimination, correlation(
+            [1, 1, 0, 0], [1, 0, 0, 0]), places=4)
+        self.assertAlmostEqual(second.discrimination, correlation(
+            [1, 0, 0, 0], [1, 1, 0, 0]), places=4)
+
+    def test_distractors(self):
+        analyze_questions(self.test)
+        a1, a2, a3, a4, a5 = self.answers
+        distractors = {choice['choice']: choice for choice in
+                       self.get_analysis(self.question2).distractors}
+        self.assertEqual(list(distractors), [a3.pk, a4.pk, a5.pk])
+        self.assertEqual(
+            [(choice['is_correct'], choice['count'], choice['rate'])
+             for choice in distractors.values()],
+            [(True, 1, 0.25), (False, 2, 0.5), (False, 0, 0)])
+        self.assertAlmostEqual(distractors[a4.pk]['discrimination'],
+                               correlation([0, 1, 1, 0], [1, 1, 0, 0]),
+                               places=4)
+        # Вариант, который никто не выбрал, не коррелирует с баллом
+        self.assertIsNone(distractors[a5.pk]['discrimination'])
+        wrong = self.get_analysis(self.question1).distractors[1]
+        self.assertEqual((wrong['choice'], wrong['answer']),
+                         (a2.pk, 'Answer_1'))
+        self.assertAlmostEqual(wrong['discrimination'], correlation(
+            [0, 0, 1, 1], [1, 0, 0, 0]), places=4)
+
+    def test_chunks(self):
+        analyze_questions(self.test)
+        expected = list(TestQuestionAnalysis.objects.order_by(
+            'question').values('answers_count', 'difficulty',
+                               'discrimination', 'distractors'))
+        analyze_questions(self.test, chunk_size=1)
+        self.assertEqual(list(TestQuestionAnalysis.objects.order_by(
+            'question').values('answers_count', 'difficulty',
+                               'discrimination', 'distractors')), expected)
+
+    def test_pool_attempts(self):
+        # В попытке из пула учитываются только заданные вопросы
+        a1, a2, a3, a4, a5 = self.answers
+        self.test.pool_size = 1
+        self.test.save()
+        grade_attempt(self.test, self.user,
+                      {str(self.question2.pk): a3.pk},
+                      questions=[self.question2.pk])
+        with mock.patch('education.analysis.ANALYSIS_CHUNK_ANSWERS', 2):
+            self.assertEqual(analyze_questions(self.test), 5)
+        first = self.get_analysis(self.question1)
+        second = self.get_analysis(self.question2)
+        self.assertEqual((first.answers_count, first.difficulty), (4, 0.5))
+        self.assertEqual((second.answers_count, second.difficulty),
+                         (5, 0.4))
+        # Балл за остальные вопросы попытки из пула равен нулю
+        self.assertAlmostEqual(second.discrimination, correlation(
+            [1, 0, 0, 0, 1], [1, 1, 0, 0, 0]), places=4)
+
+    def test_removed_question(self):
+        analyze_questions(self.test)
+        self.test.question.remove(self.question2)
+        analyze_questions(self.test)
+        analysis = TestQuestionAnalysis.objects.get()
+        self.assertEqual(analysis.question, self.question1)
+        # Без второго вопроса балл за остальные вопросы не меняется
+        self.assertIsNone(analysis.discrimination)
+
+    def test_analyze_tests(self):
+        other = Test.objects.create()
+        TestStats.objects.create(test=other)
+        with mock.patch.object(tasks.analyze_test, 'delay') as delay:
+            tasks.analyze_tests()
+        delay.assert_called_once_with(self.test.pk)
+        tasks.analyze_test(self.test.pk)
+        self.assertEqual(TestStats.objects.get(
+            test=self.test).analyzed_attempts_count, 4)
+        with mock.patch.object(tasks.analyze_test, 'delay') as delay:
+            tasks.analyze_tests()
+        delay.assert_not_called()
+
+    def test_admin(self):
+        question_admin = TestQuestionAdmin(TestQuestion, AdminSite())
+        self.assertEqual(question_admin.analysis_table(self.question2),
+                         'Анализ не рассчитан')
+        analyze_questions(self.test)
+        table = question_admin.analysis_table(self.question2)
+        self.assertIn(f'Тест {self.test.pk}: ответов 4, трудность 0.25',
+                      table)
+        self.assertIn('<li>Answer_3: выбран 2 раз (0.50), корреляция 0.00',
+                      table)
@@ -0,0 +1,51 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status, test
+
+from education.models import (Media, Section, Material, TestAnswer,
+                              TestQuestion, Test)
+
+
+class EduDataCommandTest(TestCase):
+    def generate(self, **options):
+        call_command('c_edudata', stdout=StringIO(), **options)
+
+    def test_counts(self):
+        self.generate(sections=3, materials_per_section=4,
+                      questions_per_test=2, choices_per_question=3, media=5,
+                      seed=1)
+        self.assertEqual(Media.objects.count(), 5)
+        self.assertEqual(Section.objects.count(), 3)
+        self.assertEqual(Material.objects.count(), 12)
+        self.assertEqual(Test.objects.count(), 12)
+        self.assertEqual(TestQuestion.objects.count(), 24)
+        self.assertEqual(TestAnswer.objects.count(), 72)
+        self.assertEqual(Test.question.through.objects.count(), 24)
+        self.assertEqual(TestQuestion.choices.through.objects.count(), 72)
+        for question in TestQuestion.objects.prefetch_related('choices'):
+            self.assertIn(question.answer_id,
+                          [choice.pk for choice in question.choices.all()])
+        for material in Material.objects.select_related('section'):
+            self.assertEqual(material.status, material.section.status)
+            material.clean()
+
+    def test_seed_reproducible(self):
+        self.generate(sections=2, seed=42)
+        names = list(Material.objects.order_by('pk').values_list(
+            'name', 'text', 'status'))
+        self.generate(sections=2, seed=42)
+        self.assertEqual(list(Material.objects.order_by('pk').values_list(
+            'name', 'text', 'status')), names)
+        self.assertEqual(Section.objects.count(), 2)
+
+    def test_generated_test_served(self):
+        self.generate(sections=1, materials_per_section=1, seed=3)
+        material = Material.objects.get()
+        response = test.APIClient().get(
+            reverse('education:material_test', args=(material.pk,)))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data[0]['choices']), 4)
@@ -0,0 +1,144 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+import tablib
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+
+from education.cache import get_generations
+from education.models import (Media, Section, Material, TestAnswer,
+                              TestQuestion, Test)
+from education.resources import MaterialResource, TestQuestionResource
+
+
+class ImportCommandTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = Media.objects.create(
+            name='Test_Media', external_image='https://example.com/1.jpg')
+        self.open_section = Section.objects.create(name='Open',
+                                                   status='OPEN')
+        self.closed_section = Section.objects.create(name='Closed',
+                                                     status='CLOSED')
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_file(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def materials_csv(self, count, status='OPEN'):
+        lines = ['name,text,status,section,media']
+        lines += [f'Material_{num},Text {num},{status},'
+                  f'{self.open_section.pk},{self.media.pk}'
+                  for num in range(count)]
+        return self.write_file('materials.csv', '\n'.join(lines))
+
+    def test_import_csv(self):
+        generation = get_generations(Material)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('c_import', 'material', self.materials_csv(25),
+                         '--batch-size', '10', stdout=StringIO())
+        materials = Material.objects.filter(section=self.open_section)
+        self.assertEqual(materials.count(), 25)
+        self.assertEqual(list(materials.values_list('_order', flat=True)),
+                         list(range(25)))
+        self.assertEqual(
+            Material.media.through.objects.filter(media=self.media).count(),
+            25)
+        # Вектор поиска заполняется триггером и при bulk_create
+        self.assertFalse(materials.filter(search_vector=None).exists())
+        self.assertNotEqual(get_generations(Material), generation)
+
+    def test_queries_per_batch(self):
+        def count_queries(rows):
+            dataset = tablib.Dataset(headers=['name', 'status', 'section',
+                                              'media'])
+            for num in range(rows):
+                dataset.append([f'Material_{num}', 'OPEN',
+                                self.open_section.pk, self.media.pk])
+            with CaptureQueriesContext(connection) as context:
+                result = MaterialResource().import_data(
+                    dataset, use_transactions=True)
+            self.assertFalse(result.has_errors())
+            return len(context.captured_queries)
+
+        self.assertEqual(count_queries(5), count_queries(50))
+
+    def test_section_status_rule(self):
+        stderr = StringIO()
+        path = self.write_file(
+            'materials.csv',
+            'name,status,section\n'
+            f'Valid,CLOSED,{self.closed_section.pk}\n'
+            f'Invalid,OPEN,{self.closed_section.pk}\n')
+        with self.assertRaises(CommandError):
+            call_command('c_import', 'material', path, stdout=StringIO(),
+                         stderr=stderr)
+        self.assertIn('Строка 2', stderr.getvalue())
+        # Пачка с ошибкой откатывается целиком
+        self.assertFalse(Material.objects.exists())
+
+    def test_unknown_section(self):
+        path = self.write_file('materials.csv',
+                               'name,status,section\nMaterial,OPEN,999999\n')
+        with self.assertRaises(CommandError):
+            call_command('c_import', 'material', path, stdout=StringIO(),
+                         stderr=StringIO())
+
+    def test_update_existing(self):
+        material = Material.objects.create(name='Old', status='OPEN',
+                                           section=self.open_section)
+        path = self.write_file(
+            'materials.jsonl',
+            json.dumps({'id': material.pk, 'name': 'New', 'status': 'OPEN',
+                        'section': self.open_section.pk,
+                        'media': [self.media.pk]}) + '\n')
+        call_command('c_import', 'material', path, stdout=StringIO())
+        material.refresh_from_db()
+        self.assertEqual(material.name, 'New')
+        self.assertEqual(list(material.media.all()), [self.media])
+
+    def test_import_xlsx_and_touch_tests(self):
+        answer = TestAnswer.objects.create(answer='Answer')
+        question = TestQuestion.objects.create(question='Old',
+                                               answer=answer)
+        question.choices.add(answer)
+        test = Test.objects.create()
+        test.question.add(question)
+        last_update = Test.objects.get(pk=test.pk).last_update
+
+        workbook = Workbook()
+        workbook.active.append(['id', 'question', 'answer', 'choices'])
+        workbook.active.append([question.pk, 'New', answer.pk,
+                                str(answer.pk)])
+        path = os.path.join(self.directory.name, 'questions.xlsx')
+        workbook.save(path)
+        call_command('c_import', 'testquestion', path, stdout=StringIO())
+
+        question.refresh_from_db()
+        self.assertEqual(question.question, 'New')
+        self.assertGreater(Test.objects.get(pk=test.pk).last_update,
+                           last_update)
+
+    def test_dry_run(self):
+        call_command('c_import', 'material', self.materials_csv(3),
+                     '--dry-run', stdout=StringIO())
+        self.assertFalse(Material.objects.exists())
+
+    def test_resource_export(self):
+        answer = TestAnswer.objects.create(answer='Answer')
+        question = TestQuestion.objects.create(question='Q', answer=answer)
+        question.choices.add(answer)
+        dataset = TestQuestionResource().export()
+        self.assertEqual(dataset.dict[0]['choices'], str(answer.pk))
@@ -0,0 +1,241 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import test
+
+from bench.endpoints import get_route_names
+from education import autocomplete
+from education.models import (Media, Section, Material, TestAnswer,
+                              TestQuestion, Test)
+from lms.querybudget import QUERY_BUDGETS, UNBUDGETED, QueryBudgetMixin
+
+
+class EducationQueryBudgetTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        self.media = Media.objects.create(
+            name='Test_Media', external_image='https://example.com/1.jpg')
+        self.section = Section.objects.create(name='Python Section',
+                                              status='OPEN')
+        self.section.media.add(self.media)
+        autocomplete.reset_index()
+
+    def tearDown(self):
+        autocomplete.reset_index()
+
+    def grow_sections(self, size):
+        count = Section.objects.count()
+        sections = Section.objects.bulk_create(
+            Section(name=f'Python Section {num}', status='OPEN',
+                    description='Разделы о Python')
+            for num in range(count, size))
+        Section.media.through.objects.bulk_create(
+            Section.media.through(section=section, media=self.media)
+            for section in sections)
+        Material.media.through.objects.bulk_create(
+            Material.media.through(material=material, media=self.media)
+            for material in Material.objects.bulk_create(
+                Material(name=f'Python Material {section.pk}',
+                         section=section, status='OPEN', _order=0,
+                         text='Материал о Python')
+                for section in sections))
+
+    def grow_materials(self, size):
+        count = Material.objects.filter(section=self.section).count()
+        materials = Material.objects.bulk_create(
+            Material(name=f'Python Material {num}', section=self.section,
+                     status='OPEN', _order=num, text='Материал о Python')
+            for num in range(count, size))
+        Material.media.through.objects.bulk_create(
+            Material.media.through(material=material, media=self.media)
+            for material in materials)
+
+    def grow_media(self, material):
+        def grow(size):
+            count = material.media.count()
+            material.media.add(*Media.objects.bulk_create(
+                Media(name=f'Media_{num}',
+                      external_image=f'https://example.com/{num}.jpg')
+                for num in range(count, size)))
+        return grow
+
+    def grow_questions(self, test_object):
+        def grow(size):
+            count = test_object.question.count()
+            answers = TestAnswer.objects.bulk_create(
+                TestAnswer(answer=f'Answer_{num}')
+                for num in range(count, size))
+            questions = TestQuestion.objects.bulk_create(
+                TestQuestion(question=f'Question_{answer.pk}', answer=answer)
+                for answer in answers)
+            TestQuestion.choices.through.objects.bulk_create(
+                TestQuestion.choices.through(testquestion=question,
+                                             testanswer=question.answer)
+                for question in questions)
+            TestQuestion.media.through.objects.bulk_create(
+                TestQuestion.media.through(testquestion=question,
+                                           media=self.media)
+                for question in questions)
+            test_object.question.add(*questions)
+            # Снимок теста пересобирается из БД
+            Test.objects.filter(pk=test_object.pk).update(
+                last_update=timezone.now())
+        return grow
+
+    def assertGetBudget(self, route, grow, kwargs=None, data=None):
+        url = reverse(route, kwargs=kwargs)
+        self.assertQueryBudget(route, lambda: self.client.get(url, data),
+                               grow)
+
+    def test_routes_have_budgets(self):
+        routes = [name for name in get_route_names()
+                  if name.startswith('education:')]
+        self.assertEqual([name for name in routes if name not in
+                          QUERY_BUDGETS and name not in UNBUDGETED], [])
+
+    def test_sections_list(self):
+        self.assertGetBudget('education:sections_list', self.grow_sections)
+
+    def test_sections_search(self):
+        self.assertGetBudget('education:sections_search',
+                             self.grow_sections, data={'q': 'python'})
+
+    def test_section_detail(self):
+        self.assertGetBudget('education:section_detail', self.grow_materials,
+                             kwargs={'pk': self.section.pk})
+
+    def test_materials_list(self):
+        self.assertGetBudget('education:materials_list', self.grow_sections)
+
+    def test_materials_search(self):
+        self.assertGetBudget('education:materials_search',
+                             self.grow_sections, data={'q': 'python'})
+
+    def test_material_detail(self):
+        self.grow_materials(1)
+        material = Material.objects.get()
+        self.assertGetBudget('education:material_detail',
+                             self.grow_media(material),
+                             kwargs={'pk': material.pk})
+
+    def test_material_test(self):
+        self.grow_materials(1)
+        material = Material.objects.get()
+        test_object = Test.objects.create(material=material)
+        self.assertGetBudget('education:material_test',
+                             self.grow_questions(test_object),
+                             kwargs={'pk': material.pk})
+
+    def test_material_test_pool(self):
+        self.grow_materials(1)
+        material = Material.objects.get()
+        test_object = Test.objects.create(material=material, pool_size=5)
+        # Выборка не зависит от количества вопросов в тесте
+        self.assertGetBudget('education:material_test',
+                             self.grow_questions(test_object),
+                             kwargs={'pk': material.pk}, data={'seed': 1})
+
+    def test_material_test_submit(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            email='testuser@example.com', password='password123',
+            first_name='Test', last_name='User'))
+        self.grow_materials(1)
+        material = Material.objects.get()
+        test_object = Test.objects.create(material=material)
+        url = reverse('education:material_test_submit',
+                      kwargs={'pk': material.pk})
+        grow_questions = self.grow_questions(test_object)
+        answers = {}
+
+        def grow(size):
+            grow_questions(size)
+            answers.update((str(question.pk), question.answer_id)
+                           for question in test_object.question.all())
+        self.assertQueryBudget(
+            'education:material_test_submit',
+            lambda: self.client.post(url, {'answers': answers},
+                                     format='json'), grow)
+
+    def grow_tests(self, size):
+        self.grow_sections(size)
+        materials = Material.objects.filter(test_material__isnull=True)
+        tests = Test.objects.bulk_create(Test(material=material)
+                                         for material in materials)
+        answer = TestAnswer.objects.create(answer=f'Answer_{size}')
+        question = TestQuestion.objects.create(question=f'Question_{size}',
+                                               answer=answer)
+        Test.question.through.objects.bulk_create(
+            Test.question.through(test=test_object, testquestion=question)
+            for test_object in tests)
+
+    def login_admin(self):
+        self.client.force_login(get_user_model().objects.create_superuser(
+            email='admin@example.com', password='password123'))
+
+    def assertChangelistBudget(self, model, grow):
+        route = f'admin:education_{model._meta.model_name}_changelist'
+        self.login_admin()
+        url = reverse(route)
+        self.assertQueryBudget(route, lambda: self.client.get(url), grow)
+
+    def test_admin_changelists_have_budgets(self):
+        routes = [name for name in get_route_names()
+                  if name.startswith('admin:education_')
+                  and name.endswith('_changelist')]
+        self.assertEqual([name for name in routes
+                          if name not in QUERY_BUDGETS], [])
+
+    def test_media_changelist(self):
+        self.grow_materials(1)
+        self.assertChangelistBudget(
+            Media, self.grow_media(Material.objects.get()))
+
+    def test_section_changelist(self):
+        self.assertChangelistBudget(Section, self.grow_sections)
+
+    def test_material_changelist(self):
+        self.assertChangelistBudget(Material, self.grow_sections)
+
+    def test_testanswer_changelist(self):
+        self.grow_materials(1)
+        test_object = Test.objects.create(material=Material.objects.get())
+        self.assertChangelistBudget(TestAnswer,
+                                    self.grow_questions(test_object))
+
+    def test_testquestion_changelist(self):
+        self.grow_materials(1)
+        test_object = Test.objects.create(material=Material.objects.get())
+        self.assertChangelistBudget(TestQuestion,
+                                    self.grow_questions(test_object))
+
+    def test_test_changelist(self):
+        self.assertChangelistBudget(Test, self.grow_tests)
+
+    def test_test_change(self):
+        # Выбранные вопросы выводятся с текстом ответа
+        self.grow_materials(1)
+        test_object = Test.objects.create(material=Material.objects.get())
+        self.login_admin()
+        url = reverse('admin:education_test_change', args=(test_object.pk,))
+        self.assertQueryBudget('admin:education_test_change',
+                               lambda: self.client.get(url),
+                               self.grow_questions(test_object))
+
+    def test_admin_autocomplete(self):
+        self.grow_materials(1)
+        test_object = Test.objects.create(material=Material.objects.get())
+        self.login_admin()
+        url = reverse('admin:autocomplete')
+        data = {'app_label': 'education', 'model_name': 'test',
+                'field_name': 'question', 'term': 'Question'}
+        self.assertQueryBudget('admin:autocomplete',
+                               lambda: self.client.get(url, data),
+                               self.grow_questions(test_object))
+
+    def test_autocomplete(self):
+        def grow(size):
+            self.grow_sections(size)
+            autocomplete.reset_index()
+        self.assertGetBudget('education:autocomplete', grow,
+                             data={'q': 'pyth'})
@@ -1,15 +1,13 @@
 from django.test import TestCase
 from django.utils import timezone
 
-from education.models import (Media, Section, Material, TestAnswer,
-                              TestQuestion)
+from education.models import Media, Section, Material, TestAnswer
 from education.serializers import (MediaLinkSerializer,
                                    MaterialListSerializer,
                                    MaterialRetrieveSerializer,
                                    SectionListSerializer,
                                    SectionRetrieveSerializer,
-                                   TestAnswerSerializer,
-                                   TestQuestionSerializer)
+                                   TestAnswerSerializer)
 
 
 class MediaLinkSerializerTest(TestCase):
@@ -238,32 +236,3 @@ class TestAnswerSerializerTest(TestCase):
         expected_fields = ('pk', 'answer',)
         self.assertEqual(self.serializer.Meta.model, TestAnswer)
         self.assertEqual(self.serializer.Meta.fields, expected_fields)
-
-
-class TestQuestionSerializerTest(TestCase):
-    def setUp(self):
-        self.test_answer1 = TestAnswer.objects.create(answer='Answer_1')
-        self.test_answer2 = TestAnswer.objects.create(answer='Answer_2')
-        self.test_question = TestQuestion.objects.create(
-            question='Question',
-            answer=self.test_answer1)
-        self.test_question.choices.add(self.test_answer1, self.test_answer2)
-        self.serializer = TestQuestionSerializer(instance=self.test_question)
-
-    def tearDown(self):
-        self.test_answer1.delete()
-        self.test_answer2.delete()
-        self.test_question.delete()
-
-    def test_get_choices(self):
-        expected_choices = TestAnswer.objects.filter(
-            testquestion_choices=self.test_question).order_by('answer')
-        choices_data = self.serializer.get_choices(self.test_question)
-        sorted_choices_data = sorted(choices_data, key=lambda x: x['answer'])
-        self.assertEqual(sorted_choices_data, TestAnswerSerializer(
-            expected_choices, many=True).data)
-
-    def test_meta_fields(self):
-        expected_fields = ('pk', 'question', 'choices',)
-        self.assertEqual(self.serializer.Meta.model, TestQuestion)
-        self.assertEqual(self.serializer.Meta.fields, expected_fields)
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from education.grading import grade_attempt
+from education.models import (Material, TestAnswer, TestQuestion, Test,
+                              TestAttempt, TestStats, TestQuestionStats)
+from education.stats import reconcile_test_stats, reconcile_question_stats
+from education.tasks import reconcile_stats
+
+
+class StatsTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password123',
+            first_name='Test', last_name='User')
+        material = Material.objects.create(name='Test_Material')
+        self.answer1 = TestAnswer.objects.create(answer='Answer_1')
+        self.answer2 = TestAnswer.objects.create(answer='Answer_2')
+        self.answer3 = TestAnswer.objects.create(answer='Answer_3')
+        self.question1 = TestQuestion.objects.create(
+            question='Question_1', answer=self.answer1)
+        self.question2 = TestQuestion.objects.create(
+            question='Question_2', answer=self.answer2)
+        self.question3 = TestQuestion.objects.create(
+            question='Question_3', answer=self.answer3)
+        for question in self.question1, self.question2, self.question3:
+            question.choices.add(self.answer1, self.answer2, self.answer3)
+        self.test = Test.objects.create(material=material)
+        self.test.question.add(self.question1, self.question2,
+                               self.question3)
+
+    def grade(self, answers):
+        return grade_attempt(self.test, self.user, {
+            str(question.pk): answer.pk
+            for question, answer in answers.items()})
+
+    def get_question_stats(self):
+        return {stats.question_id: (stats.answers_count, stats.correct_count,
+                                    stats.skipped_count)
+                for stats in TestQuestionStats.objects.all()}
+
+    def test_record_attempt(self):
+        self.grade({self.question1: self.answer1,
+                    self.question2: self.answer1})
+        self.grade({self.question1: self.answer1,
+                    self.question3: self.answer3})
+        stats = TestStats.objects.get()
+        self.assertEqual((stats.attempts_count, stats.score_sum,
+                          stats.max_score_sum), (2, 3, 6))
+        self.assertEqual(stats.average_score, 1.5)
+        self.assertEqual(stats.correct_rate, 0.5)
+        self.assertEqual(self.get_question_stats(), {
+            self.question1.pk: (2, 2, 0),
+            self.question2.pk: (2, 0, 1),
+            self.question3.pk: (2, 1, 1),
+        })
+        self.assertEqual(self.question1.stats.correct_rate, 1)
+
+    def test_record_attempt_locks_questions_in_order(self):
+        with CaptureQueriesContext(connection) as context:
+            self.grade({self.question1: self.answer1,
+                        self.question2: self.answer1})
+        queries = [query['sql'] for query in context.captured_queries
+                   if 'education_testquestionstats' in query['sql']]
+        # Вставка строк, блокировка по возрастанию pk и один UPDATE
+        self.assertEqual(len(queries), 3)
+        self.assertRegex(queries[1], r'ORDER BY .+ ASC FOR UPDATE$')
+        self.assertTrue(queries[2].startswith('UPDATE'))
+
+    def test_reconcile(self):
+        self.grade({self.question1: self.answer1})
+        attempt, _ = self.grade({self.question2: self.answer2})
+        # Попытка удалена без обновления статистики
+        TestAttempt.objects.filter(pk=attempt.pk).delete()
+        TestQuestionStats.objects.filter(question=self.question3).delete()
+        reconcile_test_stats(batch_size=1)
+        reconcile_question_stats(batch_size=2)
+        stats = TestStats.objects.get()
+        self.assertEqual((stats.attempts_count, stats.score_sum,
+                          stats.max_score_sum), (1, 1, 3))
+        self.assertEqual(self.get_question_stats(), {
+            self.question1.pk: (1, 1, 0),
+            self.question2.pk: (1, 0, 1),
+            self.question3.pk: (1, 0, 1),
+        })
+
+    def test_reconcile_without_attempts(self):
+        self.grade({self.question1: self.answer1})
+        TestAttempt.objects.all().delete()
+        reconcile_stats()
+        stats = TestStats.objects.get()
+        self.assertEqual((stats.attempts_count, stats.score_sum), (0, 0))
+        self.assertIsNone(stats.average_score)
+        self.assertEqual(set(self.get_question_stats().values()), {(0, 0, 0)})
+        # Строки для тестов без попыток не создаются
+        Test.objects.create()
+        reconcile_stats()
+        self.assertEqual(TestStats.objects.count(), 1)
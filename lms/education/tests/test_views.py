@@ -1,16 +1,125 @@
 from collections import OrderedDict
 
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from drf_spectacular.drainage import GENERATOR_STATS
+from drf_spectacular.generators import SchemaGenerator
 from rest_framework import status, test
 
-from education.models import Test, Material, TestQuestion, TestAnswer
-from education.serializers import TestQuestionSerializer
+from education import autocomplete
+from education.admin import set_archived_status
+from education.cache import get_generations
+from education.models import (Media, Section, Material, TestAnswer,
+                              TestQuestion, Test, TestAttempt,
+                              TestAttemptAnswer, search_query)
+from education.snapshots import get_question_pool
+from education.utils import sign_attempt
+from jobs.actions import create_job
+from jobs.tasks import run_admin_job
+
+
+def create_catalog(sections_count, materials_per_section=2):
+    """Наполняет БД разделами и материалами с медиа"""
+    media = Media.objects.create(name='Test_Media',
+                                 external_image='https://example.com/1.jpg')
+    for section_num in range(sections_count):
+        section = Section.objects.create(name=f'Section_{section_num}',
+                                         status='OPEN')
+        section.media.add(media)
+        for material_num in range(materials_per_section):
+            material = Material.objects.create(
+                name=f'Material_{section_num}_{material_num}',
+                section=section, status='OPEN')
+            material.media.add(media)
+
+
+class CatalogQueriesTest(TestCase):
+    """Кол-во запросов к БД не должно зависеть от кол-ва объектов"""
+
+    def setUp(self):
+        self.client = test.APIClient()
+        cache.clear()
+
+    def assert_queries_constant(self, url, num):
+        create_catalog(1)
+        with self.assertNumQueries(num):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_catalog(9)
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_sections_list(self):
+        # Разделы с кол-вом материалов, медиа
+        self.assert_queries_constant(
+            reverse('education:sections_list'), 2)
+
+    def test_materials_list(self):
+        # Материалы с разделами, медиа
+        self.assert_queries_constant(
+            reverse('education:materials_list'), 2)
+
+    def test_section_detail(self):
+        create_catalog(1, materials_per_section=10)
+        section = Section.objects.first()
+        # Проверка условного GET, раздел, медиа, названия материалов
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                reverse('education:section_detail',
+                        kwargs={'pk': section.pk}))
+        self.assertEqual(len(response.data['materials']), 10)
+
+    def test_material_detail(self):
+        create_catalog(1)
+        material = Material.objects.first()
+        # Проверка условного GET, материал с разделом, медиа
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse('education:material_detail',
+                        kwargs={'pk': material.pk}))
+        self.assertEqual(response.data['section'], 'Section_0')
+        self.assertEqual(len(response.data['media_links']), 1)
+
+    def test_material_without_section(self):
+        # Импорт может создать материал без раздела
+        create_catalog(1)
+        material = Material.objects.create(name='Imported_Material')
+        response = self.client.get(reverse('education:materials_list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn({'name': 'Imported_Material', 'section': None},
+                      [{'name': result['name'], 'section': result['section']}
+                       for result in response.data['results']])
+        response = self.client.get(reverse('education:material_detail',
+                                           kwargs={'pk': material.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['section'])
+
+    def test_sections_list_materials_count(self):
+        create_catalog(2, materials_per_section=3)
+        response = self.client.get(reverse('education:sections_list'))
+        self.assertEqual(
+            [section['materials_count']
+             for section in response.data['results']], [3, 3])
+
+
+class CatalogSchemaTest(TestCase):
+    def test_sections_list(self):
+        with GENERATOR_STATS.silence():
+            schema = SchemaGenerator().get_schema(public=True)
+        properties = schema['components']['schemas']['SectionList'][
+            'properties']
+        self.assertEqual(properties['materials_count']['type'], 'integer')
 
 
 class StartTestAPIViewTest(TestCase):
     def setUp(self):
         self.client = test.APIClient()
+        cache.clear()
         self.material = Material.objects.create(name='Test_Material')
         self.answer1 = TestAnswer.objects.create(answer='Answer_1')
         self.answer2 = TestAnswer.objects.create(answer='Answer_2')
@@ -41,14 +150,13 @@ class StartTestAPIViewTest(TestCase):
                       kwargs={'pk': self.material.pk})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        serializer = TestQuestionSerializer(
-            [self.question1, self.question2], many=True)
-        sorted_serializer_data = [
+        sorted_expected_data = [
             OrderedDict([
-                ('question', d['question']),
-                ('choices', sorted(d['choices'], key=lambda c: c['pk']))
+                ('question', question.question),
+                ('choices', [{'pk': choice.pk, 'answer': choice.answer}
+                             for choice in question.choices.order_by('pk')])
             ])
-            for d in serializer.data
+            for question in (self.question1, self.question2)
         ]
         sorted_response_data = [
             OrderedDict([
@@ -57,10 +165,720 @@ class StartTestAPIViewTest(TestCase):
             ])
             for d in response.data
         ]
-        self.assertEqual(sorted_response_data, sorted_serializer_data)
+        self.assertEqual(sorted_response_data, sorted_expected_data)
 
     def test_start_test_get_nonexistent_test(self):
         url = reverse('education:material_test', kwargs={'pk': 999})
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_start_test_queries(self):
+        for question_num in range(50):
+            answer = TestAnswer.objects.create(answer=f'Answer_{question_num}')
+            question = TestQuestion.objects.create(
+                question=f'Extra_Question_{question_num}', answer=answer)
+            question.choices.add(answer, self.answer1, self.answer2)
+            self.test.question.add(question)
+        url = reverse('education:material_test',
+                      kwargs={'pk': self.material.pk})
+        # Тест, вопросы, варианты ответа, медиа, сохранение снимка
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 52)
+        # Снимок из кеша
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        # Снимок из БД
+        cache.clear()
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 52)
+
+    def test_start_test_seed(self):
+        url = reverse('education:material_test',
+                      kwargs={'pk': self.material.pk})
+        response = self.client.get(url)
+        seed = response.headers['X-Test-Seed']
+        for _ in range(3):
+            repeated_response = self.client.get(url, {'seed': seed})
+            self.assertEqual(repeated_response.data, response.data)
+            self.assertEqual(repeated_response.headers['X-Test-Seed'], seed)
+
+    def test_start_test_snapshot_rebuild(self):
+        url = reverse('education:material_test',
+                      kwargs={'pk': self.material.pk})
+        self.client.get(url)
+        self.test.refresh_from_db()
+        self.assertEqual(self.test.snapshot_version, self.test.last_update)
+        self.assertEqual(self.test.answer_key,
+                         {str(self.question1.pk): self.answer1.pk,
+                          str(self.question2.pk): self.answer3.pk})
+        # Ключ ответов не попадает в выдачу
+        response = self.client.get(url)
+        self.assertNotIn('answer', response.data[0])
+
+        self.answer2.answer = 'Changed_Answer'
+        self.answer2.save()
+        response = self.client.get(url)
+        self.assertIn('Changed_Answer', [
+            choice['answer'] for choice in response.data[0]['choices']])
+
+        self.question2.choices.remove(self.answer2)
+        response = self.client.get(url)
+        self.assertEqual(len(response.data[1]['choices']), 1)
+
+        self.test.question.remove(self.question1)
+        response = self.client.get(url)
+        self.assertEqual([question['pk'] for question in response.data],
+                         [self.question2.pk])
+
+    def test_start_test_invalid_seed(self):
+        url = reverse('education:material_test',
+                      kwargs={'pk': self.material.pk})
+        for seed in 'seed', -5, 2 ** 31, 99999999999999999999999:
+            with self.subTest(seed):
+                response = self.client.get(url, {'seed': seed})
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+                self.assertIn('seed', response.data)
+
+
+class SubmitTestAPIViewTest(TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password123',
+            first_name='Test', last_name='User')
+        self.client.force_authenticate(self.user)
+        self.material = Material.objects.create(name='Test_Material')
+        self.answer1 = TestAnswer.objects.create(answer='Answer_1')
+        self.answer2 = TestAnswer.objects.create(answer='Answer_2')
+        self.answer3 = TestAnswer.objects.create(answer='Answer_3')
+        self.question1 = TestQuestion.objects.create(
+            question='Question_1', answer=self.answer1)
+        self.question2 = TestQuestion.objects.create(
+            question='Question_2', answer=self.answer3)
+        self.question1.choices.add(self.answer1, self.answer2)
+        self.question2.choices.add(self.answer2, self.answer3)
+        self.test = Test.objects.create(material=self.material)
+        self.test.question.add(self.question1, self.question2)
+        self.url = reverse('education:material_test_submit',
+                           kwargs={'pk': self.material.pk})
+
+    def submit(self, answers, **data):
+        return self.client.post(self.url, {'answers': answers, **data},
+                                format='json')
+
+    def test_grading(self):
+        response = self.submit({str(self.question1.pk): self.answer1.pk,
+                                str(self.question2.pk): self.answer2.pk},
+                               seed=42)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['score'], 1)
+        self.assertEqual(response.data['max_score'], 2)
+        self.assertEqual(response.data['results'],
+                         {str(self.question1.pk): True,
+                          str(self.question2.pk): False})
+        attempt = TestAttempt.objects.get(pk=response.data['pk'])
+        self.assertEqual((attempt.user, attempt.test, attempt.seed),
+                         (self.user, self.test, 42))
+        self.assertEqual(
+            set(attempt.answers.values_list('question', 'choice',
+                                            'is_correct')),
+            {(self.question1.pk, self.answer1.pk, True),
+             (self.question2.pk, self.answer2.pk, False)})
+
+    def test_skipped_question(self):
+        response = self.submit({str(self.question2.pk): self.answer3.pk})
+        self.assertEqual(response.data['score'], 1)
+        self.assertTrue(TestAttemptAnswer.objects.filter(
+            question=self.question1, choice=None, is_correct=False).exists())
+
+    def test_invalid_answers(self):
+        response = self.submit({str(self.question1.pk): self.answer3.pk,
+                                '999': self.answer1.pk})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data['answers']),
+                         {str(self.question1.pk), '999'})
+        self.assertFalse(TestAttempt.objects.exists())
+
+    def test_seed_out_of_range(self):
+        for seed in -5, 2 ** 31, 99999999999999999999999:
+            with self.subTest(seed):
+                response = self.submit(
+                    {str(self.question1.pk): self.answer1.pk}, seed=seed)
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+                self.assertIn('seed', response.data)
+        self.assertFalse(TestAttempt.objects.exists())
+
+    def test_anonymous(self):
+        self.client.force_authenticate(None)
+        response = self.submit({str(self.question1.pk): self.answer1.pk})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_nonexistent_test(self):
+        url = reverse('education:material_test_submit', kwargs={'pk': 999})
+        response = self.client.post(url, {'answers': {'1': 1}},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_queries(self):
+        answers = {str(self.question1.pk): self.answer1.pk}
+        self.client.get(reverse('education:material_test',
+                                kwargs={'pk': self.material.pk}))
+        cache.clear()
+        self.submit(answers)
+        # Снимок и ключ ответов из кеша: тест, savepoint, попытка,
+        # ответы одним bulk_create, строки статистики теста и вопросов,
+        # счетчики теста, блокировка и счетчики вопросов, release savepoint
+        with self.assertNumQueries(10):
+            self.submit(answers)
+
+    def test_answer_key_follows_test_version(self):
+        self.submit({str(self.question1.pk): self.answer1.pk})
+        self.question1.answer = self.answer2
+        self.question1.save()
+        self.question1.choices.add(self.answer2)
+        response = self.submit({str(self.question1.pk): self.answer2.pk})
+        self.assertEqual(response.data['results'][str(self.question1.pk)],
+                         True)
+
+
+class QuestionPoolTest(TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password123',
+            first_name='Test', last_name='User')
+        self.client.force_authenticate(self.user)
+        self.material = Material.objects.create(name='Test_Material')
+        self.test = Test.objects.create(material=self.material, pool_size=3)
+        self.questions = []
+        for num in range(10):
+            answer = TestAnswer.objects.create(answer=f'Answer_{num}')
+            question = TestQuestion.objects.create(
+                question=f'Question_{num}', answer=answer)
+            question.choices.add(answer)
+            self.questions.append(question)
+        self.test.question.add(*self.questions)
+        self.url = reverse('education:material_test',
+                           kwargs={'pk': self.material.pk})
+        self.submit_url = reverse('education:material_test_submit',
+                                  kwargs={'pk': self.material.pk})
+
+    def start(self, **params):
+        response = self.client.get(self.url, params)
+        return ([question['pk'] for question in response.data],
+                response.headers['X-Test-Attempt'])
+
+    def submit(self, answers, **data):
+        return self.client.post(self.submit_url, {'answers': answers, **data},
+                                format='json')
+
+    def test_sample(self):
+        selected, token = self.start()
+        self.assertEqual(len(selected), 3)
+        self.assertLessEqual(set(selected),
+                             {question.pk for question in self.questions})
+        # По токену выдаются те же вопросы в том же порядке
+        cache.clear()
+        self.assertEqual(self.start(attempt=token), (selected, token))
+
+    def test_seed_does_not_select_questions(self):
+        # Выборку задает сервер, поэтому перебор seed ее не выбирает
+        selections = {tuple(self.start(seed=1)[0]) for _ in range(10)}
+        self.assertGreater(len(selections), 1)
+
+    def test_no_random_ordering(self):
+        self.test.refresh_from_db()
+        get_question_pool(self.test)
+        with CaptureQueriesContext(connection) as context:
+            self.start()
+        # Тест и вопросы выборки с вариантами и медиа, без
+        # ORDER BY RANDOM() по всем вопросам
+        self.assertEqual(len(context.captured_queries), 4)
+        self.assertFalse(any('RANDOM' in query['sql'].upper()
+                             for query in context.captured_queries))
+
+    def test_pool_larger_than_test(self):
+        Test.objects.filter(pk=self.test.pk).update(pool_size=20)
+        self.assertEqual(sorted(self.start()[0]),
+                         sorted(question.pk for question in self.questions))
+
+    def test_submit(self):
+        selected, token = self.start()
+        question = TestQuestion.objects.get(pk=selected[0])
+        response = self.submit({str(question.pk): question.answer_id},
+                               attempt=token)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['score'], response.data['max_score'],
+                          response.data['questions']), (1, 3, selected))
+        attempt = TestAttempt.objects.get()
+        self.assertEqual(attempt.questions, selected)
+        self.assertEqual(set(attempt.answers.values_list(
+            'question', flat=True)), set(selected))
+
+    def test_submit_after_test_change(self):
+        selected, token = self.start()
+        # Изменение теста после выдачи не меняет вопросы попытки
+        answer = TestAnswer.objects.create(answer='New_Answer')
+        self.test.question.add(TestQuestion.objects.create(
+            question='New_Question', answer=answer))
+        self.test.question.remove(selected[1])
+        answers = {str(pk): TestQuestion.objects.get(pk=pk).answer_id
+                   for pk in selected}
+        response = self.submit(answers, attempt=token)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['questions'], selected)
+        # Удаленный из теста вопрос не оценивается
+        self.assertEqual((response.data['score'],
+                          response.data['max_score']), (2, 2))
+
+    def test_submit_not_selected_question(self):
+        selected, token = self.start()
+        question = next(question for question in self.questions
+                        if question.pk not in selected)
+        response = self.submit({str(question.pk): question.answer_id},
+                               attempt=token)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data['answers']), [str(question.pk)])
+
+    def test_submit_without_token(self):
+        question = self.questions[0]
+        response = self.submit({str(question.pk): question.answer_id},
+                               seed=7)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('attempt', response.data)
+
+    def test_invalid_token(self):
+        selected, token = self.start()
+        other_material = Material.objects.create(name='Other_Material')
+        other_token = sign_attempt(
+            Test.objects.create(material=other_material, pool_size=3), 1,
+            [question.pk for question in self.questions])
+        question = TestQuestion.objects.get(pk=selected[0])
+        for invalid in token[:-1], other_token:
+            with self.subTest(invalid):
+                response = self.submit(
+                    {str(question.pk): question.answer_id}, attempt=invalid)
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+                self.assertIn('attempt', response.data)
+                response = self.client.get(self.url, {'attempt': invalid})
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(TestAttempt.objects.exists())
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        # Повторяющиеся названия проверяют стабильность ключа (name, pk)
+        for num in range(7):
+            Section.objects.create(name=f'Section_{num % 3}')
+        self.expected_pks = list(Section.objects.order_by(
+            'name', 'pk').values_list('pk', flat=True))
+
+    def test_walk_forward_and_back(self):
+        url = reverse('education:sections_list') + '?page_size=3'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            pages.append([s['pk'] for s in response.data['results']])
+            url = response.data['next']
+        self.assertEqual(sum(pages, []), self.expected_pks)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+        url = response.data['previous']
+        response = self.client.get(url)
+        self.assertEqual([s['pk'] for s in response.data['results']],
+                         self.expected_pks[3:6])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([s['pk'] for s in response.data['results']],
+                         self.expected_pks[:3])
+        self.assertIsNone(response.data['previous'])
+
+    def test_page_size_cap(self):
+        for num in range(110):
+            Section.objects.create(name=f'Extra_{num}')
+        response = self.client.get(
+            reverse('education:sections_list') + '?page_size=1000')
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            reverse('education:sections_list') + '?cursor=invalid')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_materials_count(self):
+        section = Section.objects.get(pk=self.expected_pks[0])
+        Material.objects.create(name='Material_1', section=section)
+        Material.objects.create(name='Material_2', section=section)
+        counts = dict(Section.objects.for_list().values_list(
+            'pk', 'materials_count'))
+        self.assertEqual(counts[section.pk], 2)
+        self.assertEqual(counts[self.expected_pks[1]], 0)
+
+    def test_list_uses_name_index(self):
+        # Страница выбирается по индексу (name, id), материалы считаются
+        # только для ее разделов, без агрегации всей таблицы
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = Section.objects.for_list()[:20].explain()
+        self.assertIn('Index Scan using education_section_name_id_idx', plan)
+        self.assertNotIn('Aggregate', plan.split('SubPlan')[0])
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        cache.clear()
+        create_catalog(2)
+        self.section = Section.objects.first()
+        self.sections_url = reverse('education:sections_list')
+        self.section_url = reverse('education:section_detail',
+                                   kwargs={'pk': self.section.pk})
+
+    def test_cached_response(self):
+        response = self.client.get(self.sections_url)
+        # Ответ из кеша без запросов к БД
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(self.sections_url)
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.data, response.data)
+
+    def test_not_found_not_cached(self):
+        url = reverse('education:section_detail', kwargs={'pk': 999})
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalidate_on_save(self):
+        self.client.get(self.section_url)
+        self.section.name = 'Renamed_Section'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.save()
+        response = self.client.get(self.section_url)
+        self.assertEqual(response.data['name'], 'Renamed_Section')
+
+    def test_invalidate_on_related_save(self):
+        self.client.get(self.section_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Material.objects.create(name='New_Material',
+                                    section=self.section)
+        response = self.client.get(self.section_url)
+        self.assertIn('New_Material', response.data['materials'])
+
+    def test_invalidate_on_media_change(self):
+        self.client.get(self.section_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.media.clear()
+        response = self.client.get(self.section_url)
+        self.assertEqual(response.data['media_links'], [])
+
+    def test_invalidate_on_admin_action(self):
+        self.client.get(self.section_url)
+        job = create_job(set_archived_status, Section.objects.filter(
+            pk=self.section.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            run_admin_job(job.pk)
+        response = self.client.get(self.section_url)
+        self.assertEqual(response.data['status'], 'ARCHIVED')
+
+
+class CatalogCacheCommitTest(TransactionTestCase):
+    """Поколения меняются только после фиксации транзакции"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_after_commit(self):
+        generation = get_generations(Section)
+        with transaction.atomic():
+            Section.objects.create(name='New_Section')
+            # Запрос до фиксации видит старые строки и не должен
+            # закешировать их под новым поколением
+            self.assertEqual(get_generations(Section), generation)
+        self.assertNotEqual(get_generations(Section), generation)
+
+    def test_no_bump_on_rollback(self):
+        generation = get_generations(Section)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Section.objects.create(name='New_Section')
+            raise RuntimeError
+        self.assertEqual(get_generations(Section), generation)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        cache.clear()
+        # Время изменения для Last-Modified запоминается после фиксации
+        with self.captureOnCommitCallbacks(execute=True):
+            create_catalog(2)
+        self.material = Material.objects.first()
+        self.materials_url = reverse('education:materials_list')
+        self.material_url = reverse('education:material_detail',
+                                    kwargs={'pk': self.material.pk})
+
+    def test_etag_not_modified(self):
+        # Список проверяется по поколениям в кеше, объект - одним запросом
+        for url, queries in (self.materials_url, 0), (self.material_url, 1):
+            response = self.client.get(url)
+            self.assertIn('ETag', response.headers)
+            self.assertIn('Last-Modified', response.headers)
+            # Только проверка условного GET, без сериализации
+            with self.assertNumQueries(queries):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response.headers['ETag'])
+            self.assertEqual(response.status_code,
+                             status.HTTP_304_NOT_MODIFIED)
+
+    def test_last_modified_not_modified(self):
+        response = self.client.get(self.material_url)
+        response = self.client.get(
+            self.material_url,
+            HTTP_IF_MODIFIED_SINCE=response.headers['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_on_update(self):
+        etag = self.client.get(self.material_url).headers['ETag']
+        self.material.status = 'ARCHIVED'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.save()
+        response = self.client.get(self.material_url,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'ARCHIVED')
+
+    def test_list_etag_changes_on_update(self):
+        etag = self.client.get(self.materials_url).headers['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Material.objects.create(name='New_Material',
+                                    section=self.material.section)
+        response = self.client.get(self.materials_url,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_etag_depends_on_page(self):
+        first = self.client.get(self.materials_url + '?page_size=1')
+        response = self.client.get(
+            self.materials_url, HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_not_found(self):
+        url = reverse('education:material_detail', kwargs={'pk': 999})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SparseFieldsetTest(TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        cache.clear()
+        create_catalog(2)
+        Material.objects.update(text='Lorem ipsum ' * 1000)
+
+    def test_fields_param(self):
+        response = self.client.get(reverse('education:materials_list'),
+                                   {'fields': 'pk,name'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for material in response.data['results']:
+            self.assertEqual(set(material), {'pk', 'name'})
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('education:materials_list'),
+                                   {'fields': 'pk,text'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_large_columns_deferred(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('education:materials_list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        materials_query = next(
+            query['sql'] for query in context.captured_queries
+            if 'FROM "education_material"' in query['sql'])
+        self.assertNotIn('"education_material"."text"', materials_query)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('education:sections_list'))
+        self.assertFalse(any(
+            '"education_section"."description"' in query['sql']
+            for query in context.captured_queries))
+
+    def test_unused_relations_skipped(self):
+        # Материалы без JOIN и предзагрузки медиа
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('education:materials_list'),
+                                       {'fields': 'pk,name,status'})
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertNotIn('JOIN', context.captured_queries[-1]['sql'])
+        self.assertEqual(len(response.data['results']), 4)
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        cache.clear()
+        self.section = Section.objects.create(
+            name='Основы программирования',
+            description='Введение в алгоритмы и структуры данных')
+        self.in_name = Material.objects.create(
+            name='Алгоритмы сортировки', section=self.section,
+            text='Разбираем сортировку слиянием')
+        self.in_text = Material.objects.create(
+            name='Повторение', section=self.section,
+            text='Ещё раз об алгоритмах поиска')
+        Material.objects.create(name='История', section=self.section,
+                                text='Хронология событий')
+
+    def test_search_vector_maintained(self):
+        self.assertEqual(
+            Material.objects.filter(search_vector__isnull=True).count(), 0)
+        # Обновление через update() тоже пересчитывает вектор
+        Material.objects.filter(pk=self.in_name.pk).update(
+            name='Деревья', text='Обход дерева')
+        response = self.client.get(reverse('education:materials_search'),
+                                   {'q': 'сортировка'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_materials_ranked(self):
+        response = self.client.get(reverse('education:materials_search'),
+                                   {'q': 'алгоритмы'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        # Совпадение в названии весит больше, чем в тексте
+        self.assertEqual([m['pk'] for m in results],
+                         [self.in_name.pk, self.in_text.pk])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+        self.assertIn('<b>алгоритмах</b>', results[1]['headline'])
+        self.assertEqual(results[0]['section'], self.section.name)
+
+    def test_material_without_section(self):
+        Material.objects.create(name='Алгоритмы на графах')
+        response = self.client.get(reverse('education:materials_search'),
+                                   {'q': 'графы'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([m['section'] for m in response.data['results']],
+                         [None])
+
+    def test_sections(self):
+        response = self.client.get(reverse('education:sections_search'),
+                                   {'q': 'структура данных'})
+        self.assertEqual([s['pk'] for s in response.data['results']],
+                         [self.section.pk])
+
+    def test_keyset_pages(self):
+        for num in range(5):
+            Material.objects.create(name=f'Алгоритм {num}',
+                                    section=self.section)
+        response = self.client.get(reverse('education:materials_search'),
+                                   {'q': 'алгоритм', 'page_size': 2})
+        pks = [m['pk'] for m in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pks += [m['pk'] for m in response.data['results']]
+        expected = list(Material.objects.search(search_query('алгоритм'))
+                        .order_by('-rank', 'pk').values_list('pk', flat=True))
+        self.assertEqual(pks, expected)
+        self.assertEqual(len(pks), 7)
+
+    def test_empty_query(self):
+        response = self.client.get(reverse('education:materials_search'),
+                                   {'q': ' '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_schema(self):
+        GENERATOR_STATS.reset()
+        with GENERATOR_STATS.silence():
+            schema = SchemaGenerator().get_schema(public=True)
+        self.assertFalse([message for message in (
+            *GENERATOR_STATS._warn_cache, *GENERATOR_STATS._error_cache)
+            if 'SearchAPIView' in message])
+        operation = schema['paths'][reverse('education:materials_search')]
+        self.assertIn('q', [parameter['name'] for parameter
+                            in operation['get']['parameters']])
+        properties = schema['components']['schemas']['MaterialSearch'][
+            'properties']
+        self.assertEqual(properties['rank']['type'], 'number')
+        self.assertTrue(properties['section']['nullable'])
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        cache.clear()
+        autocomplete.reset_index()
+        self.section = Section.objects.create(name='Алгоритмы и данные')
+        self.material = Material.objects.create(
+            name='Сортировка слиянием', section=self.section)
+        self.inner = Material.objects.create(
+            name='Быстрая сортировка', section=self.section)
+        self.url = reverse('education:autocomplete')
+
+    def test_prefix(self):
+        response = self.client.get(self.url, {'q': 'сорт'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Совпадение с начала названия идет первым
+        self.assertEqual([(m['type'], m['pk']) for m in response.data],
+                         [('material', self.material.pk),
+                          ('material', self.inner.pk)])
+
+    def test_type_and_limit(self):
+        response = self.client.get(self.url, {'q': 'а', 'type': 'section'})
+        self.assertEqual(response.data, [
+            {'type': 'section', 'pk': self.section.pk,
+             'name': 'Алгоритмы и данные'}])
+        response = self.client.get(self.url, {'q': 'сорт', 'limit': 1})
+        self.assertEqual(len(response.data), 1)
+        response = self.client.get(self.url, {'q': 'сорт', 'type': 'test'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_served_from_memory(self):
+        self.client.get(self.url, {'q': 'алг'})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'q': 'быстр'})
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual(response.data[0]['pk'], self.inner.pk)
+
+    def test_rebuild_on_change(self):
+        self.client.get(self.url, {'q': 'алг'})
+        with self.captureOnCommitCallbacks(execute=True):
+            Material.objects.create(name='Алгебра', section=self.section)
+        autocomplete._checked_at = 0
+        response = self.client.get(self.url, {'q': 'алг'})
+        self.assertEqual([m['name'] for m in response.data],
+                         ['Алгебра', 'Алгоритмы и данные'])
+
+    def test_schema(self):
+        GENERATOR_STATS.reset()
+        with GENERATOR_STATS.silence():
+            schema = SchemaGenerator().get_schema(public=True)
+        self.assertFalse([message for message in (
+            *GENERATOR_STATS._warn_cache, *GENERATOR_STATS._error_cache)
+            if 'AutocompleteAPIView' in message])
+        operation = schema['paths'][self.url]['get']
+        self.assertEqual(
+            [parameter['name'] for parameter in operation['parameters']],
+            ['limit', 'q', 'type'])
+        items = operation['responses']['200']['content'][
+            'application/json']['schema']['items']
+        self.assertEqual(items['$ref'],
+                         '#/components/schemas/Autocomplete')
+        self.assertEqual(
+            list(schema['components']['schemas']['Autocomplete'][
+                'properties']), ['type', 'pk', 'name'])
+
+    def test_trigram_fallback(self):
+        # Опечатка не находится по префиксу, но находится по триграммам
+        response = self.client.get(self.url, {'q': 'сартировка'})
+        self.assertEqual({m['pk'] for m in response.data},
+                         {self.material.pk, self.inner.pk})
@@ -1,21 +1,31 @@
 from django.urls import path
 
 from education.apps import EducationConfig
-from education.views import (SectionsListAPIView, SectionsRetrieveAPIView,
+from education.views import (AutocompleteAPIView, SectionsListAPIView,
+                             SectionsRetrieveAPIView, SectionsSearchAPIView,
                              MaterialsListAPIView, MaterialsRetrieveAPIView,
-                             StartTest)
+                             MaterialsSearchAPIView, StartTest,
+                             SubmitTest)
 
 app_name = EducationConfig.name
 
 urlpatterns = [
+    path('autocomplete/', AutocompleteAPIView.as_view(),
+         name='autocomplete'),
     path('sections/', SectionsListAPIView.as_view(),
          name='sections_list'),
+    path('sections/search/', SectionsSearchAPIView.as_view(),
+         name='sections_search'),
     path('sections/<int:pk>/', SectionsRetrieveAPIView.as_view(),
          name='section_detail'),
     path('materials/', MaterialsListAPIView.as_view(),
          name='materials_list'),
+    path('materials/search/', MaterialsSearchAPIView.as_view(),
+         name='materials_search'),
     path('materials/<int:pk>/', MaterialsRetrieveAPIView.as_view(),
          name='material_detail'),
     path('materials/<int:pk>/test/', StartTest.as_view(),
          name='material_test'),
+    path('materials/<int:pk>/test/submit/', SubmitTest.as_view(),
+         name='material_test_submit'),
 ]
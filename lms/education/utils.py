@@ -0,0 +1,45 @@
+import random
+import secrets
+
+from django.core import signing
+
+# Seed попытки лежит в [0, SEED_MAX), как его выдает new_seed
+SEED_MAX = 2 ** 31
+ATTEMPT_SALT = 'education.attempt'
+# Срок действия токена попытки, выданного StartTest
+ATTEMPT_MAX_AGE = 60 * 60 * 24
+
+
+def new_seed():
+    """Случайный seed для новой попытки прохождения теста"""
+    return secrets.randbelow(SEED_MAX)
+
+
+def get_random(seed, *salt):
+    """
+    Генератор случайных чисел для попытки
+
+    Один и тот же seed дает один и тот же порядок, поэтому попытку можно
+    воспроизвести при проверке ответов. Без seed порядок случайный
+    """
+    if seed is None:
+        return random.Random()
+    return random.Random(':'.join(str(part) for part in (seed, *salt)))
+
+
+def sign_attempt(test, seed, questions):
+    """
+    Подписанный токен попытки: тест, seed и pk выбранных вопросов
+
+    Клиент возвращает токен при повторной выдаче и при отправке ответов,
+    поэтому выборка вопросов задается сервером и не пересчитывается
+    после изменения теста
+    """
+    return signing.dumps({'test': test.pk, 'seed': seed,
+                          'questions': questions},
+                         salt=ATTEMPT_SALT, compress=True)
+
+
+def load_attempt(token):
+    """Данные токена попытки, BadSignature для чужого или устаревшего"""
+    return signing.loads(token, salt=ATTEMPT_SALT, max_age=ATTEMPT_MAX_AGE)
@@ -1,42 +1,202 @@
+from functools import partial
+
 from django.http import Http404
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import generics
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from education.models import Section, Material, Test
+from education.autocomplete import AUTOCOMPLETE_MODELS, autocomplete
+from education.cache import CachedResponseMixin, ConditionalGetMixin
+from education.grading import grade_attempt
+from education.models import Media, Section, Material, Test, search_query
+from education.paginators import NameKeysetPagination, RankKeysetPagination
 from education.serializers import (SectionListSerializer,
                                    SectionRetrieveSerializer,
+                                   SectionSearchSerializer,
                                    MaterialListSerializer,
                                    MaterialRetrieveSerializer,
-                                   TestQuestionSerializer)
+                                   MaterialSearchSerializer,
+                                   AutocompleteSerializer,
+                                   StartTestSerializer,
+                                   TestSubmissionSerializer,
+                                   TestAttemptSerializer)
+from education.snapshots import get_attempt_snapshot, select_questions
+from education.utils import new_seed, get_random, sign_attempt
+from lms.fieldsets import SparseFieldsetMixin
 
 
-class SectionsListAPIView(generics.ListAPIView):
-    queryset = Section.objects.all()
+class SectionsListAPIView(ConditionalGetMixin, CachedResponseMixin,
+                          SparseFieldsetMixin, generics.ListAPIView):
+    cache_models = Section, Material, Media
+    queryset = Section.objects.for_list()
     serializer_class = SectionListSerializer
+    pagination_class = NameKeysetPagination
 
 
-class SectionsRetrieveAPIView(generics.RetrieveAPIView):
-    queryset = Section.objects.all()
+class SectionsRetrieveAPIView(ConditionalGetMixin, CachedResponseMixin,
+                              generics.RetrieveAPIView):
+    cache_models = Section, Material, Media
+    queryset = Section.objects.for_retrieve()
     serializer_class = SectionRetrieveSerializer
 
 
-class MaterialsListAPIView(generics.ListAPIView):
-    queryset = Material.objects.all()
+class MaterialsListAPIView(ConditionalGetMixin, CachedResponseMixin,
+                           SparseFieldsetMixin, generics.ListAPIView):
+    cache_models = Section, Material, Media
+    queryset = Material.objects.for_list()
     serializer_class = MaterialListSerializer
+    pagination_class = NameKeysetPagination
 
 
-class MaterialsRetrieveAPIView(generics.RetrieveAPIView):
-    queryset = Material.objects.all()
+class MaterialsRetrieveAPIView(ConditionalGetMixin, CachedResponseMixin,
+                               generics.RetrieveAPIView):
+    cache_models = Section, Material, Media
+    queryset = Material.objects.for_retrieve()
     serializer_class = MaterialRetrieveSerializer
 
 
+@extend_schema(parameters=[OpenApiParameter(
+    'q', str, required=True, description='Поисковый запрос')])
+class SearchAPIView(CachedResponseMixin, generics.ListAPIView):
+    """
+    Полнотекстовый поиск по ?q=, результаты по убыванию релевантности
+
+    Поддерживается синтаксис websearch: "точная фраза", or, -исключение
+    """
+    search_query_param = 'q'
+    pagination_class = RankKeysetPagination
+
+    def get_search_query(self):
+        text = self.request.query_params.get(self.search_query_param, '')
+        if not text.strip():
+            raise ValidationError(
+                {self.search_query_param: 'Укажите поисковый запрос'})
+        return search_query(text.strip())
+
+    def get_queryset(self):
+        # Генерация схемы вызывает get_queryset без поискового запроса
+        if getattr(self, 'swagger_fake_view', False):
+            return self.model.objects.none()
+        return self.model.objects.search(self.get_search_query())
+
+
+class SectionsSearchAPIView(SearchAPIView):
+    cache_models = Section,
+    model = Section
+    serializer_class = SectionSearchSerializer
+
+
+class MaterialsSearchAPIView(SearchAPIView):
+    cache_models = Section, Material
+    model = Material
+    serializer_class = MaterialSearchSerializer
+
+
+class AutocompleteAPIView(APIView):
+    """
+    Подсказки по началу названий разделов и материалов
+
+    ?q= - начало любого слова названия, ?type= - section или material,
+    ?limit= - количество подсказок
+    """
+    default_limit = 10
+    max_limit = 20
+
+    @extend_schema(parameters=[
+        OpenApiParameter('q', str, required=True,
+                         description='Начало слова названия'),
+        OpenApiParameter('type', str, enum=list(AUTOCOMPLETE_MODELS),
+                         description='Тип объектов'),
+        OpenApiParameter('limit', int, default=default_limit,
+                         description=f'Количество подсказок, '
+                                     f'не больше {max_limit}'),
+    ], responses=AutocompleteSerializer(many=True))
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'Укажите начало названия'})
+        kind = request.query_params.get('type')
+        if kind is not None and kind not in AUTOCOMPLETE_MODELS:
+            raise ValidationError(
+                {'type': f'Допустимые значения: '
+                         f'{", ".join(AUTOCOMPLETE_MODELS)}'})
+        try:
+            limit = int(request.query_params.get('limit',
+                                                 self.default_limit))
+        except ValueError:
+            raise ValidationError({'limit': 'Должно быть целым числом'})
+        limit = max(1, min(limit, self.max_limit))
+        return Response(autocomplete(text, limit, kind and {kind}))
+
+
 class StartTest(APIView):
+    """
+    Вопросы теста для новой попытки или повторно по токену попытки
+
+    Выбранные вопросы и seed порядка вариантов записываются в подписанный
+    токен в заголовке X-Test-Attempt, который передается при отправке
+    ответов
+    """
 
     def get(self, request, pk):
         try:
-            test = Test.objects.get(material__pk=pk)
+            # Снимок и ключ ответов не нужны, если снимок есть в кеше
+            test = Test.objects.defer('snapshot', 'answer_key').get(
+                material__pk=pk)
+        except Test.DoesNotExist:
+            raise Http404
+        params = StartTestSerializer(data=request.query_params,
+                                     context={'test': test})
+        params.is_valid(raise_exception=True)
+        attempt = params.validated_data.get('attempt')
+        if attempt is not None:
+            seed, question_pks = attempt['seed'], attempt['questions']
+            token = request.query_params['attempt']
+        else:
+            seed = params.validated_data.get('seed')
+            if seed is None:
+                seed = new_seed()
+            question_pks = select_questions(test)
+            token = sign_attempt(test, seed, question_pks)
+        questions = []
+        for question in get_attempt_snapshot(test, question_pks):
+            # Варианты в снимке отсортированы по pk и перемешиваются по seed
+            # попытки, вместо ORDER BY RANDOM() на каждый вопрос
+            choices = list(question['choices'])
+            get_random(seed, question['pk']).shuffle(choices)
+            questions.append({**question, 'choices': choices})
+        return Response(questions, headers={'X-Test-Seed': str(seed),
+                                            'X-Test-Attempt': token})
+
+
+class SubmitTest(APIView):
+    """
+    Проверка ответов попытки прохождения теста
+
+    Ответы проверяются на сервере по ключу ответов, попытка сохраняется
+    вместе с ответами пользователя
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = TestSubmissionSerializer
+
+    def post(self, request, pk):
+        try:
+            test = Test.objects.defer('snapshot', 'answer_key').get(
+                material__pk=pk)
         except Test.DoesNotExist:
             raise Http404
-        serializer = TestQuestionSerializer(test.question.all(), many=True)
-        return Response(serializer.data)
+        serializer = self.serializer_class(data=request.data, context={
+            'test': test,
+            'get_snapshot': partial(get_attempt_snapshot, test)})
+        serializer.is_valid(raise_exception=True)
+        attempt, answers = grade_attempt(
+            test, request.user, serializer.validated_data['answers'],
+            serializer.validated_data.get('seed'),
+            serializer.validated_data['questions'])
+        return Response(
+            TestAttemptSerializer(attempt, context={'answers': answers}).data,
+            status=status.HTTP_201_CREATED)
@@ -0,0 +1,62 @@
+from functools import wraps
+
+from django.contrib import admin, messages
+from django.db import transaction
+from django.urls import reverse
+from django.utils.html import format_html
+
+from jobs.models import AdminJob
+from jobs.tasks import run_admin_job
+
+
+def create_job(action, queryset, user=None, changelist_query=None):
+    """
+    Сохраняет выборку действия для фоновой обработки
+
+    С changelist_query действие выполняется над всеми объектами списка
+    админки с этой строкой запроса, queryset тогда не выполняется
+    """
+    job = AdminJob(action=f'{action.__module__}.{action.__name__}',
+                   description=action.short_description, user=user)
+    if changelist_query is None:
+        job.set_queryset(queryset)
+    else:
+        job.set_changelist(queryset.model, changelist_query)
+    job.save()
+    return job
+
+
+def background_action(description):
+    """
+    Действие админки, выполняемое задачей Celery
+
+    Декорируемая функция получает queryset одной пачки выбранных
+    объектов. Само действие только сохраняет выборку в AdminJob и ставит
+    задачу в очередь: pk объектов, выбранных на странице, или фильтры
+    списка при выборе всех объектов. Ход выполнения виден на странице
+    задачи:
+        @background_action(description='Открыть выбранные элементы')
+        def set_open_status(queryset):
+            queryset.update(status='OPEN')
+    """
+
+    def decorator(process_chunk):
+        @admin.action(description=description)
+        @wraps(process_chunk)
+        def action(modeladmin, request, queryset):
+            select_across = modeladmin.action_form.base_fields[
+                'select_across'].clean(request.POST.get('select_across'))
+            # Фильтры и поиск списка приходят в строке запроса
+            job = create_job(
+                action, queryset, request.user,
+                request.GET.urlencode() if select_across else None)
+            transaction.on_commit(lambda: run_admin_job.delay(job.pk))
+            modeladmin.message_user(request, format_html(
+                'Действие выполняется в фоне: <a href="{}">{}</a>',
+                reverse('admin:jobs_adminjob_change', args=(job.pk,)), job),
+                messages.INFO)
+
+        action.process_chunk = process_chunk
+        return action
+
+    return decorator
@@ -0,0 +1,40 @@
+from django.contrib import admin
+from django.utils.html import format_html
+
+from jobs.models import AdminJob
+
+
+@admin.register(AdminJob)
+class AdminJobAdmin(admin.ModelAdmin):
+    """Страница хода выполнения фоновых действий, только для просмотра"""
+    fields = (('description', 'content_type'),
+              ('status', 'progress_bar'),
+              ('total', 'processed'),
+              ('select_across', 'changelist_query'),
+              ('user', 'created_at', 'started_at', 'heartbeat_at',
+               'finished_at'),
+              'error',)
+    list_display = ('id', 'description', 'content_type', 'status',
+                    'progress_bar', 'user', 'created_at', 'finished_at',)
+    list_display_links = 'id', 'description',
+    list_select_related = 'content_type', 'user',
+    list_filter = 'status', 'created_at',
+    readonly_fields = 'progress_bar',
+
+    def progress_bar(self, obj):
+        return format_html(
+            '<progress value="{}" max="100"></progress> {} из {}',
+            obj.progress, obj.processed,
+            '?' if obj.total is None else obj.total)
+
+    progress_bar.short_description = 'Прогресс'
+
+    def get_queryset(self, request):
+        # Список pk выборки может быть большим и на странице не нужен
+        return super().get_queryset(request).defer('pks')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:58
+
+from django.conf import settings
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(help_text='Путь к действию админки, например education.admin.set_open_status', max_length=200, verbose_name='Действие')),
+                ('description', models.CharField(max_length=200, verbose_name='Описание')),
+                ('pks', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, help_text='По возрастанию, для объектов, выбранных на странице списка', size=None, verbose_name='pk выбранных объектов')),
+                ('select_across', models.BooleanField(default=False, verbose_name='Все объекты списка')),
+                ('changelist_query', models.TextField(blank=True, help_text='Строка запроса списка админки с фильтрами и поиском, для действия над всеми объектами списка', verbose_name='Фильтры списка')),
+                ('status', models.CharField(choices=[('PENDING', 'В очереди'), ('RUNNING', 'Выполняется'), ('DONE', 'Завершена'), ('FAILED', 'Ошибка')], default='PENDING', max_length=7, verbose_name='Статус')),
+                ('total', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Всего объектов')),
+                ('processed', models.PositiveBigIntegerField(default=0, verbose_name='Обработано')),
+                ('last_pk', models.BigIntegerField(blank=True, null=True, verbose_name='Последний pk')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата запуска')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя активность')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='Модель')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='admin_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'фоновое действие',
+                'verbose_name_plural': 'фоновые действия',
+                'db_table_comment': 'Модель фонового выполнения действий админки',
+                'ordering': ('-pk',),
+            },
+        ),
+    ]
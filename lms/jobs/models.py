@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+NULLABLE = {'blank': True, 'null': True}
+
+
+class AdminJob(models.Model):
+    """Модель фонового выполнения действия админки"""
+    action = models.CharField(
+        max_length=200, verbose_name='Действие',
+        help_text='Путь к действию админки, например '
+                  'education.admin.set_open_status')
+    description = models.CharField(max_length=200, verbose_name='Описание')
+    content_type = models.ForeignKey(
+        to=ContentType, on_delete=models.CASCADE, verbose_name='Модель')
+    pks = ArrayField(models.BigIntegerField(), default=list, blank=True,
+                     verbose_name='pk выбранных объектов',
+                     help_text='По возрастанию, для объектов, выбранных '
+                               'на странице списка')
+    select_across = models.BooleanField(
+        default=False, verbose_name='Все объекты списка')
+    changelist_query = models.TextField(
+        blank=True, verbose_name='Фильтры списка',
+        help_text='Строка запроса списка админки с фильтрами и поиском, '
+                  'для действия над всеми объектами списка')
+    user = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        verbose_name='Пользователь', related_name='admin_jobs', **NULLABLE)
+
+    status_choices = [
+        ('PENDING', 'В очереди'),
+        ('RUNNING', 'Выполняется'),
+        ('DONE', 'Завершена'),
+        ('FAILED', 'Ошибка'),
+    ]
+    status = models.CharField(max_length=7, choices=status_choices,
+                              default='PENDING', verbose_name='Статус')
+    total = models.PositiveBigIntegerField(verbose_name='Всего объектов',
+                                           **NULLABLE)
+    processed = models.PositiveBigIntegerField(default=0,
+                                               verbose_name='Обработано')
+    # Продолжение обработки после перезапуска задачи
+    last_pk = models.BigIntegerField(verbose_name='Последний pk', **NULLABLE)
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_at = models.DateTimeField(auto_now_add=True,
+                                      verbose_name='Дата создания')
+    started_at = models.DateTimeField(verbose_name='Дата запуска', **NULLABLE)
+    # Обновляется с каждой пачкой, по нему видно, что обработчик упал
+    heartbeat_at = models.DateTimeField(verbose_name='Последняя активность',
+                                        **NULLABLE)
+    finished_at = models.DateTimeField(verbose_name='Дата завершения',
+                                       **NULLABLE)
+
+    def __str__(self):
+        return f'{self.description} #{self.pk}'
+
+    class Meta:
+        verbose_name = 'фоновое действие'
+        verbose_name_plural = 'фоновые действия'
+        ordering = '-pk',
+        db_table_comment = 'Модель фонового выполнения действий админки'
+
+    def set_queryset(self, queryset):
+        """
+        Запоминает pk объектов, выбранных на странице списка
+
+        Выбранных объектов не больше страницы, сама выборка не сохраняется
+        """
+        self.content_type = ContentType.objects.get_for_model(queryset.model)
+        self.pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+        self.total = len(self.pks)
+
+    def set_changelist(self, model, query_string):
+        """
+        Запоминает фильтры и поиск списка для действия над всеми объектами
+
+        pk всех объектов списка не выбираются в запросе админки: их может
+        быть миллионы. Задача сама проходит по списку пачками по pk,
+        количество объектов тоже считается в задаче
+        """
+        self.content_type = ContentType.objects.get_for_model(model)
+        self.select_across = True
+        self.changelist_query = query_string
+
+    @property
+    def progress(self):
+        """Процент обработанных объектов"""
+        if self.status == 'DONE':
+            return 100
+        if not self.total:
+            return 0
+        return min(100, self.processed * 100 // self.total)
@@ -0,0 +1,123 @@
+import time
+from bisect import bisect_right
+from datetime import timedelta
+
+from celery import shared_task
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from jobs.models import AdminJob
+
+# Количество объектов, обрабатываемых в одной транзакции
+JOB_CHUNK_SIZE = 1_000
+# Время работы одного запуска задачи в секундах, после него задача
+# ставится в очередь заново, чтобы не упереться в CELERY_TASK_TIME_LIMIT
+JOB_TIME_LIMIT = 60 * 5
+# Задание в работе без активности дольше этого времени считается
+# брошенным упавшим обработчиком. Должно быть больше времени обработки
+# одной пачки и CELERY_TASK_TIME_LIMIT
+JOB_STALE_AFTER = timedelta(minutes=15)
+
+
+def _claimable_jobs(now):
+    return AdminJob.objects.filter(
+        Q(status='PENDING')
+        | Q(status='RUNNING', heartbeat_at__lt=now - JOB_STALE_AFTER))
+
+
+def _get_changelist_queryset(job):
+    # Тот же queryset, что строит список админки при выборе всех объектов
+    model_admin = admin.site._registry[job.content_type.model_class()]
+    request = HttpRequest()
+    request.method = 'GET'
+    request.GET = QueryDict(job.changelist_query)
+    request.user = job.user or AnonymousUser()
+    changelist = model_admin.get_changelist_instance(request)
+    return changelist.get_queryset(request).order_by('pk')
+
+
+def _next_pks(job, selection, chunk_size):
+    """Следующая пачка pk после last_pk"""
+    if selection is None:
+        position = bisect_right(job.pks, job.last_pk) \
+            if job.last_pk is not None else 0
+        return job.pks[position:position + chunk_size]
+    if job.last_pk is not None:
+        selection = selection.filter(pk__gt=job.last_pk)
+    return list(selection.values_list('pk', flat=True)[:chunk_size])
+
+
+@shared_task()
+def run_admin_job(job_pk, chunk_size=JOB_CHUNK_SIZE,
+                  time_limit=JOB_TIME_LIMIT):
+    """
+    Выполняет действие админки над сохраненной выборкой
+
+    Объекты, выбранные на странице, берутся из сохраненных pk. Все
+    объекты списка выбираются по сохраненным фильтрам пачками по pk
+    (keyset), поэтому обрабатываются и объекты, попавшие под фильтры
+    после запуска действия, если их pk больше последнего обработанного.
+
+    Задача сначала атомарно переводит задание из очереди в работу,
+    поэтому повторная доставка той же задачи ничего не делает, пока
+    обработчик жив. Задание упавшего обработчика без активности дольше
+    JOB_STALE_AFTER забирается заново. pk обрабатываются пачками по
+    возрастанию. Каждая пачка и прогресс задания записываются в своей
+    короткой транзакции, поэтому после перезапуска обработка
+    продолжается с последнего pk
+    """
+    now = timezone.now()
+    claimed = _claimable_jobs(now).filter(pk=job_pk).update(
+        status='RUNNING', heartbeat_at=now,
+        started_at=Coalesce(F('started_at'), Value(now)))
+    if not claimed:
+        return
+    job = AdminJob.objects.select_related('content_type', 'user').get(
+        pk=job_pk)
+    started = time.monotonic()
+    try:
+        process_chunk = import_string(job.action).process_chunk
+        manager = job.content_type.model_class()._default_manager
+        selection = None
+        if job.select_across:
+            selection = _get_changelist_queryset(job)
+            if job.total is None:
+                job.total = selection.count()
+                job.save(update_fields=('total',))
+        pks = _next_pks(job, selection, chunk_size)
+        while pks:
+            with transaction.atomic():
+                process_chunk(manager.filter(pk__in=pks))
+                job.processed += len(pks)
+                job.last_pk = pks[-1]
+                job.heartbeat_at = timezone.now()
+                job.save(update_fields=('processed', 'last_pk',
+                                        'heartbeat_at'))
+            pks = _next_pks(job, selection, chunk_size)
+            if pks and time.monotonic() - started > time_limit:
+                # Продолжение забирает задание из очереди заново
+                job.status = 'PENDING'
+                job.save(update_fields=('status',))
+                run_admin_job.delay(job.pk)
+                return
+    except Exception as error:
+        job.status, job.error = 'FAILED', repr(error)
+        job.finished_at = timezone.now()
+        job.save(update_fields=('status', 'error', 'finished_at'))
+        raise
+    job.status, job.finished_at = 'DONE', timezone.now()
+    job.save(update_fields=('status', 'finished_at'))
+
+
+@shared_task()
+def resume_stale_jobs():
+    """Перезапускает задания, брошенные упавшими обработчиками"""
+    stale = _claimable_jobs(timezone.now()).filter(status='RUNNING')
+    for job_pk in stale.values_list('pk', flat=True):
+        run_admin_job.delay(job_pk)
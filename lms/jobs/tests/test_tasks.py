@@ -0,0 +1,209 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from education.admin import set_archived_status, set_open_status
+from education.models import Section
+from jobs import tasks
+from jobs.actions import create_job
+from jobs.models import AdminJob
+from jobs.tasks import JOB_STALE_AFTER, resume_stale_jobs, run_admin_job
+
+
+class RunAdminJobTests(TestCase):
+    def setUp(self):
+        self.sections = [Section.objects.create(name=f'Section_{num}',
+                                                status='CLOSED')
+                         for num in range(5)]
+
+    def test_chunks(self):
+        job = create_job(set_open_status, Section.objects.all())
+        run_admin_job(job.pk, chunk_size=2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'DONE')
+        self.assertEqual((job.total, job.processed), (5, 5))
+        self.assertEqual(job.last_pk, self.sections[-1].pk)
+        self.assertEqual(job.progress, 100)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(set(Section.objects.values_list('status', flat=True)),
+                         {'OPEN'})
+
+    def test_filtered_selection(self):
+        selected = [section.pk for section in self.sections[1:3]]
+        job = create_job(set_archived_status, Section.objects.filter(
+            pk__in=selected).order_by('-name').distinct())
+        run_admin_job(job.pk, chunk_size=1)
+        self.assertEqual(sorted(Section.objects.filter(
+            status='ARCHIVED').values_list('pk', flat=True)), selected)
+        job.refresh_from_db()
+        self.assertEqual((job.total, job.processed), (2, 2))
+
+    def test_continues_after_time_limit(self):
+        job = create_job(set_open_status, Section.objects.all())
+        with mock.patch.object(tasks.run_admin_job, 'delay') as delay:
+            run_admin_job(job.pk, chunk_size=2, time_limit=0)
+        delay.assert_called_once_with(job.pk)
+        job.refresh_from_db()
+        # Продолжение ждет в очереди
+        self.assertEqual(job.status, 'PENDING')
+        self.assertEqual((job.processed, job.progress), (2, 40))
+        self.assertEqual(Section.objects.filter(status='OPEN').count(), 2)
+        started_at = job.started_at
+
+        run_admin_job(job.pk, chunk_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), ('DONE', 5))
+        self.assertEqual(job.started_at, started_at)
+        self.assertEqual(Section.objects.filter(status='OPEN').count(), 5)
+
+    def test_runs_once(self):
+        job = create_job(set_open_status, Section.objects.all())
+        # Повторная доставка задачи, пока задание выполняется
+        AdminJob.objects.filter(pk=job.pk).update(
+            status='RUNNING', heartbeat_at=timezone.now())
+        with self.assertNumQueries(1):
+            run_admin_job(job.pk)
+        self.assertEqual(Section.objects.filter(status='OPEN').count(), 0)
+
+        AdminJob.objects.filter(pk=job.pk).update(status='PENDING')
+        run_admin_job(job.pk)
+        Section.objects.update(status='CLOSED')
+        run_admin_job(job.pk)
+        self.assertEqual(Section.objects.filter(status='OPEN').count(), 0)
+
+    def test_select_across(self):
+        Section.objects.filter(pk=self.sections[0].pk).update(status='OPEN')
+        job = create_job(set_archived_status, Section.objects.all(),
+                         changelist_query='status__exact=CLOSED')
+        # pk всех объектов списка не выбираются при создании задания
+        self.assertEqual((job.pks, job.total), ([], None))
+        with mock.patch.object(tasks.run_admin_job, 'delay') as delay:
+            run_admin_job(job.pk, chunk_size=3, time_limit=0)
+        delay.assert_called_once_with(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.total, job.processed), (4, 3))
+        # Обработанные объекты уже не подходят под фильтр, продолжение
+        # идет по pk после последнего обработанного
+        run_admin_job(job.pk, chunk_size=3)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.total, job.processed),
+                         ('DONE', 4, 4))
+        self.assertEqual(
+            list(Section.objects.order_by('pk').values_list(
+                'status', flat=True)),
+            ['OPEN'] + ['ARCHIVED'] * 4)
+
+    def crash(self, job, processed):
+        # Обработчик упал после нескольких пачек и не вернул задание
+        AdminJob.objects.filter(pk=job.pk).update(
+            status='RUNNING', processed=processed,
+            last_pk=self.sections[processed - 1].pk,
+            started_at=timezone.now(),
+            heartbeat_at=timezone.now() - JOB_STALE_AFTER * 2)
+
+    def test_resumes_after_crash(self):
+        job = create_job(set_open_status, Section.objects.all())
+        self.crash(job, 2)
+        run_admin_job(job.pk, chunk_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), ('DONE', 5))
+        # Пачки до last_pk не обрабатываются повторно
+        self.assertEqual(
+            list(Section.objects.order_by('pk').values_list(
+                'status', flat=True)),
+            ['CLOSED'] * 2 + ['OPEN'] * 3)
+
+    def test_resume_stale_jobs(self):
+        stale = create_job(set_open_status, Section.objects.all())
+        self.crash(stale, 2)
+        running = create_job(set_open_status, Section.objects.all())
+        AdminJob.objects.filter(pk=running.pk).update(
+            status='RUNNING', heartbeat_at=timezone.now())
+        create_job(set_open_status, Section.objects.all())
+        with mock.patch.object(tasks.run_admin_job, 'delay') as delay:
+            resume_stale_jobs()
+        delay.assert_called_once_with(stale.pk)
+
+    def test_selection_fixed(self):
+        job = create_job(set_open_status, Section.objects.all())
+        self.assertEqual(job.pks, [section.pk for section in self.sections])
+        # Объекты, созданные после запуска действия, не обрабатываются
+        new_section = Section.objects.create(name='New', status='CLOSED')
+        run_admin_job(job.pk, chunk_size=2)
+        new_section.refresh_from_db()
+        self.assertEqual(new_section.status, 'CLOSED')
+
+    def test_failed(self):
+        job = create_job(set_open_status, Section.objects.all())
+        with mock.patch.object(set_open_status, 'process_chunk',
+                               side_effect=ValueError('broken')):
+            with self.assertRaises(ValueError):
+                run_admin_job(job.pk, chunk_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), ('FAILED', 0))
+        self.assertIn('broken', job.error)
+        self.assertEqual(Section.objects.filter(status='OPEN').count(), 0)
+
+
+class BackgroundActionTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email='admin@example.com', password='password123')
+        self.client.force_login(self.admin)
+        self.section = Section.objects.create(name='Section', status='CLOSED')
+
+    def post_action(self, select_across, query=''):
+        with mock.patch.object(tasks.run_admin_job, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('admin:education_section_changelist') + query,
+                    {'action': 'set_open_status',
+                     'select_across': select_across,
+                     'index': 0, '_selected_action': self.section.pk},
+                    follow=True)
+        job = AdminJob.objects.get()
+        delay.assert_called_once_with(job.pk)
+        return job, response
+
+    def test_action_enqueues_job(self):
+        job, response = self.post_action(1, '?status__exact=CLOSED&q=Sec')
+        self.assertEqual((job.action, job.user, job.status),
+                         ('education.admin.set_open_status', self.admin,
+                          'PENDING'))
+        # Для всех объектов списка сохраняются только фильтры и поиск
+        self.assertTrue(job.select_across)
+        self.assertEqual(job.changelist_query, 'status__exact=CLOSED&q=Sec')
+        self.assertEqual((job.pks, job.total), ([], None))
+        self.assertContains(
+            response, reverse('admin:jobs_adminjob_change', args=(job.pk,)))
+        # Объекты меняет задача, а не запрос админки
+        self.section.refresh_from_db()
+        self.assertEqual(self.section.status, 'CLOSED')
+
+    def test_page_selection(self):
+        Section.objects.create(name='Other', status='CLOSED')
+        job, _ = self.post_action(0)
+        self.assertFalse(job.select_across)
+        self.assertEqual((job.pks, job.total), ([self.section.pk], 1))
+
+    def test_select_across_search(self):
+        other = Section.objects.create(name='Other', status='CLOSED')
+        job, _ = self.post_action(1, '?q=Sect')
+        run_admin_job(job.pk)
+        self.section.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.section.status, other.status),
+                         ('OPEN', 'CLOSED'))
+
+    def test_status_page(self):
+        job = create_job(set_open_status, Section.objects.all(), self.admin)
+        run_admin_job(job.pk)
+        response = self.client.get(
+            reverse('admin:jobs_adminjob_change', args=(job.pk,)))
+        self.assertContains(response, 'Завершена')
+        self.assertContains(response, '<progress value="100" max="100">')
+        response = self.client.get(reverse('admin:jobs_adminjob_changelist'))
+        self.assertContains(response, job.description)
@@ -0,0 +1,7 @@
+from jobs.actions import create_job
+from jobs.tasks import run_admin_job
+
+
+def run_action(action, queryset):
+    """Выполняет фоновое действие админки сразу, без очереди Celery"""
+    run_admin_job(create_job(action, queryset).pk)
@@ -0,0 +1,47 @@
+from django.contrib.admin.views.main import ChangeList
+
+from lms.lookups import TrigramContains
+from lms.paginators import EstimatedCountPaginator, get_full_count
+
+
+class EstimatedCountChangeList(ChangeList):
+    """
+    Список объектов админки без точного COUNT(*) по всей таблице
+
+    show_full_result_count выключен в EstimatedCountAdminMixin, поэтому
+    ChangeList не считает root_queryset.count(), а полное количество
+    берется из get_full_count
+    """
+
+    def get_results(self, request):
+        super().get_results(request)
+        if self.queryset.query.where:
+            self.full_result_count = get_full_count(
+                self.root_queryset, self.paginator.estimate_threshold)
+        else:
+            # Без фильтров количество уже посчитано пагинатором
+            self.full_result_count = self.result_count
+        self.show_full_result_count = True
+        self.show_admin_actions = bool(self.full_result_count)
+
+
+class EstimatedCountAdminMixin:
+    """Оценка количества строк в списках админки больших таблиц"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return EstimatedCountChangeList
+
+
+class TrigramSearchAdminMixin:
+    """
+    Поиск админки по search_fields через TrigramContains
+
+    Для каждого поля из search_fields нужен GIN-индекс gin_trgm_ops,
+    иначе поиск читает таблицу целиком, как и icontains
+    """
+
+    def get_search_fields(self, request):
+        return [f'{field}__{TrigramContains.lookup_name}'
+                for field in super().get_search_fields(request)]
@@ -0,0 +1,96 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Сериализатор, отдающий только поля из аргумента fields
+
+    Meta.field_sources описывает колонки БД, которые нужны полям,
+    вычисляемым в методах: {'section': ('section__name',)}
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            return
+        unknown_fields = set(fields) - set(self.fields)
+        if unknown_fields:
+            raise ValidationError(
+                {'fields': f'Неизвестные поля: '
+                           f'{", ".join(sorted(unknown_fields))}'})
+        for field_name in set(self.fields) - set(fields):
+            self.fields.pop(field_name)
+
+    def get_field_sources(self):
+        """Возвращает колонки и связи модели, нужные выбранным полям"""
+        model = self.Meta.model
+        declared_sources = getattr(self.Meta, 'field_sources', {})
+        sources = set()
+        for field_name, field in self.fields.items():
+            if field_name in declared_sources:
+                sources.update(declared_sources[field_name])
+            elif field.source != '*':
+                sources.add(field.source.split('.')[0])
+        columns, relations = set(), set()
+        for source in sources:
+            try:
+                model_field = model._meta.get_field(source.split('__')[0])
+            except FieldDoesNotExist:
+                if source == 'pk':
+                    columns.add(source)
+                # Аннотации queryset и свойства модели не являются колонками
+                continue
+            if model_field.many_to_many or model_field.one_to_many:
+                relations.add(model_field.name)
+            else:
+                columns.add(source)
+        return columns, relations
+
+
+class SparseFieldsetMixin:
+    """
+    Параметр ?fields= для списков и загрузка только нужных колонок
+
+    Колонки для only() берутся из полей сериализатора, поэтому большие
+    текстовые поля, не объявленные в сериализаторе или не запрошенные
+    клиентом, не читаются из БД. Лишние select_related и prefetch_related
+    для не запрошенных связей отбрасываются
+    """
+    fields_query_param = 'fields'
+
+    def get_requested_fields(self):
+        value = self.request.query_params.get(self.fields_query_param)
+        if not value:
+            return None
+        return [field.strip() for field in value.split(',') if field.strip()]
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer = self.get_serializer_class()(
+            fields=self.get_requested_fields(),
+            context=self.get_serializer_context())
+        columns, relations = serializer.get_field_sources()
+        # Ключ пагинации читается у объектов страницы
+        for field in getattr(self.paginator, 'ordering', None) or ():
+            columns.add(field.lstrip('-'))
+
+        joined = {column.split('__')[0] for column in columns
+                  if '__' in column}
+        if isinstance(queryset.query.select_related, dict):
+            select_related = [relation
+                              for relation in queryset.query.select_related
+                              if relation in joined]
+            queryset = queryset.select_related(None)
+            if select_related:
+                queryset = queryset.select_related(*select_related)
+        prefetches = [
+            lookup for lookup in queryset._prefetch_related_lookups
+            if getattr(lookup, 'prefetch_to', lookup).split('__')[0]
+            in relations]
+        return queryset.prefetch_related(None).prefetch_related(
+            *prefetches).only(*columns)
@@ -0,0 +1,18 @@
+from django.db.models import CharField, TextField
+from django.db.models.lookups import IContains
+
+
+@CharField.register_lookup
+@TextField.register_lookup
+class TrigramContains(IContains):
+    """
+    Поиск подстроки без учета регистра через ILIKE '%x%'
+
+    В отличие от icontains, который в PostgreSQL строится как
+    UPPER(col::text) LIKE UPPER('%x%'), условие по самому столбцу
+    использует GIN-индекс с классом операторов gin_trgm_ops
+    """
+    lookup_name = 'trigram_contains'
+
+    def get_rhs_op(self, connection, rhs):
+        return f'ILIKE {rhs}'
@@ -0,0 +1,194 @@
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (PageNumberPagination, CursorPagination,
+                                       Cursor, _reverse_ordering)
+
+# Максимальный размер страницы, который может запросить клиент
+MAX_PAGE_SIZE = 100
+# Начиная с этого количества строк админка показывает оценку планировщика
+ESTIMATE_THRESHOLD = 100_000
+FULL_COUNT_KEY = 'lms:full_count:{}'
+FULL_COUNT_TIMEOUT = 60 * 10
+
+
+class DefaultPagination(PageNumberPagination):
+    """Постраничная пагинация с ограничением размера страницы клиентом"""
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Пагинация по ключу (keyset) с непрозрачным курсором
+
+    В отличие от CursorPagination, курсор хранит значения всех полей
+    сортировки, поэтому следующая страница выбирается условием
+    (f1, f2) > (v1, v2) по составному индексу, без COUNT(*) и OFFSET,
+    даже если значения первого поля повторяются.
+    Поля сортировки задаются в ordering и должны давать уникальный ключ.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+    ordering = 'pk',
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.decode_position()
+
+        # При движении назад сортировка и условие разворачиваются
+        ordering = (_reverse_ordering(self.ordering) if reverse
+                    else self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(
+                    self.get_keyset_filter(ordering, position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # Лишний объект показывает, есть ли страница дальше
+        results = list(queryset[:self.page_size + 1])
+        has_following = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None
+
+        if self.page:
+            self.next_position = self.get_position(self.page[-1])
+            self.previous_position = self.get_position(self.page[0])
+        else:
+            # Пустая страница: ссылки строятся от позиции самого курсора
+            current_position = self.cursor.position if self.cursor else None
+            self.next_position = self.previous_position = current_position
+            self.has_next = self.has_next and current_position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def decode_position(self):
+        if self.cursor is None or self.cursor.position is None:
+            return None
+        try:
+            position = json.loads(self.cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(position, list)
+                or len(position) != len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_position(self, instance):
+        values = []
+        for field in self.ordering:
+            field_name = field.lstrip('-')
+            if isinstance(instance, dict):
+                values.append(instance[field_name])
+            else:
+                values.append(getattr(instance, field_name))
+        # str() сохраняет микросекунды дат, в отличие от DjangoJSONEncoder
+        return json.dumps(values, default=str)
+
+    @staticmethod
+    def get_keyset_filter(ordering, position):
+        # (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ...
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            field_name = field.lstrip('-')
+            lookup = '__lt' if field.startswith('-') else '__gt'
+            condition |= equal & Q(**{field_name + lookup: value})
+            equal &= Q(**{field_name: value})
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self.previous_position))
+
+
+def get_table_estimate(model, using='default'):
+    """
+    Оценка количества строк таблицы модели из статистики PostgreSQL
+
+    Для таблицы, по которой еще не собрана статистика, возвращает -1
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class '
+                       'WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    return int(row[0]) if row else -1
+
+
+def get_query_estimate(queryset):
+    """Оценка количества строк queryset по плану запроса"""
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def get_full_count(queryset, threshold=ESTIMATE_THRESHOLD):
+    """
+    Количество строк queryset без фильтров
+
+    Маленькие таблицы считаются точно. Для больших берется оценка из
+    статистики таблицы, она кешируется, чтобы итог не менялся между
+    страницами списка
+    """
+    cache_key = FULL_COUNT_KEY.format(queryset.model._meta.label_lower)
+    count = cache.get(cache_key)
+    if count is not None:
+        return count
+    count = get_table_estimate(queryset.model, queryset.db)
+    if count < threshold:
+        return queryset.count()
+    cache.set(cache_key, count, FULL_COUNT_TIMEOUT)
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор админки для больших таблиц
+
+    Вместо COUNT(*) по всей выборке использует оценку планировщика, если
+    она не меньше estimate_threshold, иначе считает точно. Выборка без
+    фильтров считается через get_full_count
+    """
+    estimate_threshold = ESTIMATE_THRESHOLD
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return get_full_count(queryset, self.estimate_threshold)
+        estimate = get_query_estimate(queryset)
+        if estimate < self.estimate_threshold:
+            return super().count
+        return estimate
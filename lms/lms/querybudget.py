@@ -0,0 +1,148 @@
+from contextlib import ContextDecorator
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connections, DEFAULT_DB_ALIAS, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+# Наибольшее количество запросов к БД на один ответ маршрута. Количество
+# не должно зависеть от числа строк в БД, это проверяет
+# QueryBudgetMixin.assertQueryBudget. Запрос пользователя по токену не
+# учитывается: в тестах пользователь задается force_authenticate
+QUERY_BUDGETS = {
+    'accounts:api-root': 0,
+    'accounts:customuser-list': 2,
+    'accounts:customuser-me': 0,
+    'accounts:customuser-detail': 1,
+    'accounts:customuser-activation': 2,
+    'accounts:customuser-resend-activation': 2,
+    'accounts:customuser-reset-password': 2,
+    'accounts:customuser-reset-password-confirm': 3,
+    'accounts:customuser-set-password': 1,
+    'accounts:login': 6,
+    'accounts:logout': 2,
+    'accounts:jwt-create': 1,
+    'accounts:jwt-refresh': 0,
+    'accounts:jwt-verify': 0,
+
+    'education:sections_list': 2,
+    'education:section_detail': 4,
+    'education:sections_search': 1,
+    'education:materials_list': 2,
+    'education:material_detail': 3,
+    'education:materials_search': 1,
+    'education:material_test': 5,
+    # Статистика: две вставки строк, счетчики теста, блокировка строк
+    # и счетчики вопросов
+    'education:material_test_submit': 15,
+    'education:autocomplete': 2,
+
+    'payments:user_payments_list': 1,
+    'payments:user_payment_detail': 1,
+
+    # Списки админки: сессия, пользователь, два COUNT(*) и страница,
+    # у материалов - разделы для фильтра, у вопросов - медиа
+    'admin:education_media_changelist': 5,
+    'admin:education_section_changelist': 5,
+    'admin:education_material_changelist': 6,
+    'admin:education_testanswer_changelist': 5,
+    'admin:education_testquestion_changelist': 6,
+    'admin:education_test_changelist': 5,
+    'admin:payments_payment_changelist': 5,
+    'admin:jobs_adminjob_changelist': 5,
+    # Форма теста: вопросы для __str__ теста, выбранные вопросы с
+    # ответами одним запросом. Автодополнение вопросов: план для оценки,
+    # COUNT(*), страница с ответами и медиа
+    'admin:education_test_change': 12,
+    'admin:autocomplete': 6,
+}
+# Маршруты без бюджета, с причиной
+UNBUDGETED = {
+    'accounts:customuser-reset-username': 'не используется, '
+                                          'USERNAME_FIELD = email',
+    'accounts:customuser-reset-username-confirm': 'не используется, '
+                                                  'USERNAME_FIELD = email',
+    'accounts:customuser-set-username': 'не используется, '
+                                        'USERNAME_FIELD = email',
+    'payments:user_pay': 'обращается к Stripe',
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+    """
+    Проверяет, что в блоке или функции не больше budget запросов к БД
+
+    budget - число или имя маршрута из QUERY_BUDGETS:
+        with query_budget('education:sections_list'):
+            client.get(url)
+    """
+
+    def __init__(self, budget, using=DEFAULT_DB_ALIAS):
+        if isinstance(budget, str):
+            budget = QUERY_BUDGETS[budget]
+        self.budget = budget
+        self.context = CaptureQueriesContext(connections[using])
+
+    def __enter__(self):
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and len(self.context) > self.budget:
+            raise QueryBudgetExceeded(
+                f'{len(self.context)} запросов при бюджете {self.budget}:\n'
+                + format_queries(self.context))
+
+
+def format_queries(context):
+    return '\n'.join(f'{num}. {query["sql"]}' for num, query
+                     in enumerate(context.captured_queries, start=1))
+
+
+class QueryBudgetMixin:
+    """
+    Проверки бюджетов запросов для TestCase
+
+    assertQueryBudget выполняет запрос при нескольких объемах данных и
+    проверяет, что количество запросов не растет и не превышает бюджет
+    маршрута, так находятся N+1 в сериализаторах
+    """
+    budget_sizes = 10, 1000
+
+    def assertQueryBudget(self, route, request, grow, sizes=None):
+        """
+        request - функция без аргументов, выполняющая запрос,
+        grow(size) - дополняет данные до size строк
+        """
+        counts = []
+        for size in sizes or self.budget_sizes:
+            grow(size)
+            # Закешированный ответ не обращается к БД, текущий сайт и
+            # типы содержимого кешируются в процессе после первого запроса
+            cache.clear()
+            if apps.is_installed('django.contrib.sites'):
+                apps.get_model('sites', 'Site').objects.clear_cache()
+            if apps.is_installed('django.contrib.contenttypes'):
+                apps.get_model('contenttypes',
+                               'ContentType').objects.clear_cache()
+            reset_queries()
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) \
+                    as context:
+                response = request()
+            self.assertLess(response.status_code, 400,
+                            f'{route}: ответ {response.status_code}')
+            counts.append((size, len(context), context))
+        (_, first, _), (size, last, context) = counts[0], counts[-1]
+        self.assertEqual(
+            first, last,
+            f'{route}: {first} запросов при {counts[0][0]} строках и '
+            f'{last} при {size}:\n{format_queries(context)}')
+        self.assertLessEqual(
+            last, QUERY_BUDGETS[route],
+            f'{route}: {last} запросов при бюджете {QUERY_BUDGETS[route]}:'
+            f'\n{format_queries(context)}')
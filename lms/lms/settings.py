@@ -11,9 +11,11 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -39,6 +41,8 @@ INSTALLED_APPS = [
     'education.apps.EducationConfig',
     'payments.apps.PaymentsConfig',
     'tg.apps.TGConfig',
+    'bench.apps.BenchConfig',
+    'jobs.apps.JobsConfig',
 
     'rest_framework',
     'rest_framework.authtoken',
@@ -59,6 +63,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -100,6 +105,25 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Кеш должен быть общим для всех процессов: счетчики поколений из
+# education.cache, увеличенные админкой, задачами Celery и командами,
+# сбрасывают закешированные ответы API только в общем кеше. Локальный
+# кеш процесса (LocMemCache) допустим только при DEBUG и в тестах
+TESTING = sys.argv[1:2] == ['test']
+if os.getenv('CACHE_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_LOCATION'),
+        }
+    }
+elif not (DEBUG or TESTING):
+    raise ImproperlyConfigured(
+        'Укажите CACHE_LOCATION: без общего кеша изменения данных не '
+        'сбрасывают кеш ответов API в других процессах')
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -139,9 +163,8 @@ AUTH_USER_MODEL = 'accounts.CustomUser'
 # DRF
 # https://www.django-rest-framework.org/api-guide/settings/
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'lms.paginators.DefaultPagination',
     'PAGE_SIZE': 10,
-    'MAX_PAGE_SIZE': 100,
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
@@ -306,6 +329,10 @@ CORS_ALLOWED_HEADERS = [
     'Authorization',
     'Content-Type',
 ]
+CORS_EXPOSE_HEADERS = [
+    'X-Test-Seed',
+    'X-Test-Attempt',
+]
 CSRF_TRUSTED_ORIGINS = [
     'http://localhost:8000',
 ]
@@ -322,6 +349,12 @@ SPECTACULAR_SETTINGS = {
     'REDOC_DIST': 'SIDECAR',
 }
 
+# Django-import-export
+# https://django-import-export.readthedocs.io/en/latest/installation.html#settings
+# Импорт из админки откатывается целиком при любой ошибке
+IMPORT_EXPORT_USE_TRANSACTIONS = True
+IMPORT_EXPORT_SKIP_ADMIN_LOG = True
+
 # Mailing
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 # Debugging
@@ -353,4 +386,17 @@ CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND')
 CELERY_TIMEZONE = os.getenv('TIME_ZONE')
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 60 * 10
-CELERY_BEAT_SCHEDULE = {}
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-test-stats': {
+        'task': 'education.tasks.reconcile_stats',
+        'schedule': timedelta(hours=6),
+    },
+    'analyze-tests': {
+        'task': 'education.tasks.analyze_tests',
+        'schedule': timedelta(days=1),
+    },
+    'resume-stale-jobs': {
+        'task': 'jobs.tasks.resume_stale_jobs',
+        'schedule': timedelta(minutes=15),
+    },
+}
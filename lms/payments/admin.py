@@ -3,10 +3,12 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 
 from payments.models import Payment
+from lms.admin import EstimatedCountAdminMixin, TrigramSearchAdminMixin
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(EstimatedCountAdminMixin, TrigramSearchAdminMixin,
+                   admin.ModelAdmin):
     fields = (('user', 'paid_section'),
               ('payment_type', 'payment_method'),
               ('payments_left',), )
@@ -14,8 +16,10 @@ class PaymentAdmin(admin.ModelAdmin):
                     'payment_method', 'payments_left', 'last_payment_date',)
     list_display_links = ('id', 'payment_type', 'payment_method',
                           'payments_left', 'last_payment_date',)
+    list_select_related = 'user', 'paid_section',
     list_filter = 'payment_type', 'payment_method',
-    search_fields = 'user', 'section_link',
+    search_fields = 'user__email', 'paid_section__name',
+    autocomplete_fields = 'user', 'paid_section',
     readonly_fields = ('payment_type', 'payment_method', 'payments_left',
                        'last_payment_date')
 
@@ -1,48 +1,110 @@
+import random
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
 
 from education.models import Section
 from payments.models import Payment
 
 User = get_user_model()
 
+# Срок оплаты долями, см. Payment.payment_type_choices
+SHARE_DAYS = 30
+SHARE_PAYMENTS = 4
+
 
 class Command(BaseCommand):
     """Команда для удаления всех данных из payments и
-     наполнения всех моделей"""
+     наполнения всех моделей.
+     Пары пользователь-раздел выбираются из id, загруженных в память,
+     платежи создаются через bulk_create"""
     help = 'Удаляет все данные из payments, и заполняет БД новыми данными'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--payments', type=int, default=4,
+                            help='Количество платежей')
+        parser.add_argument('--share-ratio', type=float, default=0.5,
+                            help='Доля платежей долями, от 0 до 1')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько последних дней платежи')
+        parser.add_argument('--seed', type=int,
+                            help='Seed для воспроизводимых данных')
+        parser.add_argument('--batch-size', type=int, default=5_000,
+                            help='Количество платежей в одном запросе')
+
     def handle(self, *args, **options):
+        if (options['payments'] < 0 or options['days'] < 1
+                or options['batch_size'] < 1
+                or not 0 <= options['share_ratio'] <= 1):
+            raise CommandError('Недопустимые параметры')
+        user_ids = list(User.objects.filter(is_staff=False).order_by(
+            'pk').values_list('pk', flat=True))
+        section_ids = list(Section.objects.order_by('pk').values_list(
+            'pk', flat=True))
+        if not user_ids or not section_ids:
+            raise CommandError('Сначала создайте пользователей и разделы: '
+                               'c_usr и c_edudata')
+        # Пользователь оплачивает раздел не больше одного раза
+        pairs_count = len(user_ids) * len(section_ids)
+        if options['payments'] > pairs_count:
+            raise CommandError(f'Можно создать не больше {pairs_count} '
+                               f'платежей')
 
-        Payment.objects.all().delete()
-        Payment.objects.create(
-            user=User.objects.filter(is_staff=False).order_by('?').first(),
-            paid_section=Section.objects.order_by('?').first(),
-            payment_type='FULL',
-            payment_method='STIPE',
-            payments_left=0,
-        )
-        Payment.objects.create(
-            user=User.objects.filter(is_staff=False).order_by('?').first(),
-            paid_section=Section.objects.order_by('?').first(),
-            payment_type='FULL',
-            payment_method='STIPE',
-            payments_left=0,
-        )
-        Payment.objects.create(
-            user=User.objects.filter(is_staff=False).order_by('?').first(),
-            paid_section=Section.objects.order_by('?').first(),
-            payment_type='SHARE_30D4P',
-            payment_method='STIPE',
-            payments_left=4,
-        )
-        Payment.objects.create(
-            user=User.objects.filter(is_staff=False).order_by('?').first(),
-            paid_section=Section.objects.order_by('?').first(),
-            payment_type='SHARE_30D4P',
-            payment_method='STIPE',
-            payments_left=1,
-        )
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        payments = []
+        for pair in rng.sample(range(pairs_count), options['payments']):
+            user_id, section_id = divmod(pair, len(section_ids))
+            payments.append(self.get_payment(
+                rng, now, options, user_ids[user_id], section_ids[section_id]))
+        # Порядок order_with_respect_to - по дате платежа пользователя
+        payments.sort(key=lambda payment: (payment.user_id,
+                                           payment.last_payment_date))
+        previous_user_id, order = None, 0
+        for payment in payments:
+            order = order + 1 if payment.user_id == previous_user_id else 0
+            payment._order = order
+            previous_user_id = payment.user_id
+
+        # auto_now перезаписывает дату при вставке, на время вставки он
+        # выключается, чтобы записать сгенерированные даты одним запросом
+        date_field = Payment._meta.get_field('last_payment_date')
+        auto_now, date_field.auto_now = date_field.auto_now, False
+        try:
+            with transaction.atomic():
+                Payment.objects.all().delete()
+                for start in range(0, len(payments), options['batch_size']):
+                    batch = payments[start:start + options['batch_size']]
+                    Payment.objects.bulk_create(batch)
+                    self.stdout.write(
+                        f'Создано платежей: {start + len(batch)}')
+        finally:
+            date_field.auto_now = auto_now
 
         self.stdout.write(self.style.SUCCESS(
             'Добавили данные для приложения payments'))
+
+    @staticmethod
+    def get_payment(rng, now, options, user_id, section_id):
+        if rng.random() < options['share_ratio']:
+            payments_left = rng.randint(0, SHARE_PAYMENTS)
+            payment_type = 'SHARE_30D4P'
+        else:
+            payments_left = 0
+            payment_type = 'FULL'
+        if payments_left:
+            # Неоконченная оплата долями - последний платеж в этом сроке
+            days = rng.uniform(0, min(SHARE_DAYS, options['days']))
+        else:
+            days = rng.uniform(0, options['days'])
+        return Payment(
+            user_id=user_id,
+            paid_section_id=section_id,
+            payment_type=payment_type,
+            payment_method='STIPE',
+            payments_left=payments_left,
+            last_payment_date=now - timedelta(days=days),
+        )
@@ -62,6 +62,11 @@ class Payment(models.Model):
         verbose_name_plural = 'платежи'
         order_with_respect_to = 'user'
         db_table_comment = 'Модель платежей за разделы'
+        indexes = [
+            # Ключ пагинации истории платежей пользователя
+            models.Index(fields=('user', '-last_payment_date', '-id'),
+                         name='payments_payment_user_date_idx'),
+        ]
 
     def clean(self):
         # Проверка отсутствия оставшихся платежей при полной оплате
@@ -0,0 +1,6 @@
+from lms.paginators import KeysetPagination
+
+
+class PaymentKeysetPagination(KeysetPagination):
+    """Пагинация истории платежей, начиная с последних"""
+    ordering = '-last_payment_date', '-pk'
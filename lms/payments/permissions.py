@@ -2,5 +2,11 @@ from rest_framework.permissions import BasePermission
 
 
 class IsOwner(BasePermission):
+    """Доступ только к платежам пользователя из URL и его объектам"""
+
+    def has_permission(self, request, view):
+        user_pk = view.kwargs.get('user_pk', view.kwargs.get('user_id'))
+        return request.user.is_authenticated and request.user.pk == user_pk
+
     def has_object_permission(self, request, view, obj):
         return request.user == obj.user
@@ -1,11 +1,13 @@
 from rest_framework import serializers
 
+from lms.fieldsets import SparseFieldsetSerializerMixin
 from payments.models import Payment, UserCardData
 from payments.validators import (CardNumberValidator, ExpiryMonthValidator,
                                  ExpiryYearValidator, CVCValidator)
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(SparseFieldsetSerializerMixin,
+                        serializers.ModelSerializer):
     paid_section = serializers.SerializerMethodField(
         'get_paid_section', label='Оплаченный раздел')
     user = serializers.SerializerMethodField(
@@ -24,6 +26,10 @@ class PaymentSerializer(serializers.ModelSerializer):
                   'last_payment_date',)
         read_only_fields = ('payment_type', 'payment_method', 'payments_left',
                             'last_payment_date',)
+        field_sources = {
+            'paid_section': ('paid_section__name',),
+            'user': ('user__first_name', 'user__last_name', 'user__email'),
+        }
 
 
 class CardInfoSerializer(serializers.ModelSerializer):
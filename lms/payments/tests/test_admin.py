@@ -1,10 +1,17 @@
+from unittest import mock
+
 from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, RequestFactory
+from django.urls import reverse
 
 from accounts.models import CustomUser
 from payments.admin import PaymentAdmin
 from payments.models import Payment
 from education.models import Section
+from lms.paginators import (EstimatedCountPaginator, get_table_estimate,
+                            get_query_estimate, get_full_count)
 
 
 class PaymentAdminTests(TestCase):
@@ -47,3 +54,66 @@ class PaymentAdminTests(TestCase):
         link = self.payment_admin.user_link(self.payment)
         expected_link = ''
         self.assertEqual(link, expected_link)
+
+
+class EstimatedCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_superuser(
+            email='admin@example.com', password='password123')
+        self.client.force_login(self.admin)
+        sections = Section.objects.bulk_create(
+            Section(name=f'Section_{num}') for num in range(30))
+        Payment.objects.bulk_create(
+            Payment(user=self.admin, paid_section=section, _order=num,
+                    payment_type='FULL' if num % 3 else 'SHARE_30D4P',
+                    payment_method='STIPE')
+            for num, section in enumerate(sections))
+        self.url = reverse('admin:payments_payment_changelist')
+
+    def get_changelist(self, data=None):
+        return self.client.get(self.url, data).context['cl']
+
+    def test_exact_count_below_threshold(self):
+        changelist = self.get_changelist({'payment_type': 'FULL'})
+        self.assertEqual((changelist.result_count,
+                          changelist.full_result_count), (20, 30))
+        self.assertTrue(changelist.show_full_result_count)
+
+    def test_estimate_above_threshold(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE payments_payment')
+        with mock.patch.object(EstimatedCountPaginator,
+                               'estimate_threshold', 10):
+            changelist = self.get_changelist({'payment_type': 'FULL'})
+            estimate = get_query_estimate(
+                Payment.objects.filter(payment_type='FULL'))
+            self.assertEqual(changelist.result_count, estimate)
+            self.assertEqual(changelist.full_result_count,
+                             get_table_estimate(Payment))
+            # Полное количество большой таблицы берется из кеша
+            Payment.objects.filter(payment_type='FULL').delete()
+            with self.assertNumQueries(0):
+                self.assertEqual(get_full_count(Payment.objects.all(), 10),
+                                 changelist.full_result_count)
+
+    def test_full_count_not_cached_below_threshold(self):
+        self.assertEqual(get_full_count(Payment.objects.all()), 30)
+        Payment.objects.filter(payment_type='FULL').delete()
+        self.assertEqual(get_full_count(Payment.objects.all()), 10)
+
+    def test_search(self):
+        changelist = self.get_changelist({'q': 'section_1'})
+        self.assertEqual(changelist.result_count, 11)
+        changelist = self.get_changelist({'q': 'ADMIN@'})
+        self.assertEqual(changelist.result_count, 30)
+
+    def test_change_form_renders_selected_only(self):
+        payment = Payment.objects.first()
+        content = self.client.get(reverse(
+            'admin:payments_payment_change',
+            args=(payment.pk,))).content.decode()
+        self.assertIn('admin-autocomplete', content)
+        self.assertIn(payment.paid_section.name, content)
+        other = Section.objects.exclude(pk=payment.paid_section_id).first()
+        self.assertNotIn(f'>{other}<', content)
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from education.models import Section
+from payments.models import Payment
+
+
+class PayDataCommandTest(TestCase):
+    def setUp(self):
+        for num in range(5):
+            CustomUser.objects.create(email=f'user{num}@example.com',
+                                      first_name='Test', last_name='User')
+        for num in range(4):
+            Section.objects.create(name=f'Section_{num}')
+
+    def generate(self, *args):
+        call_command('c_paydata', *args, stdout=StringIO())
+
+    def test_payments(self):
+        self.generate('--payments', '20', '--days', '90', '--seed', '1',
+                      '--batch-size', '7')
+        self.assertEqual(Payment.objects.count(), 20)
+        # Пары пользователь-раздел не повторяются
+        self.assertFalse(Payment.objects.values(
+            'user', 'paid_section').annotate(n=Count('pk')).filter(
+            n__gt=1).exists())
+        self.assertEqual(set(Payment.objects.values_list(
+            'payment_type', flat=True)), {'FULL', 'SHARE_30D4P'})
+        self.assertFalse(Payment.objects.filter(
+            payment_type='FULL', payments_left__gt=0).exists())
+        # Даты распределены по периоду, а не равны времени вставки
+        dates = Payment.objects.values_list('last_payment_date', flat=True)
+        self.assertGreater(max(dates) - min(dates), timedelta(days=1))
+        self.assertGreater(min(dates), timezone.now() - timedelta(days=91))
+
+    def test_dates_written_once(self):
+        with CaptureQueriesContext(connection) as context:
+            self.generate('--payments', '20', '--seed', '3')
+        # Даты записываются вставкой, без UPDATE после bulk_create
+        self.assertFalse([query for query in context.captured_queries
+                          if query['sql'].startswith('UPDATE')])
+        self.assertTrue(
+            Payment._meta.get_field('last_payment_date').auto_now)
+
+    def test_order_by_date(self):
+        self.generate('--payments', '20', '--seed', '2')
+        for user in CustomUser.objects.all():
+            dates = list(user.payments.order_by('_order').values_list(
+                'last_payment_date', flat=True))
+            self.assertEqual(dates, sorted(dates))
+
+    def test_too_many_payments(self):
+        with self.assertRaises(CommandError):
+            self.generate('--payments', '21')
@@ -0,0 +1,59 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import test
+
+from accounts.models import CustomUser
+from bench.endpoints import get_route_names
+from education.models import Section
+from lms.querybudget import QUERY_BUDGETS, UNBUDGETED, QueryBudgetMixin
+from payments.models import Payment
+
+
+class PaymentsQueryBudgetTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        self.user = CustomUser.objects.create_user(
+            email='testuser@example.com', password='password123',
+            first_name='Test', last_name='User')
+        self.client.force_authenticate(self.user)
+
+    def grow_payments(self, size):
+        # У каждого платежа свой раздел: пара пользователь-раздел уникальна
+        count = Payment.objects.filter(user=self.user).count()
+        sections = Section.objects.bulk_create(
+            Section(name=f'Section_{num}') for num in range(count, size))
+        Payment.objects.bulk_create(
+            Payment(user=self.user, paid_section=section, _order=num,
+                    payment_type='FULL', payment_method='STIPE')
+            for num, section in enumerate(sections, start=count))
+
+    def test_routes_have_budgets(self):
+        routes = [name for name in get_route_names()
+                  if name.startswith('payments:')]
+        self.assertEqual([name for name in routes if name not in
+                          QUERY_BUDGETS and name not in UNBUDGETED], [])
+
+    def test_payments_list(self):
+        url = reverse('payments:user_payments_list',
+                      kwargs={'user_pk': self.user.pk})
+        self.assertQueryBudget('payments:user_payments_list',
+                               lambda: self.client.get(url),
+                               self.grow_payments)
+
+    def test_payment_changelist(self):
+        self.client.force_login(CustomUser.objects.create_superuser(
+            email='admin@example.com', password='password123'))
+        url = reverse('admin:payments_payment_changelist')
+        self.assertQueryBudget('admin:payments_payment_changelist',
+                               lambda: self.client.get(url),
+                               self.grow_payments)
+
+    def test_payment_detail(self):
+        self.grow_payments(1)
+        payment = Payment.objects.get()
+        url = reverse('payments:user_payment_detail',
+                      kwargs={'user_id': self.user.pk,
+                              'payment_pk': payment.pk})
+        self.assertQueryBudget('payments:user_payment_detail',
+                               lambda: self.client.get(url),
+                               self.grow_payments)
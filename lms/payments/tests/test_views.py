@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status, test
+
+from accounts.models import CustomUser
+from education.models import Section
+from payments.models import Payment
+
+
+class UserPaymentListAPIViewTest(TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        self.user = CustomUser.objects.create_user(
+            email='testuser@example.com',
+            password='password123',
+            first_name='Test',
+            last_name='User',
+        )
+        self.client.force_authenticate(self.user)
+        self.section = Section.objects.create(name='Test_Section')
+        now = timezone.now()
+        for days in range(5):
+            payment = Payment.objects.create(
+                user=self.user,
+                paid_section=self.section,
+                payment_type='FULL',
+                payment_method='STIPE',
+            )
+            # auto_now не дает задать дату при создании, даты отличаются
+            # на микросекунды
+            Payment.objects.filter(pk=payment.pk).update(
+                last_payment_date=now - timedelta(microseconds=days % 3))
+
+    def test_keyset_order(self):
+        url = reverse('payments:user_payments_list',
+                      kwargs={'user_pk': self.user.pk}) + '?page_size=2'
+        pks = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pks += [payment['pk'] for payment in response.data['results']]
+            url = response.data['next']
+        expected_pks = list(Payment.objects.order_by(
+            '-last_payment_date', '-pk').values_list('pk', flat=True))
+        self.assertEqual(pks, expected_pks)
+
+    def test_queries(self):
+        url = reverse('payments:user_payments_list',
+                      kwargs={'user_pk': self.user.pk})
+        # Платежи с пользователем и разделом одним запросом
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data['results'][0]['paid_section'],
+                         'Test_Section')
+
+    def test_fields_param(self):
+        url = reverse('payments:user_payments_list',
+                      kwargs={'user_pk': self.user.pk})
+        response = self.client.get(url, {'fields': 'pk,payments_left'})
+        for payment in response.data['results']:
+            self.assertEqual(set(payment), {'pk', 'payments_left'})
+
+    def test_other_user_forbidden(self):
+        other = CustomUser.objects.create_user(
+            email='other@example.com', password='password123',
+            first_name='Other', last_name='User')
+        url = reverse('payments:user_payments_list',
+                      kwargs={'user_pk': other.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class UserPaymentDetailAPIViewTest(TestCase):
+    def setUp(self):
+        self.client = test.APIClient()
+        self.user = CustomUser.objects.create_user(
+            email='testuser@example.com',
+            password='password123',
+            first_name='Test',
+            last_name='User',
+        )
+        self.client.force_authenticate(self.user)
+        self.payment = Payment.objects.create(
+            user=self.user,
+            paid_section=Section.objects.create(name='Test_Section'),
+            payment_type='FULL',
+            payment_method='STIPE',
+        )
+
+    def test_detail(self):
+        url = reverse('payments:user_payment_detail',
+                      kwargs={'user_id': self.user.pk,
+                              'payment_pk': self.payment.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['pk'], self.payment.pk)
+        self.assertEqual(response.data['paid_section'], 'Test_Section')
+
+    def test_not_found(self):
+        url = reverse('payments:user_payment_detail',
+                      kwargs={'user_id': self.user.pk,
+                              'payment_pk': self.payment.pk + 1})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_other_user_forbidden(self):
+        other = CustomUser.objects.create_user(
+            email='other@example.com', password='password123',
+            first_name='Other', last_name='User')
+        self.client.force_authenticate(other)
+        url = reverse('payments:user_payment_detail',
+                      kwargs={'user_id': self.user.pk,
+                              'payment_pk': self.payment.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_anonymous(self):
+        self.client.force_authenticate(None)
+        url = reverse('payments:user_payment_detail',
+                      kwargs={'user_id': self.user.pk,
+                              'payment_pk': self.payment.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
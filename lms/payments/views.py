@@ -9,18 +9,22 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from education.models import Section
+from lms.fieldsets import SparseFieldsetMixin
 from payments.models import Payment
+from payments.paginators import PaymentKeysetPagination
 from payments.permissions import IsOwner
 from payments.serializers import PaymentSerializer, CardInfoSerializer
 
 
-class UserPaymentListAPIView(generics.ListAPIView):
+class UserPaymentListAPIView(SparseFieldsetMixin, generics.ListAPIView):
     serializer_class = PaymentSerializer
     permission_classes = [IsOwner]
+    pagination_class = PaymentKeysetPagination
 
     def get_queryset(self):
-        user_id = self.kwargs['user_id']
-        return Payment.objects.filter(user_id=user_id)
+        user_id = self.kwargs['user_pk']
+        return Payment.objects.filter(user_id=user_id).select_related(
+            'user', 'paid_section')
 
 
 class UserPaymentDetailAPIView(generics.RetrieveAPIView):
@@ -30,11 +34,14 @@ class UserPaymentDetailAPIView(generics.RetrieveAPIView):
 
     def get_object(self):
         user_id = self.kwargs['user_id']
-        payment_id = self.kwargs['payment_id']
+        payment_id = self.kwargs['payment_pk']
         try:
-            return Payment.objects.get(id=payment_id, user_id=user_id)
+            payment = Payment.objects.select_related(
+                'user', 'paid_section').get(id=payment_id, user_id=user_id)
         except Payment.DoesNotExist:
             raise NotFound('Платеж не найден')
+        self.check_object_permissions(self.request, payment)
+        return payment
 
 
 class UserPaySection(APIView):